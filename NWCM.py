@@ -1,5 +1,22 @@
+from typing import TYPE_CHECKING, List, Tuple
+
+from tracelog import TRACE_LEVELS
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
 class NWCM:
-    def __init__(self, cost_matrix, supply, demand):
+    def __init__(self, cost_matrix, supply, demand, trace="full"):
+        """
+        trace: "full" collects every intermediate tableau, "summary" only the final
+               one and the total cost, "none" skips all the formatting.
+        cost_matrix, supply and demand are not modified, an unbalanced problem gets
+        a virtual dummy line (balancing.DummyCosts, also returned by get_ToOptimize).
+        """
+        if trace not in TRACE_LEVELS:
+            raise ValueError(f"Unknown trace level {trace!r}, expected one of {TRACE_LEVELS}")
+        self.trace = trace
         self.cost_matrix = cost_matrix
         self.original_supply = supply[:]
         self.original_demand = demand[:]
@@ -19,8 +36,9 @@ class NWCM:
         self.result = self.calculate_total_cost(self.allocation, self.cost_matrix)
 
         # Print the final allocation matrix
-        self.collect_tableau(self.allocation, self.final_supply, self.final_demand, "Tabla Final")
-        self.collect_results(self.result)
+        if self.trace != "none":
+            self.collect_tableau(self.allocation, self.final_supply, self.final_demand, "Tabla Final")
+            self.collect_results(self.result)
 
     def northwest_corner_method(self, cost_matrix, supply, demand):
         iteration = 1
@@ -30,6 +48,12 @@ class NWCM:
 
         i, j = 0, 0  # Start at the top-left corner
 
+        full = self.trace == "full"
+        if not full:
+            # No intermediate tableau to show, the staircase is computed at once
+            for i, j, amount in northwest_corner(supply, demand):
+                allocation[i][j] = amount
+            return allocation, [0] * cols, [0] * rows
         self.collect_tableau(allocation, supply[:], demand[:], 0)
 
         while i < rows and j < cols:
@@ -62,17 +86,19 @@ class NWCM:
         total_cost = 0
         rows = len(allocation)
         cols = len(allocation[0])
-        total_cost_operation = str("")
+        total_cost_operation = []
+        trace = self.trace != "none"
 
         for i in range(rows):
             for j in range(cols):
                 total_cost += allocation[i][j] * cost_matrix[i][j]
-                if allocation[i][j] != 0 and cost_matrix[i][j] != 0:
-                    total_cost_operation += str(allocation[i][j]) + "*" + str(cost_matrix[i][j])
+                if trace and allocation[i][j] != 0 and cost_matrix[i][j] != 0:
+                    total_cost_operation.append(str(allocation[i][j]) + "*" + str(cost_matrix[i][j]))
                     if i < rows - 1 or j < cols - 1:
-                        total_cost_operation += " + "
+                        total_cost_operation.append(" + ")
 
-        return total_cost_operation + " = " + str(total_cost)
+        self.total_cost = total_cost
+        return "".join(total_cost_operation) + " = " + str(total_cost)
 
     def collect_tableau(self, tableau, supply, demand, iteration="Tabla Final"):
         rows = len(tableau)
@@ -83,9 +109,7 @@ class NWCM:
         tableau_str.append(" " * (cols * 6 + 3) + "    Oferta")
 
         for i in range(rows):
-            row_str = f"{i + 1:2} |"
-            for j in range(cols):
-                row_str += f"{tableau[i][j]:6}"
+            row_str = f"{i + 1:2} |" + "".join(f"{tableau[i][j]:6}" for j in range(cols))
             row_str += f" {(supply[i] if i < len(supply) else 0):6}"
             tableau_str.append(row_str)
 
@@ -111,15 +135,13 @@ class NWCM:
         if total_supply > total_demand:
             self.tableau_strings.append("Agregando valor de demanda de " + str((total_supply - total_demand)) + ".")
             self.tableau_strings.append("\n")
-            demand.append(total_supply - total_demand)
-            for row in cost_matrix:
-                row.append(0)
         elif total_supply < total_demand:
             self.tableau_strings.append("Agregando valor de oferta de " + str(total_demand - total_supply)+ ".")
             self.tableau_strings.append("\n")
-            supply.append(total_demand - total_supply)
-            cost_matrix.append([0] * len(demand))
-    
+
+        # The dummy line is virtual, the caller's cost matrix is left as it was
+        from balancing import balance_problem
+        cost_matrix, supply, demand = balance_problem(cost_matrix, supply, demand)
         return supply, demand, cost_matrix, True
     
     def collect_results(self, result):
@@ -135,3 +157,115 @@ class NWCM:
         #return final answers
         return allocations, self.cost_matrix, num_allocations
 
+
+
+def northwest_corner_batch(supply, demand) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Northwest corner staircase of a stack of problems with the same shape, in one
+    vectorized pass and without any rows * columns table.
+
+    The cumulative supply and demand of an instance are merged: every stretch
+    between two consecutive totals is one basic cell, its row and column are how
+    many rows and columns were used up before it. An unbalanced instance gets a
+    virtual dummy row m (or column n) with what is missing, nothing is copied.
+    Differences of cumulative sums are only exact for integers, other amounts
+    are allocated one cell after another with what is left, like
+    NWCM.northwest_corner_method (see _northwest_corner_loop).
+
+    Args:
+        supply: (instances, m) array
+        demand: (instances, n) array
+    Returns: (instance, row, column, amount) arrays of every basic cell with a
+             positive amount, by instance and in staircase order. Only the
+             dummy row / column of an unbalanced instance can be m / n.
+    """
+    import numpy as np
+
+    supply = np.asarray(supply)
+    demand = np.asarray(demand)
+    if supply.ndim != 2 or demand.ndim != 2 or supply.shape[0] != demand.shape[0]:
+        raise ValueError("supply and demand must be (instances, rows) and (instances, columns) arrays")
+    count, m = supply.shape
+    n = demand.shape[1]
+    if not (np.issubdtype(supply.dtype, np.integer) and np.issubdtype(demand.dtype, np.integer)):
+        cells = [(k, i, j, amount) for k in range(count)
+                 for i, j, amount in _northwest_corner_loop(supply[k].tolist(), demand[k].tolist())]
+        instance, rows, cols = (np.array([cell[field] for cell in cells], dtype=np.intp) for field in range(3))
+        amounts = np.array([cell[3] for cell in cells], dtype=np.result_type(supply, demand))
+        return instance, rows, cols, amounts
+
+    # Virtual dummies: the last row and column take what the other side has in excess
+    missing = demand.sum(axis=1) - supply.sum(axis=1)
+    zero = np.zeros_like(missing)
+    ends = np.concatenate([
+        np.cumsum(np.column_stack([supply, np.maximum(missing, zero)]), axis=1),
+        np.cumsum(np.column_stack([demand, np.maximum(-missing, zero)]), axis=1),
+    ], axis=1)
+    is_row = np.zeros(ends.shape[1], dtype=bool)
+    is_row[:m + 1] = True
+
+    order = np.argsort(ends, axis=1, kind="stable")
+    ends = np.take_along_axis(ends, order, axis=1)
+    is_row = is_row[order]
+    amount = np.diff(ends, axis=1, prepend=0)
+    # Lines used up before each stretch, the stretch itself lies in the next one
+    rows_done = np.cumsum(is_row, axis=1) - is_row
+    cols_done = np.cumsum(~is_row, axis=1) - ~is_row
+
+    cell = amount > 0
+    instance = np.broadcast_to(np.arange(count)[:, None], cell.shape)[cell]
+    return instance, rows_done[cell], cols_done[cell], amount[cell]
+
+
+def _northwest_corner_loop(supply: List, demand: List) -> List[Tuple[int, int, float]]:
+    """
+    Northwest corner of one problem, cell after cell. Floats are taken as the
+    decimals they print as, so what is left of 0.3 after 0.1 is exactly 0.2
+    """
+    from fractions import Fraction
+
+    floats = any(isinstance(value, float) for value in supply + demand)
+    if floats:
+        supply = [Fraction(repr(value)) for value in supply]
+        demand = [Fraction(repr(value)) for value in demand]
+    missing = sum(demand) - sum(supply)
+    supply = supply + [missing] if missing > 0 else supply
+    demand = demand + [-missing] if missing < 0 else demand
+    cells = []
+    i = j = 0
+    while i < len(supply) and j < len(demand):
+        amount = min(supply[i], demand[j])
+        if amount > 0:
+            cells.append((i, j, float(amount) if floats else amount))
+        if supply[i] < demand[j]:
+            demand[j] -= supply[i]
+            i += 1
+        elif supply[i] > demand[j]:
+            supply[i] -= demand[j]
+            j += 1
+        else:
+            i += 1
+            j += 1
+    return cells
+
+
+def northwest_corner(supply, demand) -> List[Tuple[int, int, float]]:
+    """
+    Northwest corner staircase of one problem as (row, column, amount) cells (see
+    northwest_corner_batch), at most m + n of them. Row m / column n is the virtual
+    dummy of an unbalanced problem.
+    """
+    _, rows, cols, amounts = northwest_corner_batch([supply], [demand])
+    return list(zip(rows.tolist(), cols.tolist(), amounts.tolist()))
+
+
+def northwest_corner_sparse(costs, supply, demand):
+    """
+    Northwest corner allocation of a sparse problem (sparse.SparseCosts) as a list of
+    (row, column, amount), without building the rows * columns table. The corner
+    rule does not look at the costs, so some cells can be missing lanes; those are
+    taken out of the solution by dimo.simplex.TransportSimplex when it is possible.
+    """
+    if (len(supply), len(demand)) != costs.shape:
+        raise ValueError(f"supply and demand do not match the {costs.shape[0]}x{costs.shape[1]} costs")
+    return northwest_corner(supply, demand)
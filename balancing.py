@@ -0,0 +1,194 @@
+"""
+Balancing of unbalanced problems with a virtual dummy line.
+
+The dummy row (more demand than supply) or column (more supply than demand) has
+zero costs and takes the difference of the totals. DummyCosts shows the cost
+matrix with that line without storing it or touching the caller's matrix:
+
+    costs, supply, demand = balance_problem(costs, supply, demand)
+
+The list based methods index it as costs[i][j], the array based ones read
+blocks (costs[start:stop], costs[rows][:, cols], costs[i, :]) that come out as
+ndarrays with the zeros filled in; only np.asarray(costs) builds it whole.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from sparse import SparseCosts
+
+
+class _DummyRow:
+    """Row i of a DummyCosts for the list based methods, costs[i][j] without a copy"""
+
+    def __init__(self, costs: "DummyCosts", i: int):
+        self._costs = costs
+        self._i = i
+
+    def __len__(self) -> int:
+        return self._costs.shape[1]
+
+    def __getitem__(self, j):
+        # Python numbers, like the lists of lists these methods were written for
+        if isinstance(j, (int, np.integer)):
+            return self._costs[self._i, j].item()
+        return self._costs[self._i, :][j]
+
+    def __iter__(self):
+        return iter(self._costs[self._i, :].tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        row = self._costs[self._i, :]
+        return row if dtype is None else row.astype(dtype)
+
+
+class DummyCosts:
+    """
+    Cost matrix of an unbalanced problem plus its zero cost dummy row or column,
+    the last one, never stored. Indexing follows numpy: costs[i, j] and costs[i][j]
+    are one cost, costs[i] is a row (a light view), any other index gives an
+    ndarray block. The base matrix (lists, ndarray or numpy.memmap) is read only.
+    """
+
+    ndim = 2
+
+    def __init__(self, costs, dummy_row: bool):
+        self.base = costs if isinstance(costs, np.ndarray) else np.asarray(costs)
+        self.dummy_row = dummy_row
+        rows, cols = self.base.shape
+        self.shape = (rows + 1, cols) if dummy_row else (rows, cols + 1)
+        self.dtype = self.base.dtype
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __iter__(self):
+        return (_DummyRow(self, i) for i in range(self.shape[0]))
+
+    def _line(self, index, axis: int) -> int:
+        size = self.shape[axis]
+        if not -size <= index < size:
+            raise IndexError(f"index {index} is out of bounds for axis {axis} with size {size}")
+        return int(index) % size
+
+    def _row(self, i: int) -> np.ndarray:
+        rows, cols = self.base.shape
+        if i == rows:
+            return np.zeros(cols, dtype=self.dtype)
+        if self.dummy_row:
+            return np.asarray(self.base[i])
+        row = np.zeros(cols + 1, dtype=self.dtype)
+        row[:cols] = self.base[i]
+        return row
+
+    def __getitem__(self, index):
+        if type(index) is tuple and len(index) == 2 and type(index[0]) is int and type(index[1]) is int:
+            # One cost, the common case of the solvers' inner loops
+            i, j = index
+            rows, cols = self.base.shape
+            if 0 <= i < rows and 0 <= j < cols:
+                return self.base[i, j]
+        if isinstance(index, (int, np.integer)):
+            return _DummyRow(self, self._line(index, 0))
+        if not isinstance(index, tuple):
+            index = (index, slice(None))
+        rows, cols = index
+        if isinstance(rows, (int, np.integer)):
+            i = self._line(rows, 0)
+            if isinstance(cols, (int, np.integer)):
+                j = self._line(cols, 1)
+                if i == self.base.shape[0] or j == self.base.shape[1]:
+                    return self.dtype.type(0)
+                return self.base[i, j]
+            return self._row(i)[cols]
+
+        r = np.arange(self.shape[0])[rows]
+        if isinstance(cols, slice) and cols == slice(None):
+            # Whole rows: the usual block read, only the dummy line is filled in
+            block = np.zeros(r.shape + (self.shape[1],), dtype=self.dtype)
+            if self.dummy_row:
+                real = r < self.base.shape[0]
+                block[real] = self.base[r[real]]
+            else:
+                block[..., :-1] = self.base[rows]
+            return block
+
+        # Any other index, with the numpy rules: a slice and an index array give
+        # every combination, two index arrays their pairs
+        c = np.arange(self.shape[1])[cols]
+        if isinstance(rows, slice):
+            r = r.reshape((-1,) + (1,) * c.ndim)
+        elif isinstance(cols, slice):
+            r = r[..., None]
+        r, c = np.broadcast_arrays(r, c)
+        block = np.zeros(r.shape, dtype=self.dtype)
+        real = (r < self.base.shape[0]) & (c < self.base.shape[1])
+        block[real] = self.base[r[real], c[real]]
+        return block
+
+    def __array__(self, dtype=None, copy=None):
+        """The whole balanced matrix, a copy"""
+        matrix = self[:]
+        return matrix if dtype is None else matrix.astype(dtype)
+
+    def astype(self, dtype) -> np.ndarray:
+        return np.asarray(self, dtype=dtype)
+
+    def copy(self) -> np.ndarray:
+        return np.asarray(self)
+
+    def tolist(self) -> List[List]:
+        return np.asarray(self).tolist()
+
+    def _reduce(self, reduce, combine, axis):
+        zero = self.dtype.type(0)
+        if axis is None:
+            return combine(reduce(self.base), zero) if self.base.size else zero
+        line = reduce(self.base, axis=axis)
+        # Reduced over the dummy line every result meets a zero, along it the line adds one
+        if (axis == 0) == self.dummy_row:
+            return combine(line, zero)
+        return np.append(line, zero)
+
+    def min(self, axis=None):
+        return self._reduce(np.min, np.minimum, axis)
+
+    def max(self, axis=None):
+        return self._reduce(np.max, np.maximum, axis)
+
+
+def slack(supply, demand) -> Tuple[List, List]:
+    """Copies of supply and demand with the amount of the dummy line appended, if any"""
+    supply = supply.tolist() if hasattr(supply, "tolist") else list(supply)
+    demand = demand.tolist() if hasattr(demand, "tolist") else list(demand)
+    total_supply, total_demand = sum(supply), sum(demand)
+    if total_supply > total_demand:
+        demand.append(total_supply - total_demand)
+    elif total_demand > total_supply:
+        supply.append(total_demand - total_supply)
+    return supply, demand
+
+
+def balance_problem(costs, supply, demand):
+    """
+    (costs, supply, demand) of the balanced problem. Balanced problems keep their
+    costs; unbalanced dense ones get a DummyCosts over them and sparse ones
+    (sparse.SparseCosts) a dummy row or column of zero cost lanes.
+    """
+    rows, cols = len(supply), len(demand)
+    supply, demand = slack(supply, demand)
+    if (len(supply), len(demand)) == (rows, cols):
+        return costs, supply, demand
+    dummy_row = len(supply) > rows
+    if isinstance(costs, SparseCosts):
+        return (costs.with_dummy_row() if dummy_row else costs.with_dummy_column()), supply, demand
+    return DummyCosts(costs, dummy_row), supply, demand
+
+
+def as_matrix(costs):
+    """np.asarray for the array based methods, a DummyCosts is kept as it is"""
+    return costs if isinstance(costs, DummyCosts) else np.asarray(costs)
@@ -1,4 +1,5 @@
-from NWCM import NWCM
+import heapq
+from bisect import insort
 
 def costMap(costs, pathMap):
     map = []
@@ -6,42 +7,108 @@ def costMap(costs, pathMap):
         map.append(getCost(costs, path))
     return map
 
+def completeBasis(values):
+    # Allocated cells plus zero valued basic cells that join them into a spanning
+    # tree of rows and columns (like DIMO.remove_degeneracy), so every empty cell
+    # has a closed path. Nothing is added when the allocated cells form a loop.
+    from dimo.disjointset import DisjointSet
+
+    m = len(values)
+    basis = {(i, j) for i, row in enumerate(values) for j, value in enumerate(row) if value != 0}
+    nodes = DisjointSet(m + len(values[0]))
+    for i, j in basis:
+        if not nodes.union(i, m + j):
+            return basis
+    if nodes.union(0, m):
+        basis.add((0, 0))
+    for i in range(1, m):
+        if nodes.union(i, m):
+            basis.add((i, 0))
+    for j in range(1, len(values[0])):
+        if nodes.union(0, m + j):
+            basis.add((0, j))
+    return basis
+
 def getPath(costs, pivot, current = None, direction = 0):
-    possible = []
+    return findPath(buildIndex(costs), pivot, current, direction)
+
+def buildIndex(values, basis = None):
+    # Columns of the allocated cells of every row and rows of the allocated
+    # cells of every column, both in increasing order. With a basis its cells
+    # are the allocated ones, zero valued or not
+    rows = [[] for _ in values]
+    cols = [[] for _ in values[0]] if values else []
+    cells = sorted(basis) if basis is not None else (
+        (i, j) for i, row in enumerate(values) for j, value in enumerate(row) if value != 0)
+    for i, j in cells:
+        rows[i].append(j)
+        cols[j].append(i)
+    return rows, cols
+
+def getCandidates(index, pivot, current, direction):
+    # Same cells and same order (row by row) that scanning the whole matrix gives
+    rows, cols = index
+    i, j = current
+    if direction > 0:
+        lines = rows[i]
+        if pivot[0] == i and pivot[1] not in lines:
+            lines = sorted(lines + [pivot[1]])
+        possible = [(i, c) for c in lines]
+    elif direction < 0:
+        lines = cols[j]
+        if pivot[1] == j and pivot[0] not in lines:
+            lines = sorted(lines + [pivot[0]])
+        possible = [(r, j) for r in lines]
+    else:
+        possible = [(r, j) for r in cols[j] if r < i]
+        possible += [(i, c) for c in rows[i]]
+        possible += [(r, j) for r in cols[j] if r > i]
+    return [p for p in possible if p != current]
+
+def findPath(index, pivot, current = None, direction = 0):
+    # Depth first search of the closed path alternating rows and columns, it
+    # explores the cells in the same order as the recursive version but only
+    # looks at the allocated cells of the current row or column.
+    pivot = tuple(pivot)
     if not current:
         current = pivot
-    for i, row in enumerate(costs):
-        for j, value in enumerate(row):
-            if not(pivot[0] == i and pivot[1] == j and direction != 0):
-                if (value == 0): continue
-            if current[0] == i and current[1] == j: continue
-            if direction >= 0 and i == current[0]:
-                possible.append((i, j))
-            if direction <= 0 and j == current[1]:
-                possible.append((i, j))
-
-    for p in possible:
-        if pivot[0] == p[0] and pivot[1] == p[1]:
-            return p
-        mov = current[0] - p[0]
-        dir = 1 if mov != 0 else -1
-        next = getPath(costs, pivot, p, dir)
-        if next == None:
-            continue
-        if type(next) is tuple:
-            return [p, next]
+    limit = sum(len(line) for line in index[0]) + 1
+
+    path = []
+    stack = [(tuple(current), iter(getCandidates(index, pivot, tuple(current), direction)))]
+    while stack:
+        current, possible = stack[-1]
+        for p in possible:
+            if p == pivot:
+                return path + [p] if path else p
+            if len(path) >= limit:
+                continue
+            dir = 1 if current[0] - p[0] != 0 else -1
+            path.append(p)
+            stack.append((p, iter(getCandidates(index, pivot, p, dir))))
+            break
         else:
-            return [p] + next
+            stack.pop()
+            if path:
+                path.pop()
     return None
 
-def mapPaths(values):
+def mapPaths(values, basis = None):
     map = []
+    index = buildIndex(values, basis)
     for i, row in enumerate(values):
         for j, val in enumerate(row):
-            if val != 0: continue
-            map.append(getPath(values, (i, j)))
+            basic = (i, j) in basis if basis is not None else val != 0
+            if basic: continue
+            map.append(closedPath(index, (i, j)))
     return map
 
+def closedPath(index, cell):
+    path = findPath(index, cell)
+    if path is None:
+        raise ValueError(f"the empty cell {cell} has no closed path, the allocation is not a basic solution")
+    return path
+
 def getCost(costs, trayectory):
     cost = 0
     movement = getMovementMap(trayectory)
@@ -59,33 +126,55 @@ def getMovementMap(trayectory):
     return map
 
 def moveValues(values, path):
-    unities = []
-    for p in path:
-        value = values[p[0]][p[1]]
-        if value == 0: continue
-        if not value in unities:
-            unities.append(value)
-    unity = min(unities)
+    # The quantity moved is the smallest one of the cells that give units
+    # (movement -1), so the loop never leaves a negative value behind. Returns
+    # the cell that leaves the basis, the first one with that quantity; other
+    # cells that reach zero stay as zero valued basic cells
     movement = getMovementMap(path)
+    unities = []
+    for i, p in enumerate(path[::-1]):
+        if movement[i] == -1:
+            unities.append((values[p[0]][p[1]], len(unities), p))
+    unity, _, leaving = min(unities)
 
     for i, p in enumerate(path[::-1]):
         value = values[p[0]][p[1]]
         values[p[0]][p[1]] += unity * movement[i]
+    return leaving
+
+def balancedCosts(matrix, mvm):
+    # The allocation of an unbalanced problem has one more row or column than
+    # the costs: the zero cost dummy line, read through balancing.DummyCosts
+    rows, cols = len(mvm), len(mvm[0])
+    if (rows, cols) == (len(matrix), len(matrix[0])):
+        return matrix
+    if (rows, cols) not in ((len(matrix) + 1, len(matrix[0])), (len(matrix), len(matrix[0]) + 1)):
+        raise ValueError(f"a {rows}x{cols} allocation does not fit the {len(matrix)}x{len(matrix[0])} costs")
+    from balancing import DummyCosts
+    return DummyCosts(matrix, rows > len(matrix))
+
+def getTotal(matrix, mvm, supply, demand, incremental = False):
+    matrix = balancedCosts(matrix, mvm)
+    if incremental:
+        return getTotalIncremental(matrix, mvm, supply, demand)
 
-def getTotal(matrix, mvm, supply, demand):
     cosas = []
     total = 0
     for v in supply:
         total += v
 
+    basis = completeBasis(mvm)
     while True:
-        paths = mapPaths(mvm)
+        paths = mapPaths(mvm, basis)
         costs = costMap(matrix, paths)
-        minimum = min(costs)
-        index_min = min(range(len(costs)), key=costs.__getitem__)
-        cosas.append([minimum, paths[index_min], mvm, costs])
+        # Without empty cells (one row or column) nothing can enter: it is optimal
+        minimum = min(costs) if costs else 0
+        index_min = min(range(len(costs)), key=costs.__getitem__) if costs else None
+        cosas.append([minimum, paths[index_min] if costs else [], mvm, costs])
         if (minimum < 0):
-            moveValues(mvm, paths[index_min])
+            leaving = moveValues(mvm, paths[index_min])
+            basis.add(paths[index_min][-1])
+            basis.discard(leaving)
         else:
             total = 0
             for i, row in enumerate(mvm):
@@ -95,8 +184,108 @@ def getTotal(matrix, mvm, supply, demand):
             break
     return (0, [])
 
+def isForest(index):
+    # The allocated cells have no closed path when cells = rows + columns - components
+    rows, cols = index
+    seen_rows = [False] * len(rows)
+    seen_cols = [False] * len(cols)
+    components = 0
+    for start in range(len(rows)):
+        if seen_rows[start]: continue
+        components += 1
+        seen_rows[start] = True
+        pending = [start]
+        while pending:
+            i = pending.pop()
+            for j in rows[i]:
+                if seen_cols[j]: continue
+                seen_cols[j] = True
+                for r in cols[j]:
+                    if not seen_rows[r]:
+                        seen_rows[r] = True
+                        pending.append(r)
+    components += seen_cols.count(False)
+    cells = sum(len(line) for line in rows)
+    return cells == len(rows) + len(cols) - components
+
+def getTotalIncremental(matrix, mvm, supply, demand):
+    # Same as getTotal but the path and cost of every empty cell are kept between
+    # iterations. After moving the values only the cells whose path went through
+    # the cell that left the basis are searched again. The paths are the same ones
+    # getTotal finds as long as the basic cells have no closed path, otherwise it
+    # just runs getTotal. The costs of each iteration are not copied into cosas
+    # (None instead of the list).
+    basis = completeBasis(mvm)
+    index = buildIndex(mvm, basis)
+    if not isForest(index):
+        return getTotal(matrix, mvm, supply, demand)
+
+    cosas = []
+    paths = {}
+    costs = {}
+    through = {}
+    heap = []
+
+    def forget(cell):
+        for p in paths.pop(cell)[:-1]:
+            if p in through:
+                through[p].discard(cell)
+        del costs[cell]
+
+    def update(cell):
+        path = closedPath(index, cell)
+        cost = getCost(matrix, path)
+        paths[cell] = path
+        costs[cell] = cost
+        for p in path[:-1]:
+            through.setdefault(p, set()).add(cell)
+        heapq.heappush(heap, (cost, cell[0], cell[1]))
+
+    for i, row in enumerate(mvm):
+        for j, val in enumerate(row):
+            if (i, j) in basis: continue
+            update((i, j))
+
+    while True:
+        if not costs:
+            # Without empty cells (one row or column) nothing can enter: it is optimal
+            minimum, path = 0, []
+        else:
+            # Entries of the heap that are not the current cost of an empty cell are old
+            while True:
+                minimum, i, j = heap[0]
+                if costs.get((i, j)) == minimum:
+                    break
+                heapq.heappop(heap)
+            path = paths[(i, j)]
+        cosas.append([minimum, path, mvm, None])
+        if minimum >= 0:
+            total = 0
+            for i, row in enumerate(mvm):
+                for j, value in enumerate(row):
+                    total += value * matrix[i][j]
+            return (total, cosas)
+
+        leaving = moveValues(mvm, path)
+        entering = (i, j)
+        insort(index[0][i], j)
+        insort(index[1][j], i)
+        forget(entering)
+        # Left the basis, now it needs its own path, like the cells whose path went through it
+        index[0][leaving[0]].remove(leaving[1])
+        index[1][leaving[1]].remove(leaving[0])
+        affected = through.pop(leaving, set()) | {leaving}
+        affected.discard(entering)
+        for cell in affected:
+            if cell in paths:
+                forget(cell)
+        for cell in sorted(affected):
+            update(cell)
+
 
 if __name__ == '__main__':
+    from NWCM import NWCM
+
     # cost_matrix = [
     #         [25, 35, 36, 60],
     #         [55, 30, 45, 38],
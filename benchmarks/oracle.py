@@ -0,0 +1,177 @@
+"""
+Every optimizer checked against the exact solver (mincostflow) on seeded random problems:
+
+    python -m benchmarks.oracle [--count 100] [--max-size 12] [--seed 0] [--verbose]
+
+For each problem (dense or sparse, balanced or not, integer or fractional costs
+and amounts, some of them built to be degenerate) the answer of every initial method plus
+optimizer (modi with every pricing rule), and of the classic DIMO engine, must
+be feasible and, for the optimizers, cost the same as the exact optimum. A solver
+can fail openly (an exception, (None, None), a timeout) or silently (an infeasible
+or suboptimal answer); exits with 1 when any answer was silently wrong.
+"""
+import argparse
+import signal
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.suite import make_instance
+from dimo.init import DIMO
+from dimo.simplex import PRICING_RULES
+from metodosoptimos.init import INITIAL_METHODS, OPTIMIZERS, SPARSE_INITIAL_METHODS, balance, initial_solution, is_sparse, optimize
+from mincostflow import min_cost_flow
+
+OUTCOMES = ("optimal", "feasible", "suboptimal", "infeasible", "failed", "timeout")
+# Outcomes that are a wrong answer nobody was told about
+SILENT = ("suboptimal", "infeasible")
+
+
+class Timeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise Timeout()
+
+
+def problems(count: int, max_size: int, seed: int):
+    """
+    (name, costs, supply, demand) of random problems, every fourth one degenerate,
+    some with fractional costs, amounts or both
+    """
+    rng = np.random.default_rng(seed)
+    for k in range(count):
+        rows, cols = (int(x) for x in rng.integers(1, max_size + 1, 2))
+        kind = "sparse" if k % 2 else "dense"
+        balanced = k % 3 != 0
+        costs, supply, demand = make_instance(kind, balanced, rows, cols, seed + k)
+        if kind == "dense" and k % 4 == 0:
+            # Same supply everywhere and demand in multiples of it: ties and zero valued basic cells
+            unit = int(rng.integers(1, 20))
+            supply = [unit] * rows
+            demand = [0] * cols
+            for i in range(rows):
+                demand[int(rng.integers(0, cols))] += unit
+        elif kind == "dense" and k % 4 == 2:
+            costs = (np.asarray(costs) / 8).tolist()
+            if k % 8 == 2:
+                # Fractional supply against an integer demand: half a unit more on
+                # an even number of rows
+                halves = rows - rows % 2
+                supply = [amount + 0.5 if i < halves else float(amount) for i, amount in enumerate(supply)]
+                demand[0] += halves // 2
+        elif kind == "sparse" and k % 4 == 3:
+            supply = [amount / 4 for amount in supply]
+            demand = [amount / 4 for amount in demand]
+        yield f"{kind} {'balanced' if balanced else 'unbalanced'} {rows}x{cols} seed {seed + k}", costs, supply, demand
+
+
+def violation(costs, supply, demand, allocation, artificial: bool = False) -> Optional[str]:
+    """
+    Why the allocation is not a solution of the balanced problem, None if it is one.
+    artificial allows missing lanes, the initial solutions of sparse problems can use them.
+    """
+    if is_sparse(costs):
+        flow = np.zeros(costs.shape)
+        for i, j, amount in allocation:
+            if amount and not artificial and (i, j) not in costs:
+                return f"uses the missing lane ({i}, {j})"
+            flow[i, j] += amount
+    else:
+        flow = np.asarray(allocation, dtype=float)
+    if flow.shape != (len(supply), len(demand)):
+        return f"allocation of shape {flow.shape}"
+    if (flow < -1e-9).any():
+        return "negative amounts"
+    if not np.allclose(flow.sum(axis=1), supply) or not np.allclose(flow.sum(axis=0), demand):
+        return "supply or demand not met"
+    return None
+
+
+def judge(costs, supply, demand, allocation, cost, optimum, exact: bool) -> str:
+    if allocation is None:
+        return "failed"
+    if violation(costs, supply, demand, allocation, artificial=not exact):
+        return "infeasible"
+    if abs(cost - optimum) <= 1e-6 * max(1, abs(optimum)):
+        return "optimal"
+    if cost < optimum and exact:
+        # Cheaper than the optimum of a feasible answer: the reference is wrong
+        raise AssertionError(f"cost {cost} below the exact optimum {optimum}")
+    return "suboptimal" if exact else "feasible"
+
+
+def classic_dimo(costs, allocation):
+    return DIMO(costs, [list(row) for row in allocation]).solve(trace="none")
+
+
+def check_problem(costs, supply, demand, timeout: float) -> Dict[str, str]:
+    """{solver: outcome} of one problem"""
+    costs, supply, demand = balance(costs, supply, demand)
+    optimum = min_cost_flow(costs, supply, demand).cost
+    outcomes = {}
+
+    def run(name: str, exact: bool, solver):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            allocation, cost = solver()
+            outcomes[name] = judge(costs, supply, demand, allocation, cost, optimum, exact)
+        except Timeout:
+            outcomes[name] = "timeout"
+        except AssertionError:
+            raise
+        except Exception:
+            outcomes[name] = "failed"
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    for initial in SPARSE_INITIAL_METHODS if is_sparse(costs) else INITIAL_METHODS:
+        allocation = initial_solution(costs, supply, demand, initial)
+        for optimizer in OPTIMIZERS:
+            if optimizer == "exact" and initial != INITIAL_METHODS[0]:
+                continue
+            if is_sparse(costs) and optimizer == "stepping_stone":
+                continue
+            name = "exact" if optimizer == "exact" else f"{initial} + {optimizer}"
+            run(name, optimizer != "none", lambda: optimize(costs, allocation, supply, demand, optimizer)[:2])
+            if optimizer == "modi":
+                for pricing in (rule for rule in PRICING_RULES if rule != "dantzig"):
+                    run(f"{name} {pricing}", True,
+                        lambda: optimize(costs, allocation, supply, demand, optimizer, pricing=pricing)[:2])
+        if not is_sparse(costs):
+            run(f"{initial} + dimo classic", True, lambda: classic_dimo(costs, allocation))
+    return outcomes
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check every optimizer against the exact solver")
+    parser.add_argument("--count", type=int, default=100, help="random problems to check")
+    parser.add_argument("--max-size", type=int, default=12, help="largest number of rows or columns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds per solver run")
+    parser.add_argument("--verbose", action="store_true", help="print every answer that is not optimal")
+    args = parser.parse_args(argv)
+
+    signal.signal(signal.SIGALRM, _alarm)
+    totals: Dict[str, Counter] = defaultdict(Counter)
+    start = time.perf_counter()
+    for name, costs, supply, demand in problems(args.count, args.max_size, args.seed):
+        for solver, outcome in check_problem(costs, supply, demand, args.timeout).items():
+            totals[solver][outcome] += 1
+            if args.verbose and outcome not in ("optimal", "feasible"):
+                print(f"{name}: {solver} {outcome}")
+
+    print(f"{args.count} problems in {time.perf_counter() - start:.1f}s")
+    width = max([28] + [len(solver) + 2 for solver in totals])
+    print(f"{'solver':<{width}}" + "".join(f"{outcome:>11}" for outcome in OUTCOMES))
+    for solver in sorted(totals):
+        print(f"{solver:<{width}}" + "".join(f"{totals[solver][outcome]:>11}" for outcome in OUTCOMES))
+    return 1 if any(totals[solver][outcome] for solver in totals for outcome in SILENT) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
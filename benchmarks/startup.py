@@ -0,0 +1,81 @@
+"""
+Import time of every entry point, each one measured in a fresh interpreter:
+
+    python -m benchmarks.startup [--repeat 7] [--budget-scale 1.0]
+
+The solvers must not pull numpy, tkinter or PIL until a method actually needs
+them, so the light modules get tight budgets. Exits with 1 when the median
+import time of an entry point is over its budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("numpy", "pandas", "tkinter", "PIL")
+
+# (module, budget in milliseconds)
+ENTRY_POINTS: List[Tuple[str, float]] = [
+    ("NWCM", 30),
+    ("costominimo", 30),
+    ("banquillo", 40),
+    ("mav.init", 60),
+    ("dimo.init", 60),
+    ("metodosoptimos.init", 60),
+    ("metodosoptimos.__main__", 100),
+    ("dimo.simplex", 400),
+    ("menu", 250),
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> Tuple[float, List[str]]:
+    """Median import time in ms and the heavy modules it loaded"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    times, heavy = [], []
+    for _ in range(repeat):
+        probe = PROBE.format(module=module, heavy=HEAVY_MODULES)
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        record = json.loads(output.strip().splitlines()[-1])
+        times.append(record["ms"])
+        heavy = record["heavy"]
+    return statistics.median(times), heavy
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import time of the entry points")
+    parser.add_argument("--repeat", type=int, default=7, help="fresh interpreters per entry point")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget, for slow machines")
+    args = parser.parse_args(argv)
+
+    over = 0
+    print(f"{'module':<26}{'median ms':>10}{'budget':>8}  heavy modules")
+    for module, budget in ENTRY_POINTS:
+        try:
+            elapsed, heavy = measure(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<26}{'error':>10}{'':>8}  {e.stderr.strip().splitlines()[-1]}")
+            over += 1
+            continue
+        budget *= args.budget_scale
+        status = "" if elapsed <= budget else "  OVER BUDGET"
+        over += elapsed > budget
+        print(f"{module:<26}{elapsed:>10.1f}{budget:>8.0f}  {', '.join(heavy) or '-'}{status}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
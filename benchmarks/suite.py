@@ -0,0 +1,283 @@
+"""
+Benchmark suite of the initial methods and the optimizers on seeded random problems:
+
+    python -m benchmarks.suite [--preset small|medium|large] [--output results.jsonl]
+
+Every problem (dense or sparse, balanced or not, 10x10 up to 5000x5000 with the
+large preset) is solved with every initial method followed by every optimizer.
+One JSON line per run is appended to --output with the commit, wall time of each
+stage, peak memory, iterations and the gap to the optimum (found by exact or modi),
+so two commits can be compared with benchmarks.suite --compare old.jsonl new.jsonl.
+benchmarks.suite --summary results.jsonl ranks the initial methods by what they
+cost end to end: gap of the initial solution, MODI pivots and time of both stages.
+--pricing runs modi with each pricing rule (dimo.simplex.PRICING_RULES).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from dimo.simplex import PRICING_RULES
+from metodosoptimos.init import INITIAL_METHODS, OPTIMIZERS, SPARSE_INITIAL_METHODS, balance, initial_solution, optimize
+from sparse import SparseCosts
+
+PRESETS = {
+    "small": [10, 50, 100],
+    "medium": [10, 50, 100, 500, 1000],
+    "large": [10, 50, 100, 500, 1000, 2000, 5000],
+}
+KINDS = [("dense", True), ("dense", False), ("sparse", True), ("sparse", False)]
+# Lanes of the sparse problems, as a fraction of rows * columns
+SPARSE_DENSITY = 0.02
+# Largest problem (rows * columns) each optimizer runs on, the rest are skipped
+OPTIMIZER_LIMITS = {"modi": 1000 * 1000, "stepping_stone": 50 * 50, "exact": 2000 * 2000, "none": None}
+
+
+def make_instance(kind: str, balanced: bool, rows: int, cols: int, seed: int):
+    """
+    (costs, supply, demand) of a random problem. Sparse problems always have a
+    feasible solution: every row has a lane to the column that gets its supply.
+    Unbalanced ones have 10% more demand than supply (a dummy row is added).
+    """
+    rng = np.random.default_rng(seed)
+    supply = rng.integers(10, 100, rows)
+
+    if kind == "dense":
+        costs = rng.integers(1, 1000, (rows, cols)).tolist()
+        demand = np.full(cols, supply.sum() // cols)
+        demand[: supply.sum() - demand.sum()] += 1
+    else:
+        lanes = max(rows, int(rows * cols * SPARSE_DENSITY))
+        destination = rng.integers(0, cols, rows)
+        cells = np.unique(np.concatenate([
+            np.arange(rows) * cols + destination,
+            rng.integers(0, rows, lanes) * cols + rng.integers(0, cols, lanes),
+        ]))
+        costs = SparseCosts.from_arcs(cells // cols, cells % cols, rng.integers(1, 1000, cells.size), (rows, cols))
+        demand = np.bincount(destination, weights=supply, minlength=cols).astype(np.int64)
+
+    if not balanced:
+        extra = max(1, int(supply.sum() * 0.1))
+        np.add.at(demand, rng.integers(0, cols, extra), 1)
+    return costs, supply.tolist(), demand.tolist()
+
+
+def run(costs, supply, demand, initial: str, optimizer: str, memory: bool, pricing: str = "dantzig") -> Dict:
+    """Time (and optionally trace the memory of) one initial method plus optimizer"""
+    if memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        balanced = balance(costs, supply, demand)
+        allocation = initial_solution(*balanced, initial)
+        initial_time = time.perf_counter() - start
+        _, initial_cost, _ = optimize(balanced[0], allocation, balanced[1], balanced[2], "none")
+
+        start = time.perf_counter()
+        _, cost, iterations = optimize(balanced[0], allocation, balanced[1], balanced[2], optimizer, pricing=pricing)
+        optimize_time = time.perf_counter() - start
+        record = {
+            "initial_time": initial_time,
+            "optimize_time": optimize_time,
+            "wall_time": initial_time + optimize_time,
+            "initial_cost": _number(initial_cost),
+            "cost": _number(cost),
+            "iterations": iterations,
+            "error": None,
+        }
+        if optimizer == "modi":
+            record["time_per_pivot"] = optimize_time / iterations if iterations else None
+    except Exception as e:
+        record = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        if memory:
+            record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return record
+
+
+def _number(value):
+    """JSON friendly cost, infinite when the initial solution uses a missing lane"""
+    if value is None or value == float("inf"):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def benchmark(sizes: List[int], seed: int, initials, optimizers, memory: bool, pricings=("dantzig",)) -> Iterator[Dict]:
+    for size in sizes:
+        for kind, balanced in KINDS:
+            costs, supply, demand = make_instance(kind, balanced, size, size, seed + size)
+            problem = {"kind": kind, "balanced": balanced, "rows": size, "cols": size, "seed": seed + size}
+            optimum = None
+            for initial in initials:
+                if kind == "sparse" and initial not in SPARSE_INITIAL_METHODS:
+                    continue
+                for optimizer in optimizers:
+                    limit = OPTIMIZER_LIMITS.get(optimizer)
+                    if limit is not None and size * size > limit:
+                        continue
+                    if kind == "sparse" and optimizer == "stepping_stone":
+                        continue
+                    # exact ignores the initial solution, once per problem is enough
+                    if optimizer == "exact" and initial != initials[0]:
+                        continue
+                    for pricing in pricings if optimizer == "modi" else [None]:
+                        record = run(costs, supply, demand, initial, optimizer, False, pricing or "dantzig")
+                        if memory and record["error"] is None:
+                            record["peak_memory"] = run(
+                                costs, supply, demand, initial, optimizer, True, pricing or "dantzig"
+                            )["peak_memory"]
+                        if optimizer in ("modi", "exact") and record["error"] is None:
+                            optimum = record["cost"]
+                        if pricing is not None:
+                            record["pricing"] = pricing
+                        yield dict(problem, initial=initial, optimizer=optimizer, **record)
+            # The gap needs the optimum, known once every modi / exact run is done
+            yield {"optimum": optimum, **problem}
+
+
+def with_gaps(records: Iterator[Dict]) -> Iterator[Dict]:
+    """Fill gap = cost / optimum - 1 once the optimum of the problem is known"""
+    pending = []
+    for record in records:
+        if "optimum" not in record:
+            pending.append(record)
+            continue
+        optimum = record["optimum"]
+        for run_record in pending:
+            cost = run_record.get("cost")
+            run_record["optimum"] = optimum
+            run_record["gap"] = cost / optimum - 1 if optimum and cost is not None else None
+            yield run_record
+        pending = []
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    """Print the runs that got slower (or worse) than threshold, exit 1 if any"""
+    def load(path: str) -> Dict:
+        with open(path, encoding="utf-8") as stream:
+            records = [json.loads(line) for line in stream if line.strip()]
+        return {
+            (r["kind"], r["balanced"], r["rows"], r["cols"], r["seed"], r["initial"], r["optimizer"],
+             r.get("pricing", "dantzig")): r
+            for r in records
+        }
+
+    old, new = load(old_path), load(new_path)
+    regressions = 0
+    for key in sorted(old.keys() & new.keys(), key=str):
+        before, after = old[key], new[key]
+        if before.get("error") is None and after.get("error") is not None:
+            print(f"{key}: now fails with {after['error']}")
+            regressions += 1
+            continue
+        if after.get("error") is not None:
+            continue
+        if after["wall_time"] > before["wall_time"] * (1 + threshold) and after["wall_time"] > 0.01:
+            print(f"{key}: wall time {before['wall_time']:.3f}s -> {after['wall_time']:.3f}s")
+            regressions += 1
+        if (after.get("gap") or 0) > (before.get("gap") or 0) + 1e-9:
+            print(f"{key}: gap {before.get('gap')} -> {after.get('gap')}")
+            regressions += 1
+    print(f"{len(old.keys() & new.keys())} runs compared, {regressions} regressions")
+    return 1 if regressions else 0
+
+
+def summary(path: str) -> int:
+    """
+    Print one line per kind of problem, initial method and pricing rule over the
+    modi runs of a result file: mean gap of the initial solution, mean MODI pivots,
+    mean time of each stage and per pivot, the cheapest end to end first
+    """
+    with open(path, encoding="utf-8") as stream:
+        records = [json.loads(line) for line in stream if line.strip()]
+    runs: Dict[Tuple[str, str, str], List[Dict]] = {}
+    for record in records:
+        if record.get("optimizer") == "modi" and record.get("error") is None:
+            runs.setdefault((record["kind"], record["initial"], record.get("pricing", "dantzig")), []).append(record)
+
+    def mean(values: List) -> Optional[float]:
+        values = [value for value in values if value is not None]
+        return sum(values) / len(values) if values else None
+
+    rows = []
+    for (kind, initial, pricing), group in runs.items():
+        gaps = [r["initial_cost"] / r["optimum"] - 1 if r.get("optimum") and r["initial_cost"] is not None else None
+                for r in group]
+        rows.append((kind, mean([r["wall_time"] for r in group]), initial, pricing, len(group), mean(gaps),
+                     mean([r["iterations"] for r in group]), mean([r.get("time_per_pivot") for r in group]),
+                     mean([r["initial_time"] for r in group]), mean([r["optimize_time"] for r in group])))
+
+    print(f"{'kind':<8}{'initial':<18}{'pricing':<12}{'runs':>6}{'initial gap':>13}{'pivots':>10}"
+          f"{'ms/pivot':>10}{'initial s':>11}{'modi s':>10}{'total s':>10}")
+    for kind, total, initial, pricing, count, gap, pivots, per_pivot, initial_time, optimize_time in sorted(rows):
+        gap = "-" if gap is None else f"{gap:.2%}"
+        per_pivot = "-" if per_pivot is None else f"{per_pivot * 1000:.3f}"
+        print(f"{kind:<8}{initial:<18}{pricing:<12}{count:>6}{gap:>13}{pivots:>10.1f}"
+              f"{per_pivot:>10}{initial_time:>11.3f}{optimize_time:>10.3f}{total:>10.3f}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the initial methods and the optimizers")
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--sizes", type=int, nargs="+", help="problem sizes (rows = columns), instead of the preset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--initial", nargs="+", choices=INITIAL_METHODS, default=list(INITIAL_METHODS))
+    parser.add_argument("--optimizer", nargs="+", choices=OPTIMIZERS, default=list(OPTIMIZERS))
+    parser.add_argument("--pricing", nargs="+", choices=PRICING_RULES, default=["dantzig"], help="pricing rules of modi")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slower) peak memory runs")
+    parser.add_argument("--output", default="-", help="JSON lines file to append to, '-' for stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slow down for --compare")
+    parser.add_argument("--summary", metavar="RESULTS", help="initial methods ranked by their modi runs")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+    if args.summary:
+        return summary(args.summary)
+
+    env = environment()
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    try:
+        records = benchmark(args.sizes or PRESETS[args.preset], args.seed, args.initial, args.optimizer,
+                            not args.no_memory, args.pricing)
+        for record in with_gaps(records):
+            output.write(json.dumps({**env, **record}) + "\n")
+            output.flush()
+            if output is not sys.stdout:
+                status = record["error"] or f"{record['wall_time']:.3f}s gap {record['gap']}"
+                optimizer = record["optimizer"] + (f" {record['pricing']}" if "pricing" in record else "")
+                print(f"{record['kind']:>6} {'balanced' if record['balanced'] else 'unbalanced':>10} "
+                      f"{record['rows']}x{record['cols']} {record['initial']:>10} + {optimizer:<14} {status}")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Warm start after cost changes against a cold solve:
+
+    python -m benchmarks.warm_start [--rows 200] [--cols 200] [--seed 0] [--repeat 3] [--json]
+
+For every fraction of changed costs (1%, 10% and 50% by default) the same random
+problem is solved once, then the costs change and it is solved again:
+- cold: new Vogel initial solution plus DIMO.solve(engine="tree")
+- warm: DIMO.update_costs() on the already solved DIMO
+Both must reach the same optimal cost.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from dimo.init import DIMO
+from mav.init import vogel_numpy
+
+
+def initial_allocation(costs, supply, demand) -> List[List[int]]:
+    allocation = [[0] * len(demand) for _ in supply]
+    for i, j, amount in vogel_numpy(costs, supply, demand)[0]:
+        allocation[i][j] = amount
+    return allocation
+
+
+def problem(rows: int, cols: int, rng: np.random.Generator):
+    costs = rng.integers(1, 1000, (rows, cols))
+    supply = rng.integers(50, 150, rows)
+    demand = np.full(cols, supply.sum() // cols)
+    demand[-1] += supply.sum() - demand.sum()
+    return costs.tolist(), supply.tolist(), demand.tolist()
+
+
+def solved_dimo(costs, supply, demand) -> DIMO:
+    allocation = initial_allocation(costs, supply, demand)
+    dimo = DIMO(costs, allocation)
+    dimo.solve(engine="tree", trace="none")
+    return dimo
+
+
+def measure(rows: int, cols: int, fraction: float, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    costs, supply, demand = problem(rows, cols, rng)
+    solved = solved_dimo(costs, supply, demand)
+    start_pivots = solved.simplex.iterations
+
+    changed = rng.choice(rows * cols, size=max(1, int(rows * cols * fraction)), replace=False)
+    new_costs = rng.integers(1, 1000, changed.size)
+    changes = {(int(k) // cols, int(k) % cols): int(c) for k, c in zip(changed, new_costs)}
+    updated = [row[:] for row in costs]
+    for (i, j), value in changes.items():
+        updated[i][j] = value
+
+    start = time.perf_counter()
+    _, warm_cost = solved.update_costs(changes, trace="none")
+    warm_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cold = solved_dimo(updated, supply, demand)
+    cold_time = time.perf_counter() - start
+    cold_cost = cold.calculate_total_cost()
+
+    if warm_cost != cold_cost:
+        raise AssertionError(f"warm start cost {warm_cost} != cold cost {cold_cost}")
+    return {
+        "changed": fraction,
+        "warm_time": warm_time,
+        "warm_pivots": solved.simplex.iterations - start_pivots,
+        "cold_time": cold_time,
+        "cold_pivots": cold.iteration,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Warm start after cost changes against a cold solve")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--cols", type=int, default=200)
+    parser.add_argument("--fractions", type=float, nargs="+", default=[0.01, 0.1, 0.5])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="problems per fraction, the medians are reported")
+    parser.add_argument("--json", action="store_true", help="one JSON line per fraction")
+    args = parser.parse_args(argv)
+
+    if not args.json:
+        print(f"{args.rows}x{args.cols}, median of {args.repeat}")
+        print(f"{'changed':>8}{'warm s':>10}{'pivots':>8}{'cold s':>10}{'pivots':>8}{'speedup':>9}")
+    for fraction in args.fractions:
+        runs = [measure(args.rows, args.cols, fraction, args.seed + k) for k in range(args.repeat)]
+        row = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        row["speedup"] = row["cold_time"] / row["warm_time"] if row["warm_time"] else float("inf")
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print(f"{fraction:>8.0%}{row['warm_time']:>10.3f}{row['warm_pivots']:>8.0f}"
+                  f"{row['cold_time']:>10.3f}{row['cold_pivots']:>8.0f}{row['speedup']:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,92 @@
-import tkinter as tk
-from tkinter import messagebox
-import numpy as np
-import pandas as pd
+class TrazaDeltas:
+    """
+    Registro de los pasos del Método de Costo Mínimo que solo guarda (fila, columna, cantidad)
+    de cada asignación en lugar de copiar la oferta, la demanda y toda la matriz en cada paso.
+
+    Se comporta como la lista de resultados de siempre: len(), iterar y traza[paso] devuelven
+    (oferta, demanda, asignaciones) reconstruidos a partir de los valores iniciales.
+    traza[-1] usa directamente la matriz final.
+    """
+    def __init__(self, oferta, demanda):
+        self.oferta_inicial = list(oferta)
+        self.demanda_inicial = list(demanda)
+        self.filas = []
+        self.columnas = []
+        self.cantidades = []
+        self.asignaciones_final = None
+
+    def registrar(self, fila, columna, cantidad):
+        self.filas.append(fila)
+        self.columnas.append(columna)
+        self.cantidades.append(cantidad)
+
+    def cerrar(self, asignaciones):
+        self.asignaciones_final = asignaciones
+
+    def __len__(self):
+        return len(self.cantidades)
+
+    def _estado(self, paso, asignaciones):
+        """Oferta y demanda después de aplicar los pasos 0..paso sobre los valores iniciales."""
+        oferta = list(self.oferta_inicial)
+        demanda = list(self.demanda_inicial)
+        for fila, columna, cantidad in zip(self.filas[:paso + 1], self.columnas[:paso + 1], self.cantidades[:paso + 1]):
+            oferta[fila] -= cantidad
+            demanda[columna] -= cantidad
+        return oferta, demanda, asignaciones
+
+    def __getitem__(self, paso):
+        import numpy as np
+        from exactint import amount_dtype
+
+        total = len(self)
+        if paso < 0:
+            paso += total
+        if not 0 <= paso < total:
+            raise IndexError("paso fuera de rango")
 
-def metodo_costo_minimo_gui(oferta, demanda, costos):
+        if paso == total - 1 and self.asignaciones_final is not None:
+            return self._estado(paso, self.asignaciones_final.copy())
+
+        tipo = amount_dtype(self.oferta_inicial, self.demanda_inicial)
+        asignaciones = np.zeros((len(self.oferta_inicial), len(self.demanda_inicial)), dtype=tipo)
+        asignaciones[self.filas[:paso + 1], self.columnas[:paso + 1]] = self.cantidades[:paso + 1]
+        return self._estado(paso, asignaciones)
+
+    def __iter__(self):
+        """
+        Recorre los pasos en orden aplicando un delta a la vez. La matriz entregada es de solo
+        lectura y se reutiliza en el siguiente paso, hay que copiarla si se quiere conservar.
+        """
+        import numpy as np
+        from exactint import amount_dtype
+
+        oferta = list(self.oferta_inicial)
+        demanda = list(self.demanda_inicial)
+        asignaciones = np.zeros((len(oferta), len(demanda)), dtype=amount_dtype(oferta, demanda))
+        vista = asignaciones.view()
+        vista.flags.writeable = False
+        for fila, columna, cantidad in zip(self.filas, self.columnas, self.cantidades):
+            asignaciones[fila][columna] = cantidad
+            oferta[fila] -= cantidad
+            demanda[columna] -= cantidad
+            yield oferta.copy(), demanda.copy(), vista
+
+def metodo_costo_minimo_gui(oferta, demanda, costos, traza_deltas=False):
     """
     Implementa el Método de Costo Mínimo mostrando los pasos en una ventana de resultados de tkinter.
+    Con traza_deltas=True los resultados son una TrazaDeltas en lugar de una copia completa por paso.
+    Un problema desbalanceado recibe una fila o columna ficticia de costo cero (balancing.DummyCosts).
     """
-    oferta = oferta.copy()
-    demanda = demanda.copy()
+    import numpy as np
+    from balancing import balance_problem
+    from exactint import amount_dtype, total_cost
+
+    costos, oferta, demanda = balance_problem(costos, oferta, demanda)
     filas = len(oferta)
     columnas = len(demanda)
-    asignaciones = np.zeros((filas, columnas), dtype=int)
-    resultados = []
+    asignaciones = np.zeros((filas, columnas), dtype=amount_dtype(oferta, demanda))
+    resultados = TrazaDeltas(oferta, demanda) if traza_deltas else []
 
     while np.sum(oferta) > 0 and np.sum(demanda) > 0:
         # Encontrar la celda con el costo mínimo
@@ -33,73 +107,296 @@ def metodo_costo_minimo_gui(oferta, demanda, costos):
         demanda[columna] -= cantidad
 
         # Registrar el estado actual
-        resultados.append((oferta.copy(), demanda.copy(), asignaciones.copy()))
+        if traza_deltas:
+            resultados.registrar(fila, columna, cantidad)
+        else:
+            resultados.append((oferta.copy(), demanda.copy(), asignaciones.copy()))
+
+    if traza_deltas:
+        resultados.cerrar(asignaciones)
 
     # Calcular el costo total
-    costo_total = np.sum(asignaciones * costos)
+    costo_total = total_cost(asignaciones, costos)
     return resultados, costo_total
 
+def metodo_costo_minimo_ordenado(oferta, demanda, costos, guardar_pasos=True, bloque=4096, traza_deltas=False):
+    """
+    Método de Costo Mínimo ordenando las celdas una sola vez.
+
+    Da las mismas asignaciones que metodo_costo_minimo_gui (los empates se resuelven
+    por fila y luego por columna, gracias al ordenamiento estable) pero en O(mn log mn):
+    las celdas se recorren por costo creciente en bloques, descartando de un golpe las
+    que ya tienen la fila o la columna agotada.
+
+    Con guardar_pasos=False solo se registra el estado final en resultados. Con
+    traza_deltas=True los resultados son una TrazaDeltas con todos los pasos (guardar_pasos
+    no aplica porque cada paso solo ocupa tres números).
+
+    Un problema desbalanceado recibe una fila o columna ficticia de costo cero
+    (balancing.DummyCosts); el ordenamiento necesita todas las celdas, así que aquí sí se arma.
+    """
+    import numpy as np
+    from balancing import balance_problem
+    from exactint import amount_dtype, total_cost
+
+    costos, oferta, demanda = balance_problem(costos, oferta, demanda)
+    costos = np.asarray(costos)
+    filas = len(oferta)
+    columnas = len(demanda)
+    asignaciones = np.zeros((filas, columnas), dtype=amount_dtype(oferta, demanda))
+    resultados = TrazaDeltas(oferta, demanda) if traza_deltas else []
+
+    fila_abierta = np.array([o > 0 for o in oferta], dtype=bool)
+    columna_abierta = np.array([d > 0 for d in demanda], dtype=bool)
+    oferta_restante = sum(oferta)
+    demanda_restante = sum(demanda)
+
+    orden = np.argsort(costos, axis=None, kind="stable")
+    for inicio in range(0, orden.size, bloque):
+        if oferta_restante <= 0 or demanda_restante <= 0:
+            break
+
+        celdas = orden[inicio:inicio + bloque]
+        celdas_filas, celdas_columnas = np.divmod(celdas, columnas)
+        abiertas = fila_abierta[celdas_filas] & columna_abierta[celdas_columnas]
+
+        for fila, columna in zip(celdas_filas[abiertas].tolist(), celdas_columnas[abiertas].tolist()):
+            # La fila o la columna pudo agotarse dentro del mismo bloque
+            if not (fila_abierta[fila] and columna_abierta[columna]):
+                continue
+
+            cantidad = min(oferta[fila], demanda[columna])
+            asignaciones[fila][columna] = cantidad
+
+            oferta[fila] -= cantidad
+            demanda[columna] -= cantidad
+            oferta_restante -= cantidad
+            demanda_restante -= cantidad
+            if oferta[fila] <= 0:
+                fila_abierta[fila] = False
+            if demanda[columna] <= 0:
+                columna_abierta[columna] = False
+
+            if traza_deltas:
+                resultados.registrar(fila, columna, cantidad)
+            elif guardar_pasos:
+                resultados.append((oferta.copy(), demanda.copy(), asignaciones.copy()))
+
+            if oferta_restante <= 0 or demanda_restante <= 0:
+                break
+
+    if traza_deltas:
+        resultados.cerrar(asignaciones)
+    elif not guardar_pasos and asignaciones.any():
+        resultados.append((oferta.copy(), demanda.copy(), asignaciones.copy()))
+
+    costo_total = total_cost(asignaciones, costos)
+    return resultados, costo_total
+
+def metodo_costo_minimo_disperso(oferta, demanda, costos, bloque=4096):
+    """
+    Método de Costo Mínimo sobre un problema disperso (sparse.SparseCosts).
+
+    Solo se recorren las rutas que existen, ordenadas una vez por costo (los empates
+    por fila y luego por columna, como en metodo_costo_minimo_ordenado), así que el
+    trabajo es O(nnz log nnz) y no depende de filas * columnas.
+
+    Lo que no cabe en las rutas existentes se reparte con sparse.artificial_fill en
+    rutas que no existen; en ese caso el costo total es infinito y MODI
+    (dimo.simplex.TransportSimplex) las saca de la solución si se puede.
+
+    Devuelve (asignaciones, costo_total) con asignaciones como lista de (fila, columna, cantidad).
+    """
+    import numpy as np
+    from sparse import artificial_fill
+
+    oferta = list(oferta)
+    demanda = list(demanda)
+    asignaciones = []
+
+    fila_abierta = np.array([o > 0 for o in oferta], dtype=bool)
+    columna_abierta = np.array([d > 0 for d in demanda], dtype=bool)
+    oferta_restante = sum(oferta)
+    demanda_restante = sum(demanda)
+
+    orden = np.argsort(costos.data, kind="stable")
+    for inicio in range(0, orden.size, bloque):
+        if oferta_restante <= 0 or demanda_restante <= 0:
+            break
+
+        rutas = orden[inicio:inicio + bloque]
+        rutas_filas, rutas_columnas = costos.rows[rutas], costos.indices[rutas]
+        abiertas = fila_abierta[rutas_filas] & columna_abierta[rutas_columnas]
+
+        for fila, columna in zip(rutas_filas[abiertas].tolist(), rutas_columnas[abiertas].tolist()):
+            if not (fila_abierta[fila] and columna_abierta[columna]):
+                continue
+
+            cantidad = min(oferta[fila], demanda[columna])
+            asignaciones.append((fila, columna, cantidad))
+
+            oferta[fila] -= cantidad
+            demanda[columna] -= cantidad
+            oferta_restante -= cantidad
+            demanda_restante -= cantidad
+            if oferta[fila] <= 0:
+                fila_abierta[fila] = False
+            if demanda[columna] <= 0:
+                columna_abierta[columna] = False
+
+            if oferta_restante <= 0 or demanda_restante <= 0:
+                break
+
+    asignaciones += artificial_fill(oferta, demanda)
+    return asignaciones, costos.cost_of(asignaciones)
+
+def _menores(valores, indices, k):
+    """
+    Las k celdas de menor (costo, índice) de valores/indices. Los empates en el costo
+    del corte se resuelven por índice, igual que el ordenamiento estable.
+    """
+    import numpy as np
+
+    if valores.size <= k:
+        return valores, indices
+    corte = np.partition(valores, k - 1)[k - 1]
+    menores = np.flatnonzero(valores < corte)
+    empates = np.flatnonzero(valores == corte)
+    faltan = k - menores.size
+    if faltan < empates.size:
+        empates = empates[np.argpartition(indices[empates], faltan - 1)[:faltan]]
+    elegidas = np.concatenate([menores, empates])
+    return valores[elegidas], indices[elegidas]
+
+def metodo_costo_minimo_bloques(oferta, demanda, costos, bloque=1 << 20):
+    """
+    Método de Costo Mínimo sobre una matriz que no cabe en memoria (un numpy.memmap, ver
+    loader.py, o un balancing.DummyCosts) sin ordenar ni copiar todas sus celdas.
+
+    En cada ronda se buscan las `bloque` celdas más baratas entre las filas y columnas
+    que siguen abiertas, leyendo la matriz por grupos de filas, y se recorren en orden.
+    Una celda abierta nunca es más barata que una ya recorrida, así que las asignaciones
+    son las mismas que las de metodo_costo_minimo_ordenado (empates por fila y luego
+    por columna) con O(bloque + filas + columnas) de memoria extra.
+
+    Devuelve (asignaciones, costo_total) con asignaciones como lista de (fila, columna, cantidad).
+    """
+    import numpy as np
+    from balancing import as_matrix
+
+    oferta = list(oferta)
+    demanda = list(demanda)
+    costos = as_matrix(costos)
+    filas, columnas = costos.shape
+    if (len(oferta), len(demanda)) != (filas, columnas):
+        raise ValueError(f"oferta y demanda no corresponden a los costos de {filas}x{columnas}")
+
+    fila_abierta = np.array([o > 0 for o in oferta], dtype=bool)
+    columna_abierta = np.array([d > 0 for d in demanda], dtype=bool)
+    oferta_restante = sum(oferta)
+    demanda_restante = sum(demanda)
+    # Filas leídas de una vez, como mucho unas `bloque` celdas
+    filas_leidas = max(1, bloque // max(columnas, 1))
+    asignaciones = []
+    costo_total = 0
+
+    while oferta_restante > 0 and demanda_restante > 0:
+        abiertas_f = np.flatnonzero(fila_abierta)
+        abiertas_c = np.flatnonzero(columna_abierta)
+        if not abiertas_f.size or not abiertas_c.size:
+            break
+
+        valores = np.empty(0, dtype=costos.dtype)
+        indices = np.empty(0, dtype=np.int64)
+        for inicio in range(0, abiertas_f.size, filas_leidas):
+            grupo = abiertas_f[inicio:inicio + filas_leidas]
+            parte = costos[grupo][:, abiertas_c]
+            parte_indices = (grupo[:, None] * columnas + abiertas_c[None, :]).ravel()
+            valores, indices = _menores(
+                np.concatenate([valores, parte.ravel()]), np.concatenate([indices, parte_indices]), bloque
+            )
+
+        for celda in indices[np.lexsort((indices, valores))].tolist():
+            fila, columna = divmod(celda, columnas)
+            # La fila o la columna pudo agotarse dentro de la misma ronda
+            if not (fila_abierta[fila] and columna_abierta[columna]):
+                continue
+
+            cantidad = min(oferta[fila], demanda[columna])
+            asignaciones.append((fila, columna, cantidad))
+            costo_total += costos[fila, columna].item() * cantidad
+
+            oferta[fila] -= cantidad
+            demanda[columna] -= cantidad
+            oferta_restante -= cantidad
+            demanda_restante -= cantidad
+            if oferta[fila] <= 0:
+                fila_abierta[fila] = False
+            if demanda[columna] <= 0:
+                columna_abierta[columna] = False
+            if oferta_restante <= 0 or demanda_restante <= 0:
+                break
+
+    return asignaciones, costo_total
+
 def return_string_results(resultados, costos, costo_total):
     """
     Returns a formatted string containing step-by-step results of the minimum cost method
-    using fixed column width formatting.
+    using fixed column width formatting. The parts are joined once at the end, like
+    tracelog.TraceLog, so long traces are not copied again on every line.
     """
-    result_string = ""
+    partes = []
     col_width = 12  # Fixed column width
+    num_cols = len(costos[0])
 
     for step, (oferta, demanda, asignaciones) in enumerate(resultados):
         # Add step header
-        result_string += f"\n{'='*60}\n"
-        result_string += f"Paso {step + 1}\n"
-        result_string += f"{'='*60}\n\n"
+        partes.append(f"\n{'='*60}\n")
+        partes.append(f"Paso {step + 1}\n")
+        partes.append(f"{'='*60}\n\n")
 
         # Add tableau header
-        num_cols = len(costos[0])
-        header = "Tableau".center(col_width * (num_cols + 2)) + "\n"
-        result_string += header
+        partes.append("Tableau".center(col_width * (num_cols + 2)) + "\n")
 
         # Column headers
-        header_row = "".ljust(col_width)
-        for j in range(num_cols):
-            header_row += f"D{j+1}".ljust(col_width)
-        header_row += "Oferta".ljust(col_width)
-        result_string += header_row + "\n"
+        partes.append("".ljust(col_width))
+        partes.extend(f"D{j+1}".ljust(col_width) for j in range(num_cols))
+        partes.append("Oferta".ljust(col_width) + "\n")
 
-        # Add data rows
+        # Add data rows, cost and assignment in one cell
         for i in range(len(costos)):
-            row = f"F{i+1}".ljust(col_width)
-            for j in range(num_cols):
-                # Format cost and assignment in one cell
-                cost = costos[i][j]
-                assigned = asignaciones[i][j]
-                cell = f"{cost}({assigned})".ljust(col_width)
-                row += cell
-            row += str(oferta[i]).ljust(col_width)
-            result_string += row + "\n"
+            partes.append(f"F{i+1}".ljust(col_width))
+            partes.extend(f"{costos[i][j]}({asignaciones[i][j]})".ljust(col_width) for j in range(num_cols))
+            partes.append(str(oferta[i]).ljust(col_width) + "\n")
 
         # Add demand row
-        demand_row = "Demanda".ljust(col_width)
-        for d in demanda:
-            demand_row += str(d).ljust(col_width)
-        result_string += demand_row + "\n\n"
+        partes.append("Demanda".ljust(col_width))
+        partes.extend(str(d).ljust(col_width) for d in demanda)
+        partes.append("\n\n")
 
     # Add total cost
-    result_string += f"Costo total mínimo: {costo_total}\n"
+    partes.append(f"Costo total mínimo: {costo_total}\n")
 
-    return result_string
+    return "".join(partes)
 
 def ejecutar_metodo_costo_minimo(datos, menu_inicio):
     """
     Ejecuta el Método de Costo Mínimo con los datos ingresados por el usuario.
     """
+    import numpy as np
+
     try:
         demanda = [int(x) for x in datos[-1][:-1]]
         oferta = [int(row[-1]) for row in datos[:-1] if row]
         costos = [[int(x) for x in row[:-1]] for row in datos[:-1]]
 
-        resultados, costo_total = metodo_costo_minimo_gui(oferta, demanda, np.array(costos))
+        from balancing import balance_problem
+
+        # La tabla mostrada incluye la fila o columna ficticia de un problema desbalanceado
+        costos, oferta, demanda = balance_problem(np.array(costos), oferta, demanda)
+        resultados, costo_total = metodo_costo_minimo_ordenado(oferta, demanda, costos, traza_deltas=True)
 
-        return return_string_results(resultados, np.array(costos), costo_total)
+        return return_string_results(resultados, costos, costo_total)
     except Exception as e:
         return f"Error", f"Ha ocurrido un error: {e}"
 
@@ -1,91 +1,134 @@
-import sys
-from typing import List, Tuple, Optional
+import warnings
+from typing import TYPE_CHECKING, List, Set, Tuple, Optional
+
+from dimo.disjointset import DisjointSet
+from tracelog import TraceLog
+
+if TYPE_CHECKING:
+    import numpy as np
 
 class DIMO:
-    def __init__(self, cost_matrix: List[List[float]], initial_allocation: List[List[float]], num_allocated: int):
+    def __init__(self, cost_matrix: List[List[float]], initial_allocation: List[List[float]],
+                 num_allocated: Optional[int] = None):
         """
         Initialize the MODI Transportation Problem Solver
         
         Args:
-            cost_matrix: Matrix of transportation costs
+            cost_matrix: Matrix of transportation costs, the one of the unbalanced
+                         problem is enough: when initial_allocation has one more
+                         row or column it is the zero cost dummy (balancing.DummyCosts)
             initial_allocation: Initial basic feasible solution
-            num_allocated: Number of allocated cells
+            num_allocated: Deprecated and ignored (DeprecationWarning), the basic cells
+                           are the allocated ones of initial_allocation and
+                           num_allocated counts them
+        Raises:
+            ValueError: if the allocation does not fit the cost matrix
         """
+        if num_allocated is not None:
+            warnings.warn("DIMO's num_allocated argument is ignored, the basic cells are counted",
+                          DeprecationWarning, stacklevel=2)
+        rows, cols = len(initial_allocation), len(initial_allocation[0])
+        if (rows, cols) != (len(cost_matrix), len(cost_matrix[0])):
+            if (rows, cols) not in ((len(cost_matrix) + 1, len(cost_matrix[0])), (len(cost_matrix), len(cost_matrix[0]) + 1)):
+                raise ValueError(f"a {rows}x{cols} allocation does not fit the {len(cost_matrix)}x{len(cost_matrix[0])} costs")
+            from balancing import DummyCosts
+            cost_matrix = DummyCosts(cost_matrix, rows > len(cost_matrix))
         self.cost_matrix = cost_matrix
         self.allocation_matrix = [row[:] for row in initial_allocation]
-        self.num_allocated = num_allocated
         self.num_rows = len(cost_matrix)
         self.num_cols = len(cost_matrix[0])
+        # Basic cells, the zero valued ones (ε) that keep a degenerate solution a tree included
+        self.basis: Set[Tuple[int, int]] = {
+            (i, j)
+            for i, row in enumerate(self.allocation_matrix)
+            for j, value in enumerate(row)
+            if value != 0
+        }
         self.u_values: List[Optional[float]] = []
         self.v_values: List[Optional[float]] = []
-        self.deltas: List[List[Optional[float]]] = []
+        # Reduced costs c[i][j] - u[i] - v[j] of every cell, zero on the basic ones
+        self.deltas: Optional["np.ndarray"] = None
+        # Cell with the most negative delta, None when the solution is optimal
+        self.entering: Optional[Tuple[int, int]] = None
+        # (cost_matrix, the same as an ndarray), converted once per matrix
+        self._cost_array = None
         self.iteration = 0
-        self.resultString = ""
+        self.log = TraceLog()
+        # Network simplex of the "tree" engine, kept for the warm starts
+        self.simplex = None
+
+    @property
+    def num_allocated(self) -> int:
+        """Number of basic cells"""
+        return len(self.basis)
+
+    @num_allocated.setter
+    def num_allocated(self, value: int) -> None:
+        """Deprecated and ignored, the count always comes from the basis"""
+        warnings.warn("setting DIMO.num_allocated has no effect, it counts the basic cells",
+                      DeprecationWarning, stacklevel=2)
+
+    @property
+    def resultString(self) -> str:
+        """Text of the run, see tracelog.TraceLog"""
+        return self.log.text()
+
+    @resultString.setter
+    def resultString(self, text: str) -> None:
+        self.log.reset(text)
 
     def print_tableau(self) -> None:
-        """Print the current tableau showing costs, allocations, u/v values, and deltas""" 
+        """Print the current tableau showing costs, allocations, u/v values, and deltas"""
+        if not self.log.summary:
+            return
         col_width = 12  # Increased width to accommodate larger numbers
         
         # Print column headers with v values
-        header = "".ljust(col_width)
+        header = ["".ljust(col_width)]
         for j in range(self.num_cols):
             v_val = f"{self.v_values[j]:.0f}" if self.v_values and self.v_values[j] is not None else "N/A"
-            header += f"v={v_val}".ljust(col_width)
-        self.resultString += header + "\n"
-        print(header)
+            header.append(f"v={v_val}".ljust(col_width))
+        self.log.write("".join(header))
         
         # Print costs, allocations and u values
         for i in range(self.num_rows):
             u_val = f"{self.u_values[i]:.0f}" if self.u_values and self.u_values[i] is not None else "N/A"
-            row = f"u={u_val}".ljust(col_width)
+            row = [f"u={u_val}".ljust(col_width)]
             for j in range(self.num_cols):
                 cost = self.cost_matrix[i][j]
                 alloc = self.allocation_matrix[i][j]
-                if alloc == 0.000001:  # Special case for degeneracy handling
+                if alloc == 0 and (i, j) in self.basis:  # Zero valued basic cell
                     alloc_str = "ε"
                 else:
                     alloc_str = f"{alloc:.0f}" if alloc > 0 else "0"
-                cell = f"{alloc_str}({cost})".ljust(col_width)
-                row += cell
-            self.resultString += row + "\n"
-            print(row)
+                row.append(f"{alloc_str}({cost})".ljust(col_width))
+            self.log.write("".join(row))
 
         # Print deltas for unallocated cells
-        if self.deltas:
-            self.resultString += "\nDelta Values (unallocated cells only):\n"
-            print("\nDelta Values (unallocated cells only):")
+        if self.deltas is not None:
+            self.log.write("\nDelta Values (unallocated cells only):")
             
             # Header row for deltas
-            delta_header = "index".ljust(col_width)
+            delta_header = ["index".ljust(col_width)]
             for j in range(self.num_cols):
-                delta_header += str(j).ljust(col_width)
-            self.resultString += delta_header + "\n"
-            print(delta_header)
+                delta_header.append(str(j).ljust(col_width))
+            self.log.write("".join(delta_header))
 
             # Delta values
             for i in range(self.num_rows):
-                delta_row = str(i).ljust(col_width)
+                delta_row = [str(i).ljust(col_width)]
                 for j in range(self.num_cols):
-                    if self.deltas[i][j] is not None:
-                        delta_val = f"{self.deltas[i][j]}".ljust(col_width)
+                    if (i, j) not in self.basis:
+                        delta_row.append(f"{self.deltas[i, j]}".ljust(col_width))
                     else:
-                        delta_val = "0".ljust(col_width)
-                    delta_row += delta_val
-                self.resultString += delta_row + "\n"
-                print(delta_row)
-            print()
-
-        # Print current total cost
-        self.calculate_total_cost()
-        
+                        delta_row.append("0".ljust(col_width))
+                self.log.write("".join(delta_row))
+            self.log.echo()
+
         if self.is_degenerate():
-            status = "Status: Solution is degenerate"
-            self.resultString += status + "\n"
-            print(status)
+            self.log.write("Status: Solution is degenerate")
         
-        separator = "=" * 40
-        self.resultString += separator + "\n"
-        print(separator)
+        self.log.write("=" * 40)
 
     def is_degenerate(self) -> bool:
         """Check if the current solution is degenerate"""
@@ -107,8 +150,7 @@ class DIMO:
                     allocated_cells = [
                         self.allocation_matrix[i][j] 
                         for j in range(self.num_cols) 
-                        if elim_cols[j] == 0 and self.allocation_matrix[i][j] != 0 
-                        and self.allocation_matrix[i][j] != -1
+                        if elim_cols[j] == 0 and (i, j) in self.basis
                     ]
                     if len(allocated_cells) < 2:
                         elim_rows[i] = 1
@@ -120,8 +162,7 @@ class DIMO:
                     allocated_cells = [
                         self.allocation_matrix[i][j] 
                         for i in range(self.num_rows) 
-                        if elim_rows[i] == 0 and self.allocation_matrix[i][j] != 0 
-                        and self.allocation_matrix[i][j] != -1
+                        if elim_rows[i] == 0 and (i, j) in self.basis
                     ]
                     if len(allocated_cells) < 2:
                         elim_cols[j] = 1
@@ -141,12 +182,12 @@ class DIMO:
         max_col = (-1, 0)  # (index, count)
         
         for i in range(self.num_rows):
-            allocs = sum(1 for j in range(self.num_cols) if self.allocation_matrix[i][j] != 0)
+            allocs = sum(1 for j in range(self.num_cols) if (i, j) in self.basis)
             if allocs > max_row[1]:
                 max_row = (i, allocs)
 
         for j in range(self.num_cols):
-            allocs = sum(1 for i in range(self.num_rows) if self.allocation_matrix[i][j] != 0)
+            allocs = sum(1 for i in range(self.num_rows) if (i, j) in self.basis)
             if allocs > max_col[1]:
                 max_col = (j, allocs)
 
@@ -164,63 +205,77 @@ class DIMO:
         """Initialize u and v values starting from a specific row"""
         self.u_values[row_idx] = 0
         for j in range(self.num_cols):
-            if self.allocation_matrix[row_idx][j] != 0 and self.v_values[j] is None:
+            if (row_idx, j) in self.basis and self.v_values[j] is None:
                 self.v_values[j] = self.cost_matrix[row_idx][j] - self.u_values[row_idx]
 
     def _initialize_from_column(self, col_idx: int) -> None:
         """Initialize u and v values starting from a specific column"""
         self.v_values[col_idx] = 0
         for i in range(self.num_rows):
-            if self.allocation_matrix[i][col_idx] != 0 and self.u_values[i] is None:
+            if (i, col_idx) in self.basis and self.u_values[i] is None:
                 self.u_values[i] = self.cost_matrix[i][col_idx] - self.v_values[col_idx]
 
     def _fill_remaining_uv_values(self) -> None:
-        """Fill remaining u and v values using known values"""
-        if None in self.u_values:
-            i = self.u_values.index(None)
+        """
+        Fill remaining u and v values using known values. Every unknown line is
+        tried, the first one may only be reachable through lines still unknown.
+        """
+        for i in range(self.num_rows):
+            if self.u_values[i] is not None:
+                continue
             for j in range(self.num_cols):
-                if self.allocation_matrix[i][j] != 0 and self.v_values[j] is not None:
+                if (i, j) in self.basis and self.v_values[j] is not None:
                     self.u_values[i] = self.cost_matrix[i][j] - self.v_values[j]
                     break
-                    
-        if None in self.v_values:
-            j = self.v_values.index(None)
+
+        for j in range(self.num_cols):
+            if self.v_values[j] is not None:
+                continue
             for i in range(self.num_rows):
-                if self.allocation_matrix[i][j] != 0 and self.u_values[i] is not None:
+                if (i, j) in self.basis and self.u_values[i] is not None:
                     self.v_values[j] = self.cost_matrix[i][j] - self.u_values[i]
                     break
 
+    def _costs(self) -> "np.ndarray":
+        """The cost matrix as an ndarray, converted again only when it is replaced"""
+        import numpy as np
+
+        if self._cost_array is None or self._cost_array[0] is not self.cost_matrix:
+            self._cost_array = (self.cost_matrix, np.asarray(self.cost_matrix))
+        return self._cost_array[1]
+
+    def _mask_basis(self) -> None:
+        """Zero deltas on the basic cells, then the entering cell is one argmin"""
+        import numpy as np
+
+        if self.basis:
+            rows, cols = zip(*self.basis)
+            self.deltas[np.array(rows), np.array(cols)] = 0
+        k = int(self.deltas.argmin())
+        # Strictly negative, the first one in row major order on ties
+        self.entering = divmod(k, self.num_cols) if self.deltas.flat[k] < 0 else None
+
     def calculate_deltas(self) -> None:
-        """Calculate delta values for unallocated cells"""
-        self.deltas = [[None] * self.num_cols for _ in range(self.num_rows)]
-        for i in range(self.num_rows):
-            for j in range(self.num_cols):
-                if self.allocation_matrix[i][j] == 0:
-                    self.deltas[i][j] = self.cost_matrix[i][j] - self.u_values[i] - self.v_values[j]
+        """Calculate delta values for unallocated cells, all at once"""
+        import numpy as np
+
+        u = np.asarray(self.u_values)
+        v = np.asarray(self.v_values)
+        self.deltas = self._costs() - u[:, None] - v[None, :]
+        self._mask_basis()
 
     def is_optimal(self) -> bool:
         """Check if current solution is optimal"""
-        return all(delta is None or delta >= 0 
-                  for row in self.deltas 
-                  for delta in row)
+        return self.entering is None
 
     def update_allocation(self) -> None:
         """Create new allocation based on negative deltas"""
-        # Find most negative delta
-        min_delta = float('inf')
-        min_pos = (-1, -1)
-        for i in range(self.num_rows):
-            for j in range(self.num_cols):
-                if self.deltas[i][j] is not None and self.deltas[i][j] < min_delta:
-                    min_delta = self.deltas[i][j]
-                    min_pos = (i, j)
+        # Cell with the most negative delta, found by calculate_deltas
+        min_pos = self.entering
 
         # Find loop
-        i, j = min_pos
-        temp_alloc = self.allocation_matrix[i][j]
-        self.allocation_matrix[i][j] = sys.maxsize
+        self.basis.add(min_pos)
         _, elim_rows, elim_cols = self.check_independent_allocation()
-        self.allocation_matrix[i][j] = temp_alloc  # Restore original value
         
         row_indices = [i for i, val in enumerate(elim_rows) if val == 0]
         col_indices = [j for j, val in enumerate(elim_cols) if val == 0]
@@ -230,28 +285,29 @@ class DIMO:
         current_pos = min_pos
         is_horizontal = True
         
-        while len(path) < 4:  # We need exactly 4 points to form a closed loop
+        # The rows and columns left have exactly two loop cells each, walk them until
+        # the loop closes on the entering cell (it can be longer than 4 cells)
+        while True:
             if is_horizontal:
                 # Look for vertical connection
                 for i in row_indices:
-                    if i != current_pos[0] and self.allocation_matrix[i][current_pos[1]] > 0:
-                        path.append((i, current_pos[1]))
+                    if i != current_pos[0] and (i, current_pos[1]) in self.basis:
                         current_pos = (i, current_pos[1])
                         break
             else:
                 # Look for horizontal connection
                 for j in col_indices:
-                    if j != current_pos[1] and self.allocation_matrix[current_pos[0]][j] > 0:
-                        path.append((current_pos[0], j))
+                    if j != current_pos[1] and (current_pos[0], j) in self.basis:
                         current_pos = (current_pos[0], j)
                         break
+            if current_pos == min_pos:
+                break
+            path.append(current_pos)
             is_horizontal = not is_horizontal
 
-        # Update allocations along the path
-        min_value = float('inf')
-        for idx, (x, y) in enumerate(path[1::2]):  # Check only negative positions
-            if self.allocation_matrix[x][y] != 0.000001:
-                min_value = min(min_value, self.allocation_matrix[x][y])
+        # Update allocations along the path, a zero valued basic cell leaves at once
+        leaving = min(path[1::2], key=lambda cell: self.allocation_matrix[cell[0]][cell[1]])
+        min_value = self.allocation_matrix[leaving[0]][leaving[1]]
         
         for idx, (i, j) in enumerate(path):
             if idx % 2 == 0:  # Add to even positions (including 0)
@@ -259,28 +315,31 @@ class DIMO:
             else:  # Subtract from odd positions
                 self.allocation_matrix[i][j] -= min_value
 
-        # Clean up any tiny residuals
-        for i in range(self.num_rows):
-            for j in range(self.num_cols):
-                if abs(self.allocation_matrix[i][j]) < 1e-10:
-                    self.allocation_matrix[i][j] = 0
-
-        # Update number of allocations
-        self.num_allocated = sum(1 for i in range(self.num_rows) 
-                               for j in range(self.num_cols) 
-                               if self.allocation_matrix[i][j] > 0)
+        # One cell leaves the basis, the other ones that reach zero stay as ε.
+        # x - x is exactly 0 even with floats, so no residuals are cleaned up
+        self.basis.discard(leaving)
 
     def remove_degeneracy(self) -> None:
-        """Remove degeneracy by adding small values"""
-        for i in range(self.num_rows):
-            for j in range(self.num_cols):
-                if self.allocation_matrix[i][j] == 0:
-                    self.allocation_matrix[i][j] = 0.000001
-                    is_independent = self.check_independent_allocation()[0]
-                    if is_independent:
-                        self.num_allocated += 1
-                        return
-                    self.allocation_matrix[i][j] = 0
+        """
+        Complete the basis to a spanning tree of rows and columns with zero valued
+        basic cells: union-find over the basic cells, then every other component
+        is joined to row 0 or column 0, so it takes O((m + n) α) and no retries.
+        Nothing is added when the basic cells already form a loop.
+        """
+        m = self.num_rows
+        nodes = DisjointSet(m + self.num_cols)
+        for i, j in self.basis:
+            if not nodes.union(i, m + j):
+                return
+
+        if nodes.union(0, m):
+            self.basis.add((0, 0))
+        for i in range(1, m):
+            if nodes.union(i, m):
+                self.basis.add((i, 0))
+        for j in range(1, self.num_cols):
+            if nodes.union(0, m + j):
+                self.basis.add((0, j))
 
     def calculate_total_cost(self) -> float:
         """Calculate total cost for current allocation"""
@@ -291,45 +350,170 @@ class DIMO:
         return cost
     
     def print_total_cost(self):
+        if not self.log.summary:
+            return
         cost = 0
-        formula=""
+        terms = []
         for i in range(self.num_rows):
             for j in range(self.num_cols):
                 if self.allocation_matrix[i][j] != 0:
                     cost += self.cost_matrix[i][j] * self.allocation_matrix[i][j]
-                    formula += f"{self.cost_matrix[i][j]}*{self.allocation_matrix[i][j]} + "
-        formula = "\nCost: " + formula[:-3] + " = " + f"{cost}"
+                    terms.append(f"{self.cost_matrix[i][j]}*{self.allocation_matrix[i][j]}")
+        self.log.write("\nCost: " + " + ".join(terms) + " = " + f"{cost}", end="")
+        self.log.echo()
+
+    def solve_tree(self, max_iterations: Optional[int] = None, trace: Optional[str] = None,
+                   pricing: str = "dantzig") -> Tuple[Optional[List[List[float]]], Optional[float]]:
+        """
+        Solve the transportation problem with the network simplex of dimo.simplex.
+        The basis is a spanning tree, so loops of any length are handled and the
+        potentials are only updated on the part of the tree that changed.
+        pricing picks the entering cells (dimo.simplex.PRICING_RULES), the pivots and
+        their times are in self.simplex.stats() afterwards.
+        """
+        from dimo.simplex import PRICING_RULES, TransportSimplex
+
+        # Checked here, a ValueError of TransportSimplex means an infeasible problem
+        if pricing not in PRICING_RULES:
+            raise ValueError(f"Unknown pricing rule {pricing!r}, expected one of {PRICING_RULES}")
+        if trace is not None:
+            self.log.level = trace
+        self.iteration = 0
+        try:
+            self.simplex = TransportSimplex(self.cost_matrix, self.allocation_matrix, pricing=pricing)
+        except ValueError as e:
+            self.log.write(f"\nNo solution exists - {e}")
+            return None, None
 
-        self.resultString += formula
-        print(formula)
+        optimal = self.simplex.solve(max_iterations)
+        return self._tree_result(optimal)
 
-    def solve(self) -> Tuple[Optional[List[List[float]]], Optional[float]]:
+    def resolve(self, supply_delta=None, demand_delta=None, max_iterations: Optional[int] = None, trace: Optional[str] = None) -> Tuple[Optional[List[List[float]]], Optional[float]]:
+        """
+        Warm start after small supply / demand changes, starting from the current basis
+        instead of a new initial solution (see TransportSimplex.resolve).
+        Args:
+            supply_delta: Change of every supply as a list, or {row: change}
+            demand_delta: Change of every demand as a list, or {column: change}, the
+                          changes must add up to the same total as the supply ones
+            max_iterations: Pivot limit, none by default
+            trace: Same as in solve
+        Returns: (optimal_allocation, optimal_cost) or (None, None) if no solution exists
+        """
+        if trace is not None:
+            self.log.level = trace
+        try:
+            if self.simplex is None:
+                self.simplex = self._current_simplex()
+            optimal = self.simplex.resolve(supply_delta, demand_delta, max_iterations)
+        except ValueError as e:
+            self.log.write(f"\nNo solution exists - {e}")
+            return None, None
+        return self._tree_result(optimal)
+
+    def update_costs(self, changes, max_iterations: Optional[int] = None, trace: Optional[str] = None) -> Tuple[Optional[List[List[float]]], Optional[float]]:
+        """
+        Warm start after cost changes, the current allocation stays feasible so the
+        pivots continue from the current basis (see TransportSimplex.update_costs).
+        Args:
+            changes: {(row, column): new cost} or the whole new cost matrix
+            max_iterations: Pivot limit, none by default
+            trace: Same as in solve
+        Returns: (optimal_allocation, optimal_cost) or (None, None) if no solution exists
+        """
+        if trace is not None:
+            self.log.level = trace
+        try:
+            if self.simplex is None:
+                self.simplex = self._current_simplex()
+            self.simplex.update_costs(changes)
+        except ValueError as e:
+            self.log.write(f"\nNo solution exists - {e}")
+            return None, None
+
+        # Keep the tableau costs in step without touching the caller's matrix
+        if isinstance(changes, dict):
+            self.cost_matrix = [row[:] for row in self.cost_matrix]
+            for (i, j), value in changes.items():
+                self.cost_matrix[i][j] = value
+        else:
+            self.cost_matrix = [list(row) for row in changes]
+
+        optimal = self.simplex.solve(max_iterations)
+        return self._tree_result(optimal)
+
+    def _current_simplex(self):
+        """
+        Network simplex over the current allocation, after the classic engine (or
+        before solving). The tree completes a degenerate basis by itself.
+        """
+        from dimo.simplex import TransportSimplex
+
+        return TransportSimplex(self.cost_matrix, self.allocation_matrix)
+
+    def _tree_result(self, optimal: bool) -> Tuple[Optional[List[List[float]]], Optional[float]]:
+        """Show the final tableau of the network simplex and return like solve"""
+        self.load_simplex()
+
+        self.print_tableau()
+        if not optimal:
+            self.log.write("\nMax iterations reached without finding optimal solution")
+            return None, None
+
+        self.log.write("\nOptimal solution found!")
+        return self.allocation_matrix, self.calculate_total_cost()
+
+    def load_simplex(self) -> None:
+        """Copy the state of the network simplex into the tableau attributes"""
+        self.iteration = self.simplex.iterations
+        self.allocation_matrix = self.simplex.allocation()
+        self.basis = set(self.simplex.flow)
+        self.u_values = self.simplex.u_values.tolist()
+        self.v_values = self.simplex.v_values.tolist()
+        self.deltas = self.simplex.reduced_costs()
+        self._mask_basis()
+
+    def solve(self, engine: str = "classic", max_iterations: Optional[int] = None, trace: Optional[str] = None,
+              pricing: str = "dantzig") -> Tuple[Optional[List[List[float]]], Optional[float]]:
         """
         Solve the transportation problem using MODI method
+        Args:
+            engine: "classic" for the step by step tableau method, "tree" for the
+                    network simplex (see solve_tree)
+            max_iterations: Iteration limit, 100 for "classic" and none for "tree" by default
+            trace: "full" for every tableau, "summary" for the final one and the status,
+                   "none" to skip all the formatting. Keeps the current level by default
+            pricing: Pricing rule of the "tree" engine, one of dimo.simplex.PRICING_RULES
         Returns: (optimal_allocation, optimal_cost) or (None, None) if no solution exists
         """
-        max_iterations = 100
+        if engine == "tree":
+            return self.solve_tree(max_iterations, trace, pricing)
+
+        if trace is not None:
+            self.log.level = trace
+        if max_iterations is None:
+            max_iterations = 100
         self.iteration = 0
+        self.simplex = None
         
         
-        self.resultString += f"Iteration {self.iteration+1}" + "\n"
-        print(f"Iteration {self.iteration+1}")
-        # Print initial tableau
-        self.print_tableau()
+        if self.log.full:
+            self.log.write(f"Iteration {self.iteration+1}")
+            # Print initial tableau
+            self.print_tableau()
         
         while self.iteration < max_iterations:
-            self.iteration += 1
-            
-            # Handle degeneracy
+            # Handle degeneracy, completing the tree does not take an iteration
             if self.is_degenerate():
                 self.remove_degeneracy()
-                self.print_tableau()
-                continue
+                if self.log.full:
+                    self.print_tableau()
+
+            self.iteration += 1
 
             # Check independence
             if not self.check_independent_allocation()[0]:
-                self.resultString += "\nNo solution exists - allocations are not independent" + "\n"
-                print("\nNo solution exists - allocations are not independent")
+                self.log.write("\nNo solution exists - allocations are not independent")
                 return None, None
 
             # Calculate u and v values
@@ -338,20 +522,23 @@ class DIMO:
             # Calculate deltas
             self.calculate_deltas()
             
-            # Print current tableau
-            self.print_tableau()
-            
             # Check if optimal
-            if self.is_optimal():
-                self.resultString += "\nOptimal solution found!" + "\n"
-                print("\nOptimal solution found!")
+            optimal = self.is_optimal()
+
+            # Print current tableau, only the last one for a summary
+            if self.log.full or optimal:
+                self.print_tableau()
+            
+            if optimal:
+                self.log.write("\nOptimal solution found!")
                 return self.allocation_matrix, self.calculate_total_cost()
             
             # Update allocation
             self.update_allocation()
 
-        self.resultString += "\nMax iterations reached without finding optimal solution" + "\n"
-        print("\nMax iterations reached without finding optimal solution")
+        if not self.log.full:
+            self.print_tableau()
+        self.log.write("\nMax iterations reached without finding optimal solution")
         return None, None
 
     # [Rest of the class methods remain unchanged]
@@ -370,9 +557,7 @@ if __name__ == "__main__":
         [0, 200, 100, 500]
     ]
     
-    num_allocated = 6
-    
-    dimo = DIMO(cost_matrix, initial_allocation, num_allocated)
+    dimo = DIMO(cost_matrix, initial_allocation)
 
     dimo.resultString = "Initial Tableau" + "\n"
     print("Initial Tableau")
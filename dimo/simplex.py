@@ -0,0 +1,679 @@
+import math
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+from balancing import DummyCosts, as_matrix
+from dimo.disjointset import DisjointSet
+from exactint import check_int64, potential_dtype
+from sparse import SparseCosts
+
+# Cells priced per block, keeps the temporary reduced cost matrix small
+BLOCK_CELLS = 1 << 22
+# Changed basic costs that update_costs fixes by shifting subtrees, with more of
+# them all the potentials are computed again from the root
+UPDATE_SUBTREES = 8
+# Rules to pick the entering cell, see TransportSimplex
+PRICING_RULES = ("dantzig", "block", "candidates")
+# Smallest block of the "block" rule, below it the numpy calls cost more than the cells
+PRICING_BLOCK_CELLS = 1 << 12
+
+
+class PivotStats(NamedTuple):
+    """Counters of TransportSimplex.solve, to tune the pricing rule per workload"""
+    pricing: str
+    pivots: int
+    pricing_time: float
+    pivot_time: float
+    # Reduced costs computed, full pricings included
+    cells_priced: int
+
+    @property
+    def time_per_pivot(self) -> float:
+        return (self.pricing_time + self.pivot_time) / self.pivots if self.pivots else 0.0
+
+
+def _changes(delta) -> Dict[int, float]:
+    """{index: delta} from a dict, a list with one value per line or None"""
+    if delta is None:
+        return {}
+    if isinstance(delta, dict):
+        return {int(k): v for k, v in delta.items() if v}
+    return {k: v for k, v in enumerate(delta) if v}
+
+
+class TransportSimplex:
+    """
+    Transportation simplex (MODI) with the basis kept as a spanning tree.
+
+    Row i is the node i and column j is the node m + j, every basic cell (i, j) is a
+    tree edge. The tree is stored with parent pointers and depths hanging from row 0,
+    so the loop closed by an entering cell is found walking up from both ends until
+    they meet, whatever its length. After a pivot only the subtree that was cut off
+    and hung again from the entering cell gets new potentials and parents.
+
+    With sparse costs (sparse.SparseCosts) only the existing lanes are priced. Basic
+    cells on missing lanes are artificial, they cost `artificial_cost` (big M) so
+    the pivots take them out, and they never enter again.
+
+    The entering cell is picked by one of PRICING_RULES, all vectorized:
+    - "dantzig": the most negative reduced cost of every cell, fewest pivots
+    - "block": the most negative of the first block of `block_cells` cells (from
+      where the last search stopped) that has a negative one, cheap pivots
+    - "candidates": the most negative of a list of the `candidates` most negative
+      cells, priced again every pivot and filled again by a full pricing once none
+      of them is negative
+    stats() tells the pivots and the time spent pricing and pivoting.
+    """
+
+    def __init__(self, cost_matrix, initial_allocation, cells: bool = False, pricing: str = "dantzig",
+                 block_cells: Optional[int] = None, candidates: Optional[int] = None):
+        """
+        Args:
+            cost_matrix: Matrix of transportation costs (a numpy.memmap or a
+                         balancing.DummyCosts is read in blocks, never copied),
+                         or a sparse.SparseCosts
+            initial_allocation: Initial basic feasible solution, degenerate solutions
+                                are completed with zero valued basic cells. With
+                                SparseCosts it is a list of (row, column, amount)
+            cells: initial_allocation is a list of (row, column, amount) for a dense
+                   matrix too, no rows * columns table is needed
+            pricing: One of PRICING_RULES
+            block_cells: Cells per block of the "block" rule, about sqrt(cells) by default
+            candidates: Length of the list of the "candidates" rule, rows + columns by default
+        Raises:
+            ValueError: if the allocation is negative or its cells form a loop, or
+                        for an unknown pricing rule
+            OverflowError: if integer costs are too large for int64 potentials
+        """
+        self.sparse = isinstance(cost_matrix, SparseCosts)
+        self.costs = cost_matrix if self.sparse else as_matrix(cost_matrix)
+        # update_costs copies the costs once before writing on them
+        self._own_costs = False
+        self.num_rows, self.num_cols = self.costs.shape
+        values = self.costs.data if self.sparse else self.costs
+        nodes = self.num_rows + self.num_cols
+        # Integer costs keep exact int64 potentials, compared without tolerance
+        dtype = potential_dtype(values, nodes)
+        self.tolerance = 0 if dtype is np.int64 else 1e-9
+        self.artificial_cost = self._artificial_cost(values, dtype) if self.sparse else None
+
+        self.flow: Dict[Tuple[int, int], float] = {}
+        self.adjacent: List[set] = [set() for _ in range(nodes)]
+        self.parent: List[int] = [-1] * nodes
+        self.depth: List[int] = [0] * nodes
+        self.potential = np.zeros(nodes, dtype=dtype)
+        self.iterations = 0
+
+        if pricing not in PRICING_RULES:
+            raise ValueError(f"Unknown pricing rule {pricing!r}, expected one of {PRICING_RULES}")
+        self.pricing = pricing
+        # Rows of the dense matrix or lanes of the sparse one, priced by blocks of lines
+        self._lines = self.costs.data.size if self.sparse else self.num_rows
+        self._line_cells = 1 if self.sparse else max(self.num_cols, 1)
+        self.block_cells = block_cells or max(PRICING_BLOCK_CELLS, math.isqrt(self._lines * self._line_cells))
+        self.candidates = candidates or nodes
+        self._next_line = 0
+        self._candidates = np.empty(0, dtype=np.intp)
+        self.pricing_time = 0.0
+        self.pivot_time = 0.0
+        self.cells_priced = 0
+
+        if self.sparse or cells:
+            cells = [(int(i), int(j), amount) for i, j, amount in initial_allocation if amount != 0]
+        else:
+            allocation = np.asarray(initial_allocation)
+            cells = [(int(i), int(j), allocation[i, j].item()) for i, j in zip(*np.nonzero(allocation))]
+        if any(amount < 0 for _, _, amount in cells):
+            raise ValueError("allocations can not be negative")
+        self.supply = [0] * self.num_rows
+        self.demand = [0] * self.num_cols
+        for i, j, amount in cells:
+            self.supply[i] += amount
+            self.demand[j] += amount
+
+        self._build_basis(cells)
+        self._build_tree()
+
+    def _artificial_cost(self, values: np.ndarray, dtype):
+        """Big M for the lane costs `values`: dearer than any path of real lanes, so
+        an artificial cell always leaves"""
+        nodes = self.num_rows + self.num_cols
+        largest = np.abs(values).max().item() if values.size else 0
+        artificial_cost = (largest + 1) * nodes
+        if dtype is np.int64:
+            check_int64(artificial_cost, nodes)
+        return artificial_cost
+
+    def _cost(self, i: int, j: int):
+        if self.sparse:
+            return self.costs.get(i, j, self.artificial_cost)
+        return self.costs[i, j].item()
+
+    def _add_edge(self, i: int, j: int, flow) -> None:
+        self.flow[(i, j)] = flow
+        self.adjacent[i].add(self.num_rows + j)
+        self.adjacent[self.num_rows + j].add(i)
+
+    def _remove_edge(self, i: int, j: int) -> None:
+        del self.flow[(i, j)]
+        self.adjacent[i].discard(self.num_rows + j)
+        self.adjacent[self.num_rows + j].discard(i)
+
+    def _build_basis(self, allocated: List[Tuple[int, int, float]]) -> None:
+        """Take the allocated cells as basic and complete the tree with zero valued cells"""
+        m = self.num_rows
+        cells = DisjointSet(m + self.num_cols)
+
+        for i, j, amount in allocated:
+            if not cells.union(i, m + j):
+                raise ValueError("allocations are not independent (they form a loop)")
+            self._add_edge(i, j, amount)
+
+        # Degenerate sparse solution: join the components with existing lanes first
+        components = m + self.num_cols - len(self.flow)
+        if self.sparse and components > 1:
+            for i, j in zip(self.costs.rows.tolist(), self.costs.indices.tolist()):
+                if cells.union(i, m + j):
+                    self._add_edge(i, j, 0)
+                    components -= 1
+                    if components == 1:
+                        break
+
+        # Degenerate solution: hang every other component from row 0 / column 0
+        if cells.union(0, m):
+            self._add_edge(0, 0, 0)
+        for i in range(1, m):
+            if cells.union(i, m):
+                self._add_edge(i, 0, 0)
+        for j in range(1, self.num_cols):
+            if cells.union(0, m + j):
+                self._add_edge(0, j, 0)
+
+    def _edge(self, a: int, b: int) -> Tuple[int, int]:
+        """Cell of the tree edge between two nodes"""
+        if a < self.num_rows:
+            return a, b - self.num_rows
+        return b, a - self.num_rows
+
+    def _hang(self, root: int, parent: int) -> List[int]:
+        """
+        Set parent and depth of every node reachable from `root` without going
+        through `parent`, root included. Returns the visited nodes in BFS order.
+        """
+        self.parent[root] = parent
+        self.depth[root] = self.depth[parent] + 1 if parent >= 0 else 0
+
+        visited = [root]
+        for node in visited:
+            for neighbour in self.adjacent[node]:
+                if neighbour == self.parent[node]:
+                    continue
+                self.parent[neighbour] = node
+                self.depth[neighbour] = self.depth[node] + 1
+                visited.append(neighbour)
+        return visited
+
+    def _build_tree(self) -> None:
+        """Hang the whole basis from row 0 and compute the potentials with u[0] = 0"""
+        potential = [0] * (self.num_rows + self.num_cols)
+        for node in self._hang(0, -1)[1:]:
+            i, j = self._edge(node, self.parent[node])
+            potential[node] = self._cost(i, j) - potential[self.parent[node]]
+        self.potential[:] = potential
+
+    @property
+    def u_values(self) -> np.ndarray:
+        return self.potential[:self.num_rows]
+
+    @property
+    def v_values(self) -> np.ndarray:
+        return self.potential[self.num_rows:]
+
+    def reduced_costs(self) -> np.ndarray:
+        """
+        Full matrix of c[i][j] - u[i] - v[j], zero on the basic cells. With sparse
+        costs, one value per existing lane aligned with costs.data.
+        """
+        if self.sparse:
+            return self.costs.data - self.u_values[self.costs.rows] - self.v_values[self.costs.indices]
+        return self.costs - self.u_values[:, None] - self.v_values[None, :]
+
+    def _reduced(self, start: int, stop: int) -> np.ndarray:
+        """
+        Reduced costs of the rows start:stop, or of the lanes start:stop with sparse
+        costs. The zero cost dummy line of a DummyCosts is filled in without reading
+        it, the stored matrix is read as it is.
+        """
+        u, v = self.u_values, self.v_values
+        costs = self.costs
+        if self.sparse:
+            return costs.data[start:stop] - u[costs.rows[start:stop]] - v[costs.indices[start:stop]]
+        if not isinstance(costs, DummyCosts):
+            block = costs[start:stop] - u[start:stop, None]
+            block -= v
+            return block
+
+        base = costs.base
+        rows, cols = base.shape
+        block = np.empty((stop - start, self.num_cols), dtype=np.result_type(base.dtype, u.dtype))
+        if costs.dummy_row:
+            real = max(0, min(stop, rows) - start)
+            np.subtract(base[start:start + real], u[start:start + real, None], out=block[:real])
+            block[real:] = -u[start + real:stop, None]
+        else:
+            np.subtract(base[start:stop], u[start:stop, None], out=block[:, :cols])
+            block[:, cols] = -u[start:stop]
+        block -= v
+        return block
+
+    def _reduced_at(self, positions: np.ndarray) -> np.ndarray:
+        """Reduced costs of the cells at flat positions (lanes with sparse costs)"""
+        u, v = self.u_values, self.v_values
+        if self.sparse:
+            return self.costs.data[positions] - u[self.costs.rows[positions]] - v[self.costs.indices[positions]]
+        i, j = np.divmod(positions, self.num_cols)
+        return self.costs[i, j] - u[i] - v[j]
+
+    def _cell_at(self, position: int) -> Tuple[int, int]:
+        if self.sparse:
+            return int(self.costs.rows[position]), int(self.costs.indices[position])
+        return divmod(int(position), self.num_cols)
+
+    def _price(self) -> Tuple[Optional[Tuple[int, int]], float]:
+        """Entering cell and its reduced cost with the pricing rule, (None, ...) at the optimum"""
+        start = time.perf_counter()
+        if self.pricing == "block":
+            found = self._price_block()
+        elif self.pricing == "candidates":
+            found = self._price_candidates()
+        else:
+            found = self._price_dantzig()
+        self.pricing_time += time.perf_counter() - start
+        return found
+
+    def _price_dantzig(self) -> Tuple[Optional[Tuple[int, int]], float]:
+        """Most negative reduced cost of every cell (Dantzig), priced by blocks of rows or lanes"""
+        best, best_position = -self.tolerance, None
+        step = max(1, BLOCK_CELLS // self._line_cells)
+        for start in range(0, self._lines, step):
+            block = self._reduced(start, min(start + step, self._lines))
+            k = int(block.argmin())
+            if block.flat[k] < best:
+                best = block.flat[k].item()
+                best_position = start * self._line_cells + k
+        self.cells_priced += self._lines * self._line_cells
+        return (None if best_position is None else self._cell_at(best_position)), best
+
+    def _price_block(self) -> Tuple[Optional[Tuple[int, int]], float]:
+        """
+        Partial pricing: the blocks are priced in turn from where the last search
+        stopped, the most negative reduced cost of the first block that has one enters
+        """
+        step = max(1, self.block_cells // self._line_cells)
+        for _ in range(-(-self._lines // step)):
+            start = self._next_line
+            stop = min(start + step, self._lines)
+            self._next_line = 0 if stop == self._lines else stop
+            block = self._reduced(start, stop)
+            self.cells_priced += block.size
+            k = int(block.argmin())
+            if block.flat[k] < -self.tolerance:
+                return self._cell_at(start * self._line_cells + k), block.flat[k].item()
+        return None, -self.tolerance
+
+    def _price_candidates(self) -> Tuple[Optional[Tuple[int, int]], float]:
+        """
+        Candidate list: the most negative cells of the last full pricing are priced
+        again until none is negative, then a new full pricing fills the list
+        """
+        for refill in (False, True):
+            if refill:
+                self._candidates = self._fill_candidates()
+            if self._candidates.size:
+                values = self._reduced_at(self._candidates)
+                self.cells_priced += values.size
+                negative = values < -self.tolerance
+                self._candidates, values = self._candidates[negative], values[negative]
+            if self._candidates.size:
+                k = int(values.argmin())
+                position = self._candidates[k]
+                # The entering cell becomes basic, it leaves the list
+                self._candidates = np.delete(self._candidates, k)
+                return self._cell_at(position), values[k].item()
+        return None, -self.tolerance
+
+    def _fill_candidates(self) -> np.ndarray:
+        """Positions of the (at most self.candidates) most negative reduced costs"""
+        keep = self.candidates
+        positions, values = np.empty(0, dtype=np.intp), np.empty(0)
+        step = max(1, BLOCK_CELLS // self._line_cells)
+        for start in range(0, self._lines, step):
+            block = self._reduced(start, min(start + step, self._lines)).ravel()
+            negative = np.flatnonzero(block < -self.tolerance)
+            positions = np.concatenate((positions, negative + start * self._line_cells))
+            values = np.concatenate((values, block[negative]))
+            if positions.size > 2 * keep:
+                best = np.argpartition(values, keep)[:keep]
+                positions, values = positions[best], values[best]
+        self.cells_priced += self._lines * self._line_cells
+        if positions.size > keep:
+            positions = positions[np.argpartition(values, keep)[:keep]]
+        return positions
+
+    def stats(self) -> PivotStats:
+        return PivotStats(self.pricing, self.iterations, self.pricing_time, self.pivot_time, self.cells_priced)
+
+    def find_cycle(self, i: int, j: int) -> List[Tuple[int, int]]:
+        """
+        Loop closed by the non basic cell (i, j), starting at (i, j) and going around
+        through column j. Even positions gain the moved quantity, odd ones lose it.
+        """
+        return self._cycle(i, j)[0]
+
+    def _cycle(self, i: int, j: int) -> Tuple[List[Tuple[int, int]], int]:
+        """find_cycle plus how many cells of the loop are between column j and the apex"""
+        a, b = i, self.num_rows + j
+        up_from_row, up_from_col = [], []
+        while a != b:
+            if self.depth[a] >= self.depth[b]:
+                up_from_row.append(self._edge(a, self.parent[a]))
+                a = self.parent[a]
+            else:
+                up_from_col.append(self._edge(b, self.parent[b]))
+                b = self.parent[b]
+        return [(i, j)] + up_from_col + up_from_row[::-1], len(up_from_col)
+
+    def _pivot(self, cell: Tuple[int, int], delta) -> None:
+        i, j = cell
+        cycle, up_from_col = self._cycle(i, j)
+
+        # Leaving cell: smallest losing cell, on ties the last one met going around
+        # from the apex in the direction of the entering cell (apex -> i -> j -> apex)
+        apex_order = list(range(up_from_col + 1, len(cycle))) + list(range(1, up_from_col + 1))
+        leaving, theta = None, None
+        for k in apex_order:
+            if k % 2 == 1:
+                value = self.flow[cycle[k]]
+                if theta is None or value <= theta:
+                    leaving, theta = k, value
+
+        self._exchange(cell, delta, cycle, leaving, theta)
+
+    def _cut(self, cell: Tuple[int, int]) -> List[int]:
+        """Nodes that get separated from the root when the basic cell is removed"""
+        row, col = cell[0], self.num_rows + cell[1]
+        subtree = [row if self.parent[row] == col else col]
+        for node in subtree:
+            subtree.extend(n for n in self.adjacent[node] if n != self.parent[node])
+        return subtree
+
+    def _exchange(self, cell: Tuple[int, int], delta, cycle: List[Tuple[int, int]], leaving: int, theta,
+                  subtree: Optional[List[int]] = None) -> None:
+        """
+        Move theta around the loop of the entering cell (gaining on even positions,
+        losing on odd ones), swap cycle[leaving] for the entering cell in the tree
+        and shift the potentials of the part that was cut off by delta, its reduced cost.
+        """
+        i, j = cell
+        for k, edge in enumerate(cycle[1:], start=1):
+            if k % 2 == 1:
+                self.flow[edge] -= theta
+            else:
+                self.flow[edge] += theta
+
+        leaving_cell = cycle[leaving]
+        if subtree is None:
+            subtree = self._cut(leaving_cell)
+        in_subtree = set(subtree)
+
+        self._remove_edge(*leaving_cell)
+        self._add_edge(i, j, theta)
+
+        rows = [node for node in subtree if node < self.num_rows]
+        cols = [node for node in subtree if node >= self.num_rows]
+        # Shift the cut off subtree so the entering cell gets u[i] + v[j] = c[i][j]
+        if i in in_subtree:
+            self.potential[rows] += delta
+            self.potential[cols] -= delta
+            self._hang(i, self.num_rows + j)
+        else:
+            self.potential[rows] -= delta
+            self.potential[cols] += delta
+            self._hang(self.num_rows + j, i)
+
+    def solve(self, max_iterations: Optional[int] = None) -> bool:
+        """
+        Pivot until no reduced cost is negative. False if max_iterations is reached first
+        Raises:
+            ValueError: if the optimum still sends something over a missing lane, the
+                        existing lanes can not carry the supply to the demand
+        """
+        while max_iterations is None or self.iterations < max_iterations:
+            cell, delta = self._price()
+            if cell is None:
+                if any(value > 0 for _, _, value in self.artificial_cells()):
+                    raise ValueError("no feasible solution uses only the existing lanes")
+                return True
+            start = time.perf_counter()
+            self._pivot(cell, delta)
+            self.pivot_time += time.perf_counter() - start
+            self.iterations += 1
+        return False
+
+    def change_supply_demand(self, supply_delta=None, demand_delta=None) -> None:
+        """
+        Add the deltas (a list with one value per row / column, or {index: delta})
+        to the supply and demand and move the basic flows along the tree to match.
+        The basis is kept, so some basic cells can end up negative; resolve() repairs
+        them. The deltas must keep the problem balanced.
+        Raises:
+            ValueError: if the supply and demand changes do not add up to the same total
+        """
+        supply_delta = _changes(supply_delta)
+        demand_delta = _changes(demand_delta)
+        if sum(supply_delta.values()) != sum(demand_delta.values()):
+            raise ValueError("supply and demand changes must add up to the same total")
+
+        # Excess of every node: what it sends (rows) or gets (columns) on top of before
+        m = self.num_rows
+        excess = [(i, delta) for i, delta in supply_delta.items()]
+        excess += [(m + j, -delta) for j, delta in demand_delta.items()]
+        for i, delta in supply_delta.items():
+            self.supply[i] += delta
+        for j, delta in demand_delta.items():
+            self.demand[j] += delta
+
+        # The tree edge above a node carries the excess of its whole subtree, so each
+        # change only moves the flows on the path from its node up to the root
+        for node, delta in excess:
+            while self.parent[node] >= 0:
+                edge = self._edge(node, self.parent[node])
+                self.flow[edge] += delta if node < m else -delta
+                node = self.parent[node]
+
+    def update_costs(self, changes) -> None:
+        """
+        Take new costs keeping the basis: {(i, j): new cost}, or the whole new cost
+        matrix (a SparseCosts with the same lanes for sparse problems). The current
+        flows stay feasible; a changed basic cell only shifts the potentials of the
+        part of the tree below it, a changed non basic cell only its own reduced
+        cost. Call solve() afterwards to pivot from the current basis; when a large
+        part of the costs changed a new initial solution can take fewer pivots.
+        Nothing is changed when a change is not valid. New sparse costs give a new big M
+        (artificial_cost), the artificial basic cells are priced again with it.
+        Raises:
+            ValueError: if a change is outside the matrix or on a missing lane of a
+                        sparse problem
+            OverflowError: if the new integer costs are too large for int64 potentials
+        """
+        if isinstance(changes, dict):
+            cells = list(changes)
+            values = np.asarray(list(changes.values()))
+        elif self.sparse:
+            if not (np.array_equal(changes.indptr, self.costs.indptr) and np.array_equal(changes.indices, self.costs.indices)):
+                raise ValueError("the new costs must have the same lanes")
+            lanes = np.flatnonzero(changes.data != self.costs.data)
+            cells = list(zip(self.costs.rows[lanes].tolist(), self.costs.indices[lanes].tolist()))
+            values = changes.data[lanes]
+        else:
+            new_costs = np.asarray(changes)
+            rows, cols = np.nonzero(new_costs != self.costs)
+            cells = list(zip(rows.tolist(), cols.tolist()))
+            values = new_costs[rows, cols]
+        if not cells:
+            return
+
+        # Every change is checked before any is written
+        m, n = self.num_rows, self.num_cols
+        for i, j in cells:
+            if not (0 <= i < m and 0 <= j < n):
+                raise ValueError(f"cell ({i}, {j}) is outside the {m}x{n} costs")
+        if self.sparse:
+            positions = np.array([self.costs.position(i, j) for i, j in cells], dtype=np.int64)
+            if (positions < 0).any():
+                i, j = cells[int(np.flatnonzero(positions < 0)[0])]
+                raise ValueError(f"lane ({i}, {j}) does not exist")
+
+        # Go to floats if the new costs need it
+        current = self.costs.data if self.sparse else self.costs
+        dtype = potential_dtype(values, self.num_rows + self.num_cols)
+        if dtype is np.int64 and not np.issubdtype(current.dtype, np.integer):
+            dtype = np.float64
+
+        if self.sparse:
+            # The artificial basic cells cost big M, it follows the largest cost. The
+            # new lane costs are a copy until big M is known to fit in int64
+            data = current.astype(dtype)
+            old = data[positions].tolist()
+            data[positions] = values
+            artificial_cost = self._artificial_cost(data, dtype)
+            self.costs = SparseCosts(self.costs.indptr, self.costs.indices, data, self.costs.shape)
+        else:
+            # Never write on the caller's matrix
+            if not self._own_costs or current.dtype != dtype:
+                self.costs = self.costs.astype(dtype)
+            rows = np.array([i for i, _ in cells], dtype=np.intp)
+            cols = np.array([j for _, j in cells], dtype=np.intp)
+            old = self.costs[rows, cols].tolist()
+            self.costs[rows, cols] = values
+        self._own_costs = True
+        if self.potential.dtype != dtype:
+            self.potential = self.potential.astype(np.float64)
+            self.tolerance = 1e-9
+
+        basic = [(i, j, value - before) for (i, j), value, before in zip(cells, values.tolist(), old) if (i, j) in self.flow]
+        if self.sparse and artificial_cost != self.artificial_cost:
+            basic += [(i, j, artificial_cost - self.artificial_cost) for i, j, _ in self.artificial_cells()]
+            self.artificial_cost = artificial_cost
+
+        # Many changed basic cells: computing every potential again is cheaper
+        if len(basic) > UPDATE_SUBTREES:
+            self._build_tree()
+            return
+
+        # u[i] + v[j] = c[i][j] must hold again on a basic cell: shift the side
+        # of the tree below it (the side of row i gains, the other one loses)
+        m = self.num_rows
+        for i, j, delta in basic:
+            subtree = self._cut((i, j))
+            rows = [node for node in subtree if node < m]
+            cols = [node for node in subtree if node >= m]
+            sign = 1 if self.parent[i] == m + j else -1
+            self.potential[rows] += sign * delta
+            self.potential[cols] -= sign * delta
+
+    def _price_cut(self, rows: np.ndarray, cols: np.ndarray) -> Tuple[Optional[Tuple[int, int]], float]:
+        """Smallest reduced cost among the cells (i, j) with rows[i] and cols[j] True"""
+        best, best_cell = None, None
+        u, v = self.u_values, self.v_values
+        if self.sparse:
+            lanes = np.flatnonzero(rows[self.costs.rows] & cols[self.costs.indices])
+            for start in range(0, lanes.size, BLOCK_CELLS):
+                block_lanes = lanes[start:start + BLOCK_CELLS]
+                i, j = self.costs.rows[block_lanes], self.costs.indices[block_lanes]
+                block = self.costs.data[block_lanes] - u[i] - v[j]
+                k = int(block.argmin())
+                if best is None or block[k] < best:
+                    best, best_cell = block[k].item(), (int(i[k]), int(j[k]))
+            return best_cell, best
+
+        row_idx, col_idx = np.flatnonzero(rows), np.flatnonzero(cols)
+        if row_idx.size == 0 or col_idx.size == 0:
+            return None, None
+        step = max(1, BLOCK_CELLS // col_idx.size)
+        for start in range(0, row_idx.size, step):
+            block_rows = row_idx[start:start + step]
+            block = self.costs[np.ix_(block_rows, col_idx)] - u[block_rows, None] - v[None, col_idx]
+            k = int(block.argmin())
+            if best is None or block.flat[k] < best:
+                best = block.flat[k].item()
+                best_cell = (int(block_rows[k // col_idx.size]), int(col_idx[k % col_idx.size]))
+        return best_cell, best
+
+    def repair(self, max_iterations: Optional[int] = None) -> bool:
+        """
+        Dual simplex: while a basic cell is negative, take it out of the basis and
+        bring in the cheapest cell (smallest reduced cost) that closes a loop where
+        it gains. The reduced costs stay non negative, so an optimal basis with
+        changed supply / demand is optimal again once every flow is non negative.
+        False if max_iterations is reached first.
+        Raises:
+            ValueError: if no cell can fix a negative one (the new problem is infeasible)
+        """
+        m = self.num_rows
+        done = 0
+        while max_iterations is None or done < max_iterations:
+            leaving_cell, value = min(self.flow.items(), key=lambda item: item[1])
+            if value >= -self.tolerance:
+                return True
+
+            # The entering cell crosses the cut the other way: its row on the side
+            # of the column of the leaving cell and its column on the side of the row
+            subtree = self._cut(leaving_cell)
+            in_subtree = np.zeros(m + self.num_cols, dtype=bool)
+            in_subtree[subtree] = True
+            col_side, row_side = in_subtree[m + leaving_cell[1]], in_subtree[leaving_cell[0]]
+            cell, delta = self._price_cut(in_subtree[:m] == col_side, in_subtree[m:] == row_side)
+            if cell is None:
+                raise ValueError("no feasible solution for the new supply and demand")
+
+            cycle, _ = self._cycle(*cell)
+            self._exchange(cell, delta, cycle, cycle.index(leaving_cell), -value, subtree)
+            self.iterations += 1
+            done += 1
+        return False
+
+    def resolve(self, supply_delta=None, demand_delta=None, max_iterations: Optional[int] = None) -> bool:
+        """
+        Warm start after a change of supply / demand (see change_supply_demand): the
+        current basis is made optimal if it is not yet, the flows are moved along the
+        tree, repair() makes them non negative and a last primal pass confirms it.
+        Small changes take a few pivots instead of a new initial solution.
+        """
+        if not self.solve(max_iterations):
+            return False
+        self.change_supply_demand(supply_delta, demand_delta)
+        if not self.repair(max_iterations):
+            return False
+        return self.solve(max_iterations)
+
+    def artificial_cells(self) -> Iterator[Tuple[int, int, float]]:
+        """Basic cells on missing lanes (only with sparse costs)"""
+        if self.sparse:
+            for (i, j), value in self.flow.items():
+                if (i, j) not in self.costs:
+                    yield i, j, value
+
+    def cells(self) -> List[Tuple[int, int, float]]:
+        """Allocated cells as (row, column, amount), without building the full table"""
+        return sorted((i, j, value) for (i, j), value in self.flow.items() if value != 0)
+
+    def allocation(self) -> List[List[float]]:
+        allocation = [[0] * self.num_cols for _ in range(self.num_rows)]
+        for (i, j), value in self.flow.items():
+            allocation[i][j] = value
+        return allocation
+
+    def total_cost(self) -> float:
+        return sum(self._cost(i, j) * value for (i, j), value in self.flow.items())
@@ -0,0 +1,70 @@
+"""
+Exact integer mode of the numpy solvers: integer costs are priced with int64
+potentials, so there is no rounding and no tolerance, and float64 is only used
+for fractional costs. Python ints that do not fit in int64, or problems whose
+potentials could outgrow it, raise OverflowError instead of silently wrapping
+around or falling back to floats.
+"""
+from typing import Type
+import numpy as np
+
+INT64_MAX = int(np.iinfo(np.int64).max)
+# A potential is a sum of up to m + n costs, reduced costs and distances add a
+# few of them together
+POTENTIAL_MARGIN = 8
+
+
+def check_int64(largest_cost: int, nodes: int, total_amount: int = 0) -> None:
+    """
+    Raises:
+        OverflowError: if potentials over `nodes` rows and columns with costs up
+                       to `largest_cost`, or the total amount, may not fit in int64
+    """
+    if int(largest_cost) * max(nodes, 1) * POTENTIAL_MARGIN > INT64_MAX:
+        raise OverflowError(
+            f"costs up to {largest_cost} over {nodes} rows and columns can overflow int64 potentials"
+        )
+    if int(total_amount) > INT64_MAX:
+        raise OverflowError(f"total amount {total_amount} does not fit in int64")
+
+
+def potential_dtype(values: np.ndarray, nodes: int, total_amount: int = 0) -> Type[np.number]:
+    """
+    np.int64 for integer costs (after check_int64), np.float64 for any other cost.
+    numpy keeps ints too large for int64 as objects, those raise OverflowError.
+    """
+    if values.dtype == object:
+        if all(isinstance(value, (int, np.integer)) for value in values.flat):
+            raise OverflowError("integer costs do not fit in int64")
+        return np.float64
+    if not np.issubdtype(values.dtype, np.integer):
+        return np.float64
+    # max / min instead of abs().max(), a memory mapped matrix is not copied
+    largest = max(abs(int(values.max())), abs(int(values.min()))) if values.size else 0
+    check_int64(largest, nodes, total_amount)
+    return np.int64
+
+
+def amount_dtype(supply, demand) -> Type[np.number]:
+    """
+    dtype of an allocation table: np.int64 when every supply and demand is an
+    integer (OverflowError if their total does not fit), np.float64 otherwise.
+    """
+    values = list(supply) + list(demand)
+    if all(isinstance(value, (int, np.integer)) for value in values):
+        check_int64(0, 0, max(sum(supply), sum(demand), 0))
+        return np.int64
+    return np.float64
+
+
+def total_cost(allocation: np.ndarray, costs):
+    """
+    sum(allocation * costs). An integer total that may not fit in int64 is
+    summed with Python ints instead of wrapping around.
+    """
+    costs = np.asarray(costs)
+    if np.issubdtype(allocation.dtype, np.integer) and np.issubdtype(costs.dtype, np.integer):
+        largest = int(np.abs(costs).max()) if costs.size else 0
+        if largest * int(allocation.sum()) > INT64_MAX:
+            return int(np.sum(allocation.astype(object) * costs.astype(object)))
+    return np.sum(allocation * costs)
@@ -0,0 +1,204 @@
+"""
+More initial methods, on top of NWCM (northwest corner), costominimo (least cost)
+and mav (Vogel):
+
+- russell: Russell's approximation
+- column_minimum: the cheapest cell of every column, column after column
+- vogel_least_cost: Vogel, ties of the largest penalty go to the cheapest cell
+
+Every kernel takes a balanced problem (any 2D array like costs, never copied as
+a whole, so memory mapped matrices and balancing.DummyCosts work too) and returns
+the (row, column, amount) cells. The classes give the same outputs as
+NWCM.get_ToOptimize() and MAV.get_matrix_parsed(), ready for DIMO:
+
+    allocations, costs, num_allocations = Russell(costs, supply, demand).get_ToOptimize()
+"""
+from typing import TYPE_CHECKING, List, Tuple
+
+from mav.init import BLOCK_CELLS, vogel_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def russell(costs, supply: List, demand: List) -> List[Tuple[int, int, float]]:
+    """
+    Russell's approximation: with u[i] the largest cost of row i and v[j] the
+    largest of column j (over the enabled lines), allocate as much as possible to
+    the cell with the most negative c[i][j] - u[i] - v[j]; ties take the lowest
+    row, then the lowest column. `supply` and `demand` are not modified.
+
+    Every row keeps its smallest c[i][j] - v[j] and where it is, only the rows
+    that lose that column or whose largest cost was in a disabled column are read
+    again, like vogel_numpy does with the penalties.
+    """
+    import numpy as np
+
+    from balancing import as_matrix
+
+    C = as_matrix(costs)
+    origin, destination = C.shape
+    supply = list(supply)
+    demand = list(demand)
+
+    row_active = np.array([s > 0 for s in supply], dtype=bool)
+    col_active = np.array([d > 0 for d in demand], dtype=bool)
+    u = np.full(origin, -np.inf)
+    u_idx = np.zeros(origin, dtype=np.intp)
+    v = np.full(destination, -np.inf)
+    v_idx = np.zeros(destination, dtype=np.intp)
+    # Smallest c[i][j] - v[j] of every row over the enabled columns
+    best = np.full(origin, np.inf)
+    best_idx = np.zeros(origin, dtype=np.intp)
+
+    # The rows need every v, so the blocks are read twice: v first, then u and best
+    step = max(1, BLOCK_CELLS // max(destination, 1))
+    for start in range(0, origin, step):
+        stop = min(origin, start + step)
+        block = np.where(col_active[None, :] & row_active[start:stop, None], C[start:stop], -np.inf)
+        # Previous blocks win the ties, they have the lower rows
+        lines = block.argmax(axis=0)
+        top = block[lines, np.arange(destination)]
+        higher = top > v
+        v_idx[higher] = lines[higher] + start
+        v[higher] = top[higher]
+
+    def refresh_rows(rows: "np.ndarray") -> None:
+        if rows.size == 0:
+            return
+        block = C[rows]
+        largest = np.where(col_active[None, :], block, -np.inf)
+        u_idx[rows] = largest.argmax(axis=1)
+        u[rows] = largest.max(axis=1)
+        reduced = np.where(col_active[None, :], block - v, np.inf)
+        best_idx[rows] = reduced.argmin(axis=1)
+        best[rows] = reduced.min(axis=1)
+
+    def refresh_columns(cols: "np.ndarray") -> None:
+        if cols.size == 0:
+            return
+        block = np.where(row_active[:, None], C[:, cols], -np.inf)
+        v_idx[cols] = block.argmax(axis=0)
+        v[cols] = block.max(axis=0)
+
+    for start in range(0, origin, step):
+        refresh_rows(np.flatnonzero(row_active[start:start + step]) + start)
+
+    cells = []
+    while row_active.any() and col_active.any():
+        i = int(np.where(row_active, best - u, np.inf).argmin())
+        j = int(best_idx[i])
+        amount = min(supply[i], demand[j])
+        cells.append((i, j, amount))
+        supply[i] -= amount
+        demand[j] -= amount
+
+        row_done = supply[i] == 0
+        col_done = demand[j] == 0
+        row_active[i] = not row_done
+        col_active[j] = not col_done
+
+        # Lower v only makes c[i][j] - v[j] larger, the rows whose smallest one
+        # was in a changed (or disabled) column are the only ones to read again
+        changed = np.flatnonzero(col_active & (v_idx == i)) if row_done else np.empty(0, dtype=np.intp)
+        refresh_columns(changed)
+        stale = np.isin(best_idx, changed)
+        if col_done:
+            stale |= (best_idx == j) | (u_idx == j)
+        refresh_rows(np.flatnonzero(row_active & stale))
+
+    return cells
+
+
+def column_minimum(costs, supply: List, demand: List) -> List[Tuple[int, int, float]]:
+    """
+    Column minimum method: column by column, the demand goes to the cheapest
+    enabled rows (lowest row on ties). `supply` and `demand` are not modified.
+    The columns are read by blocks of BLOCK_CELLS.
+    """
+    import numpy as np
+
+    from balancing import as_matrix
+
+    C = as_matrix(costs)
+    origin, destination = C.shape
+    supply = list(supply)
+    demand = list(demand)
+    row_active = np.array([s > 0 for s in supply], dtype=bool)
+
+    cells = []
+    step = max(1, BLOCK_CELLS // max(origin, 1))
+    for start in range(0, destination, step):
+        block = np.asarray(C[:, start:start + step])
+        for k in range(block.shape[1]):
+            j = start + k
+            if demand[j] <= 0:
+                continue
+            for i in np.argsort(np.where(row_active, block[:, k], np.inf), kind="stable").tolist():
+                if not row_active[i]:
+                    break
+                amount = min(supply[i], demand[j])
+                cells.append((i, j, amount))
+                supply[i] -= amount
+                demand[j] -= amount
+                if supply[i] == 0:
+                    row_active[i] = False
+                if demand[j] == 0:
+                    break
+    return cells
+
+
+def vogel_least_cost(costs, supply: List, demand: List) -> List[Tuple[int, int, float]]:
+    """Vogel's approximation where the lines tied at the largest penalty give way to
+    the one with the cheapest cell (vogel_numpy with ties="least_cost")"""
+    return vogel_numpy(costs, supply, demand, ties="least_cost")[0]
+
+
+METHODS = {
+    "russell": russell,
+    "column_minimum": column_minimum,
+    "vogel_least_cost": vogel_least_cost,
+}
+
+
+class InitialSolution:
+    """
+    Initial solution of one of METHODS with the outputs of NWCM and MAV.
+    cost_matrix, supply and demand are not modified, an unbalanced problem gets
+    a virtual dummy line (balancing.DummyCosts).
+    """
+
+    method = None
+
+    def __init__(self, cost_matrix, supply, demand):
+        from balancing import balance_problem
+
+        self.cost_matrix, self.supply, self.demand = balance_problem(cost_matrix, supply, demand)
+        self.cells = type(self).method(self.cost_matrix, self.supply, self.demand)
+        self.allocation = [[0] * len(self.demand) for _ in self.supply]
+        for i, j, amount in self.cells:
+            self.allocation[i][j] = amount
+        self.total_cost = sum(self.cost_matrix[i][j] * amount for i, j, amount in self.cells)
+
+    def get_ToOptimize(self) -> Tuple[List[List[float]], List[List[float]], int]:
+        """Same as NWCM.get_ToOptimize: (allocations, cost matrix, allocated cells)"""
+        num_allocations = sum(element != 0 for row in self.allocation for element in row)
+        return self.allocation, self.cost_matrix, num_allocations
+
+    def get_matrix_parsed(self) -> Tuple[List[List[float]], List[List[float]], int]:
+        """Same as MAV.get_matrix_parsed: the costs come as lists of lists"""
+        allocations, costs, num_allocations = self.get_ToOptimize()
+        costs = costs.tolist() if hasattr(costs, "tolist") else [list(row) for row in costs]
+        return allocations, costs, num_allocations
+
+
+class Russell(InitialSolution):
+    method = staticmethod(russell)
+
+
+class ColumnMinimum(InitialSolution):
+    method = staticmethod(column_minimum)
+
+
+class VogelLeastCost(InitialSolution):
+    method = staticmethod(vogel_least_cost)
@@ -0,0 +1,284 @@
+"""
+Problems read from disk.
+
+Cost matrices larger than the RAM, with numpy.memmap:
+
+    costs, supply, demand = load_problem("costs.npy", "supply.npy", "demand.npy")
+    costs, supply, demand = load_problem("costs.bin", "supply.bin", "demand.bin",
+                                         dtype="int32", shape=(20000, 30000))
+
+.npy files carry their dtype and shape. Raw binary files are plain C order arrays,
+they need the dtype (and the shape of the costs, or the number of rows). Nothing
+is read until a solver touches it, and the solvers that accept a memmap (see
+metodosoptimos.init) read it by blocks, so only their working state is in RAM.
+
+Long format tables (one lane per line) from CSV or Parquet, streamed by chunks:
+
+    problem = read_long("costs.csv", "supply.csv", "demand.csv")
+    NWCM(problem.costs, problem.supply, problem.demand)
+
+costs.csv has the columns origin,destination,cost, supply.csv origin,supply and
+demand.csv destination,demand. Rows and columns follow the order of the supply
+and demand files. Parquet files are read with pyarrow, which also parses CSV
+faster when it is installed; without it CSV goes through the csv module.
+"""
+import csv
+import os
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from sparse import SparseCosts
+
+# Bytes of CSV (or rows of Parquet) parsed at once
+CHUNK_SIZE = 1 << 20
+COST_COLUMNS = ("origin", "destination", "cost")
+SUPPLY_COLUMNS = ("origin", "supply")
+DEMAND_COLUMNS = ("destination", "demand")
+
+
+def open_array(path: str, dtype=None, shape: Optional[Tuple[int, ...]] = None, offset: int = 0) -> np.memmap:
+    """
+    Read only memmap of a .npy file or of a raw binary file.
+
+    Args:
+        path: .npy file, any other extension is read as raw binary
+        dtype: Type of the raw values; for .npy it is only checked
+        shape: Shape of the raw array, a vector of all the file by default; for .npy
+               it is only checked. -1 takes the rest of the file, like reshape
+        offset: Bytes to skip at the start of a raw file
+    Raises:
+        ValueError: if the file does not match the dtype / shape given
+    """
+    if path.endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        if dtype is not None and array.dtype != np.dtype(dtype):
+            raise ValueError(f"{path} holds {array.dtype}, not {np.dtype(dtype)}")
+        if shape is not None and not _fits(array.shape, shape):
+            raise ValueError(f"{path} has shape {array.shape}, not {tuple(shape)}")
+        return array
+
+    if dtype is None:
+        raise ValueError(f"the dtype of the raw file {path} is needed")
+    dtype = np.dtype(dtype)
+    values, rest = divmod(os.path.getsize(path) - offset, dtype.itemsize)
+    if rest:
+        raise ValueError(f"{path} is not a whole number of {dtype} values")
+    shape = tuple(shape) if shape is not None else (values,)
+    if -1 in shape:
+        known = int(np.prod([size for size in shape if size != -1]))
+        shape = tuple(values // known if size == -1 else size for size in shape)
+    if int(np.prod(shape)) != values:
+        raise ValueError(f"{path} holds {values} {dtype} values, not {shape}")
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+def _fits(actual: Tuple[int, ...], expected: Tuple[int, ...]) -> bool:
+    return len(actual) == len(expected) and all(e in (-1, a) for a, e in zip(actual, expected))
+
+
+def load_problem(
+    costs_path: str,
+    supply_path: str,
+    demand_path: str,
+    dtype=None,
+    shape: Optional[Tuple[int, int]] = None,
+    amount_dtype=None,
+) -> Tuple[np.memmap, np.memmap, np.memmap]:
+    """
+    (costs, supply, demand) as memmaps, checked against each other.
+
+    Args:
+        dtype: Type of the raw costs
+        shape: (rows, columns) of the raw costs, (rows, -1) is enough
+        amount_dtype: Type of raw supply and demand, dtype by default
+    Raises:
+        ValueError: if the files do not describe one problem
+    """
+    costs = open_array(costs_path, dtype, shape or ((-1, -1) if costs_path.endswith(".npy") else None))
+    if costs.ndim != 2:
+        raise ValueError(f"{costs_path} must be a matrix, give the shape of raw files")
+    rows, cols = costs.shape
+    amount_dtype = amount_dtype or dtype
+    supply = open_array(supply_path, amount_dtype, (rows,))
+    demand = open_array(demand_path, amount_dtype, (cols,))
+    return costs, supply, demand
+
+
+
+class LongProblem(NamedTuple):
+    """
+    Problem read by read_long. costs is a list of lists when every lane exists
+    (ready for NWCM, MAV, metodo_costo_minimo_gui or DIMO) and a
+    sparse.SparseCosts otherwise. origins / destinations are the labels of the
+    rows / columns.
+    """
+    costs: Union[List[List[float]], SparseCosts]
+    supply: List[float]
+    demand: List[float]
+    origins: List[str]
+    destinations: List[str]
+
+
+def read_long(
+    costs_path: str,
+    supply_path: str,
+    demand_path: str,
+    dense: Optional[bool] = None,
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+) -> LongProblem:
+    """
+    Read a problem from long format CSV or Parquet files, chunk by chunk: only the
+    lanes read so far are kept, as numpy arrays, never the lines of the file.
+
+    Args:
+        dense: True for a full matrix (every lane must exist), False for a
+               SparseCosts, None to pick dense when every lane exists
+        chunk_size: Bytes of CSV or rows of Parquet parsed at once
+        progress: Called after every chunk with (path, done, total), in bytes
+                  for CSV and rows for Parquet
+    Raises:
+        ValueError: on missing columns, unknown or repeated labels and lanes,
+                    or missing lanes of a dense problem
+        ImportError: for Parquet files without pyarrow
+    """
+    origins, supply = _read_amounts(supply_path, SUPPLY_COLUMNS, chunk_size, progress)
+    destinations, demand = _read_amounts(demand_path, DEMAND_COLUMNS, chunk_size, progress)
+    row_of = _index(origins, supply_path)
+    col_of = _index(destinations, demand_path)
+
+    rows, cols, costs = [], [], []
+    for origin, destination, cost in _read_chunks(costs_path, COST_COLUMNS, chunk_size, progress):
+        rows.append(_lookup(row_of, origin, costs_path, "origin"))
+        cols.append(_lookup(col_of, destination, costs_path, "destination"))
+        costs.append(_numbers(cost))
+    shape = (len(origins), len(destinations))
+    try:
+        lanes = SparseCosts.from_arcs(
+            np.concatenate(rows) if rows else [], np.concatenate(cols) if cols else [],
+            np.concatenate(costs) if costs else [], shape,
+        )
+    except ValueError as e:
+        raise ValueError(f"{costs_path}: {e}") from None
+
+    complete = lanes.nnz == shape[0] * shape[1]
+    if dense and not complete:
+        raise ValueError(f"{costs_path} has {lanes.nnz} of the {shape[0] * shape[1]} lanes of a dense problem")
+    if dense is False or not complete:
+        return LongProblem(lanes, supply, demand, origins, destinations)
+    # Lanes are sorted by row and column, so the data is the matrix in C order
+    matrix = lanes.data.reshape(shape).tolist()
+    return LongProblem(matrix, supply, demand, origins, destinations)
+
+
+def _read_amounts(path: str, columns: Sequence[str], chunk_size: int, progress) -> Tuple[List[str], List[float]]:
+    labels, amounts = [], []
+    for label, amount in _read_chunks(path, columns, chunk_size, progress):
+        labels.extend(label.tolist())
+        amounts.extend(_numbers(amount).tolist())
+    return labels, amounts
+
+
+def _index(labels: List[str], path: str) -> Dict[str, int]:
+    index = {label: k for k, label in enumerate(labels)}
+    if len(index) != len(labels):
+        raise ValueError(f"{path} has repeated labels")
+    return index
+
+
+def _lookup(index: Dict[str, int], labels: np.ndarray, path: str, column: str) -> np.ndarray:
+    try:
+        return np.fromiter((index[label] for label in labels.tolist()), dtype=np.int64, count=labels.size)
+    except KeyError as e:
+        raise ValueError(f"{path}: {column} {e.args[0]!r} is not in the supply / demand files") from None
+
+
+def _numbers(values: np.ndarray) -> np.ndarray:
+    """int64 when every value is a whole number (exact, see exactint), float64 otherwise"""
+    if values.dtype.kind in "iuf":
+        return values
+    try:
+        return values.astype(np.int64)
+    except ValueError:
+        return values.astype(np.float64)
+
+
+def _read_chunks(path: str, columns: Sequence[str], chunk_size: int, progress) -> Iterator[List[np.ndarray]]:
+    """
+    One list of arrays (labels as str, numbers as parsed) per chunk of the file,
+    in the order of `columns`. Chunks without records (only blank lines) are
+    skipped, their empty arrays would have no dtype to keep
+    """
+    if path.endswith(".parquet"):
+        chunks = _parquet_chunks(path, columns, chunk_size)
+    else:
+        try:
+            import pyarrow.csv  # noqa: F401
+        except ImportError:
+            chunks = _csv_chunks(path, columns, chunk_size)
+        else:
+            chunks = _arrow_csv_chunks(path, columns, chunk_size)
+    for arrays, done, total in chunks:
+        if progress is not None:
+            progress(path, done, total)
+        if arrays[0].size:
+            yield arrays
+
+
+def _header(path: str, header: Sequence[str], columns: Sequence[str]) -> List[int]:
+    header = [name.strip() for name in header]
+    missing = [name for name in columns if name not in header]
+    if missing:
+        raise ValueError(f"{path} has no column {', '.join(missing)} (columns: {', '.join(header)})")
+    return [header.index(name) for name in columns]
+
+
+def _csv_chunks(path: str, columns: Sequence[str], chunk_size: int):
+    total = os.path.getsize(path)
+    # Binary mode, so the position in the file is known after every chunk
+    with open(path, "rb") as stream:
+        positions = _header(path, next(csv.reader([stream.readline().decode("utf-8-sig")])), columns)
+        while True:
+            lines = stream.readlines(chunk_size)
+            if not lines:
+                break
+            records = [record for record in csv.reader(b"".join(lines).decode("utf-8").splitlines()) if record]
+            arrays = [np.array([record[k].strip() for record in records]) for k in positions]
+            yield arrays, stream.tell(), total
+
+
+def _arrow_columns(path: str, batch, columns: Sequence[str]) -> List[np.ndarray]:
+    positions = _header(path, batch.schema.names, columns)
+    arrays = []
+    for k, name in zip(positions, columns):
+        values = batch.column(k).to_numpy(zero_copy_only=False)
+        # Labels are compared as text, whatever type pyarrow inferred for them
+        arrays.append(values.astype(str) if name in ("origin", "destination") else values)
+    return arrays
+
+
+def _arrow_csv_chunks(path: str, columns: Sequence[str], chunk_size: int):
+    import pyarrow as pa
+    import pyarrow.csv
+
+    total = os.path.getsize(path)
+    with open(path, "rb") as stream:
+        # Labels stay text, "01" is not the origin "1"
+        convert = pyarrow.csv.ConvertOptions(column_types={"origin": pa.string(), "destination": pa.string()})
+        reader = pyarrow.csv.open_csv(stream, read_options=pyarrow.csv.ReadOptions(block_size=chunk_size),
+                                      convert_options=convert)
+        for batch in reader:
+            yield _arrow_columns(path, batch, columns), stream.tell(), total
+
+
+def _parquet_chunks(path: str, columns: Sequence[str], chunk_size: int):
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(f"reading {path} needs pyarrow, install it with pip install pyarrow") from None
+
+    file = pyarrow.parquet.ParquetFile(path)
+    total, done = file.metadata.num_rows, 0
+    for batch in file.iter_batches(batch_size=chunk_size):
+        done += batch.num_rows
+        yield _arrow_columns(path, batch, columns), done, total
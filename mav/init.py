@@ -1,5 +1,309 @@
-from typing import List, Tuple
-import numpy as np
+from itertools import repeat
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from tracelog import TraceLog
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Rows (or columns) of the cost matrix read per block when the two smallest
+# costs of every line are computed at start up.
+BLOCK_CELLS = 1 << 22
+
+def _two_smallest(block: "np.ndarray", axis: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Helper Method
+    Return (first_index, first_value, second_index, second_value) along `axis` of
+    a block where the disabled cells are already set to infinity. Ties keep the
+    first index, exactly like `min()` over the python lists.
+    """
+    import numpy as np
+
+    block = np.moveaxis(block, axis, 0)
+    lines = np.arange(block.shape[1])
+    idx1 = block.argmin(axis=0)
+    val1 = block[idx1, lines]
+    block[idx1, lines] = np.inf
+    idx2 = block.argmin(axis=0)
+    val2 = block[idx2, lines]
+    return idx1, val1, idx2, val2
+
+def vogel_numpy(costs, offer: List, demand: List, ties: str = "index") -> Tuple[List[Tuple[int, int, int]], List[int], List[int]]:
+    """Array backed Vogel approximation.
+
+    Instead of recomputing every penalty after each allocation, it keeps boolean masks
+    of the enabled rows and columns and the two smallest costs (and where they are)
+    of every line. When a row or column is disabled only the lines whose smallest
+    or second smallest cost was in it are recomputed.
+
+    `costs` can be any 2D array like (lists, ndarray, memmap, balancing.DummyCosts),
+    it is never copied as a whole. `offer` and `demand` are not modified.
+
+    `ties` picks the line when several have the largest penalty: "index" the first
+    one (rows before columns) like MAV, "least_cost" the one with the cheapest
+    cell, the Vogel + least cost hybrid of initial.vogel_least_cost.
+
+    Returns (allocations, rowsIgnored, columnsIgnored) where allocations is the list
+    of (row, column, amount) in the same order the python method makes them.
+    """
+    import numpy as np
+
+    from balancing import as_matrix
+
+    if ties not in ("index", "least_cost"):
+        raise ValueError(f"Unknown tie rule {ties!r}, expected 'index' or 'least_cost'")
+    C = as_matrix(costs)
+    origin, destination = C.shape
+    offer = list(offer)
+    demand = list(demand)
+
+    row_active = np.array([s > 0 for s in offer], dtype=bool)
+    col_active = np.array([d > 0 for d in demand], dtype=bool)
+    active_rows = int(row_active.sum())
+    active_cols = int(col_active.sum())
+
+    # Two smallest costs of every row over the enabled columns
+    r1_idx = np.zeros(origin, dtype=np.intp)
+    r2_idx = np.zeros(origin, dtype=np.intp)
+    r1_val = np.full(origin, np.inf)
+    r2_val = np.full(origin, np.inf)
+    # Two smallest costs of every column over the enabled rows
+    c1_idx = np.zeros(destination, dtype=np.intp)
+    c2_idx = np.zeros(destination, dtype=np.intp)
+    c1_val = np.full(destination, np.inf)
+    c2_val = np.full(destination, np.inf)
+
+    step = max(1, BLOCK_CELLS // max(destination, 1))
+    for start in range(0, origin, step):
+        stop = min(origin, start + step)
+        block = np.where(col_active[None, :] & row_active[start:stop, None], C[start:stop], np.inf)
+        r1_idx[start:stop], r1_val[start:stop], r2_idx[start:stop], r2_val[start:stop] = _two_smallest(block.copy(), 1)
+
+        # Merge the block minimums with the ones of the previous blocks, the
+        # previous rows win the ties because they have lower indices.
+        b1_idx, b1_val, b2_idx, b2_val = _two_smallest(block, 0)
+        b1_idx += start
+        b2_idx += start
+        keep = c1_val <= b1_val
+        new2_val = np.where(keep, np.minimum(c2_val, b1_val), np.minimum(c1_val, b2_val))
+        new2_idx = np.where(keep, np.where(c2_val <= b1_val, c2_idx, b1_idx), np.where(c1_val <= b2_val, c1_idx, b2_idx))
+        c1_idx = np.where(keep, c1_idx, b1_idx)
+        c1_val = np.where(keep, c1_val, b1_val)
+        c2_idx, c2_val = new2_idx, new2_val
+
+    def refresh_rows(rows: "np.ndarray") -> None:
+        if rows.size == 0:
+            return
+        block = np.where(col_active[None, :], C[rows], np.inf)
+        r1_idx[rows], r1_val[rows], r2_idx[rows], r2_val[rows] = _two_smallest(block, 1)
+
+    def refresh_columns(cols: "np.ndarray") -> None:
+        if cols.size == 0:
+            return
+        block = np.where(row_active[:, None], C[:, cols], np.inf)
+        c1_idx[cols], c1_val[cols], c2_idx[cols], c2_val[cols] = _two_smallest(block, 0)
+
+    allocations = []
+    rowsIgnored = []
+    columnsIgnored = []
+    remaining_offer = sum(offer)
+    remaining_demand = sum(demand)
+
+    while remaining_offer > 0 and remaining_demand > 0:
+        # A penalty needs at least two enabled costs in the line, -1 otherwise
+        if active_cols >= 2:
+            penaltiesRow = np.subtract(r2_val, r1_val, out=np.full(origin, -1.0), where=row_active)
+        else:
+            penaltiesRow = np.full(origin, -1.0)
+        if active_rows >= 2:
+            penaltiesColumn = np.subtract(c2_val, c1_val, out=np.full(destination, -1.0), where=col_active)
+        else:
+            penaltiesColumn = np.full(destination, -1.0)
+
+        row_index = int(penaltiesRow.argmax())
+        col_index = int(penaltiesColumn.argmax())
+        max_row_penalty = penaltiesRow[row_index]
+        max_col_penalty = penaltiesColumn[col_index]
+
+        if max_row_penalty == -1 and max_col_penalty == -1:
+            # Same as MAV.find_last_allocation
+            remaining_row = next((i for i in range(origin) if offer[i] > 0), None)
+            remaining_col = next((j for j in range(destination) if demand[j] > 0), None)
+            if remaining_row is not None and remaining_col is not None:
+                allocation = min(offer[remaining_row], demand[remaining_col])
+                allocations.append((remaining_row, remaining_col, allocation))
+                offer[remaining_row] -= allocation
+                demand[remaining_col] -= allocation
+            break
+
+        if ties == "least_cost":
+            # The cheapest cell of the lines tied at the largest penalty, rows first
+            penalty = max(max_row_penalty, max_col_penalty)
+            tied_rows = np.flatnonzero(penaltiesRow == penalty)
+            tied_cols = np.flatnonzero(penaltiesColumn == penalty)
+            k = int(np.concatenate((r1_val[tied_rows], c1_val[tied_cols])).argmin())
+            if k < tied_rows.size:
+                i = int(tied_rows[k])
+                j = int(r1_idx[i])
+            else:
+                j = int(tied_cols[k - tied_rows.size])
+                i = int(c1_idx[j])
+        elif max_row_penalty >= max_col_penalty:
+            i, j = row_index, int(r1_idx[row_index])
+        else:
+            i, j = int(c1_idx[col_index]), col_index
+
+        allocation = min(offer[i], demand[j])
+        allocations.append((i, j, allocation))
+        offer[i] -= allocation
+        demand[j] -= allocation
+        remaining_offer -= allocation
+        remaining_demand -= allocation
+
+        row_done = offer[i] == 0
+        col_done = demand[j] == 0
+        if row_done:
+            rowsIgnored.append(i)
+            row_active[i] = False
+            active_rows -= 1
+        if col_done:
+            columnsIgnored.append(j)
+            col_active[j] = False
+            active_cols -= 1
+
+        # Only the lines that lost their smallest or second smallest cost change
+        if col_done:
+            refresh_rows(np.flatnonzero(row_active & ((r1_idx == j) | (r2_idx == j))))
+        if row_done:
+            refresh_columns(np.flatnonzero(col_active & ((c1_idx == i) | (c2_idx == i))))
+
+    return allocations, rowsIgnored, columnsIgnored
+
+def vogel_sparse(costs, offer: List, demand: List) -> Tuple[List[Tuple[int, int, int]], List[int], List[int]]:
+    """Vogel approximation over a sparse problem (sparse.SparseCosts), only the existing
+    lanes are read so the work grows with the number of lanes and not rows * columns.
+
+    The lanes of every row (and column) are sorted by cost once and two pointers per
+    line walk over them to the two cheapest enabled lanes; lanes are only disabled,
+    so the pointers never go back. A line with a single enabled lane left is forced
+    to use it, so it gets an infinite penalty. A line with no lanes left gets -1.
+
+    What can not be sent over the existing lanes is placed with sparse.artificial_fill
+    on missing lanes, TransportSimplex takes them out of the solution when it can.
+
+    Same returns as vogel_numpy. `offer` and `demand` are not modified.
+    """
+    import numpy as np
+    from sparse import artificial_fill
+
+    origin, destination = costs.shape
+    offer = list(offer)
+    demand = list(demand)
+
+    # Lanes of every row sorted by (cost, column) and of every column by (cost, row)
+    row_order = np.lexsort((costs.indices, costs.data, costs.rows))
+    row_lane_cols = costs.indices[row_order].tolist()
+    row_lane_cost = costs.data[row_order].tolist()
+    row_end = costs.indptr[1:].tolist()
+    colptr, _ = costs.columns()
+    col_order = np.lexsort((costs.rows, costs.data, costs.indices))
+    col_lane_rows = costs.rows[col_order].tolist()
+    col_lane_cost = costs.data[col_order].tolist()
+    col_end = colptr[1:].tolist()
+
+    row_active = np.array([s > 0 for s in offer], dtype=bool)
+    col_active = np.array([d > 0 for d in demand], dtype=bool)
+    row_open = row_active.tolist()
+    col_open = col_active.tolist()
+
+    # Pointers to the cheapest and second cheapest enabled lane of every line
+    r1_pos, r2_pos = costs.indptr[:-1].tolist(), costs.indptr[:-1].tolist()
+    c1_pos, c2_pos = colptr[:-1].tolist(), colptr[:-1].tolist()
+    r1_idx = np.full(origin, -1, dtype=np.intp)
+    r2_idx = np.full(origin, -1, dtype=np.intp)
+    r1_val = np.full(origin, np.inf)
+    r2_val = np.full(origin, np.inf)
+    c1_idx = np.full(destination, -1, dtype=np.intp)
+    c2_idx = np.full(destination, -1, dtype=np.intp)
+    c1_val = np.full(destination, np.inf)
+    c2_val = np.full(destination, np.inf)
+
+    def refresh_row(i: int) -> None:
+        end = row_end[i]
+        k = r1_pos[i]
+        while k < end and not col_open[row_lane_cols[k]]:
+            k += 1
+        k2 = max(r2_pos[i], k + 1)
+        while k2 < end and not col_open[row_lane_cols[k2]]:
+            k2 += 1
+        r1_pos[i], r2_pos[i] = k, k2
+        r1_idx[i], r1_val[i] = (row_lane_cols[k], row_lane_cost[k]) if k < end else (-1, np.inf)
+        r2_idx[i], r2_val[i] = (row_lane_cols[k2], row_lane_cost[k2]) if k2 < end else (-1, np.inf)
+
+    def refresh_column(j: int) -> None:
+        end = col_end[j]
+        k = c1_pos[j]
+        while k < end and not row_open[col_lane_rows[k]]:
+            k += 1
+        k2 = max(c2_pos[j], k + 1)
+        while k2 < end and not row_open[col_lane_rows[k2]]:
+            k2 += 1
+        c1_pos[j], c2_pos[j] = k, k2
+        c1_idx[j], c1_val[j] = (col_lane_rows[k], col_lane_cost[k]) if k < end else (-1, np.inf)
+        c2_idx[j], c2_val[j] = (col_lane_rows[k2], col_lane_cost[k2]) if k2 < end else (-1, np.inf)
+
+    for i in np.flatnonzero(row_active).tolist():
+        refresh_row(i)
+    for j in np.flatnonzero(col_active).tolist():
+        refresh_column(j)
+
+    allocations = []
+    rowsIgnored = []
+    columnsIgnored = []
+
+    while True:
+        penaltiesRow = np.subtract(r2_val, r1_val, out=np.full(origin, -1.0), where=row_active & (r1_idx >= 0))
+        penaltiesColumn = np.subtract(c2_val, c1_val, out=np.full(destination, -1.0), where=col_active & (c1_idx >= 0))
+        row_index = int(penaltiesRow.argmax()) if origin else 0
+        col_index = int(penaltiesColumn.argmax()) if destination else 0
+        max_row_penalty = penaltiesRow[row_index] if origin else -1
+        max_col_penalty = penaltiesColumn[col_index] if destination else -1
+
+        # No enabled line has an enabled lane left
+        if max_row_penalty == -1 and max_col_penalty == -1:
+            break
+
+        if max_row_penalty >= max_col_penalty:
+            i, j = row_index, int(r1_idx[row_index])
+        else:
+            i, j = int(c1_idx[col_index]), col_index
+
+        allocation = min(offer[i], demand[j])
+        allocations.append((i, j, allocation))
+        offer[i] -= allocation
+        demand[j] -= allocation
+
+        row_done = offer[i] == 0
+        col_done = demand[j] == 0
+        if row_done:
+            rowsIgnored.append(i)
+            row_active[i] = row_open[i] = False
+        if col_done:
+            columnsIgnored.append(j)
+            col_active[j] = col_open[j] = False
+
+        # Only the lines that lost their cheapest or second cheapest lane change
+        if col_done:
+            for row in np.flatnonzero(row_active & ((r1_idx == j) | (r2_idx == j))).tolist():
+                refresh_row(row)
+        if row_done:
+            for col in np.flatnonzero(col_active & ((c1_idx == i) | (c2_idx == i))).tolist():
+                refresh_column(col)
+
+    rowsIgnored += [i for i in range(origin) if offer[i] > 0]
+    columnsIgnored += [j for j in range(destination) if demand[j] > 0]
+    allocations += artificial_fill(offer, demand)
+
+    return allocations, rowsIgnored, columnsIgnored
 
 class MAV:
     def __init__(
@@ -10,19 +314,51 @@ class MAV:
         offer: List,
         demand: List,
     ):
+        if len(offer) == origin and len(demand) == destination and sum(offer) != sum(demand):
+            # Unbalanced: a virtual dummy row or column takes the difference
+            from balancing import DummyCosts, slack
+
+            offer, demand = slack(offer, demand)
+            matrix = DummyCosts(matrix, len(offer) > origin)
+            origin, destination = len(offer), len(demand)
         self.origin = origin
         self.destination = destination
-        self.matrix = [[(0, matrix[i][j]) for j in range(self.destination)] for i in range(self.origin)]
+        # matrix and the penalties are built on first use (see __getattr__), the
+        # numpy engine reads the costs as they are
+        self.costs = matrix
+        self._cells: List[Tuple[int, int, int]] = []
         self.offer = offer
         self.demand = demand
-        self.penaltiesRow = [0] * self.origin
-        self.penaltiesColumn = [0] * self.destination
         self.columnsIgnored = []
         self.rowsIgnored = []
-        self.penaltiesRow, self.penaltiesColumn = self.calc_penalties()
-        self.resultString = ""
+        self.log = TraceLog()
         self.totalCost = 0.0
 
+    def __getattr__(self, name: str):
+        """
+        matrix, the (allocation, cost) of every cell, and penaltiesRow /
+        penaltiesColumn are computed the first time they are read, then they are
+        plain attributes
+        """
+        if name == "matrix":
+            self.matrix = [list(zip(repeat(0, self.destination), row)) for _, row in zip(range(self.origin), self.costs)]
+            for i, j, allocation in self._cells:
+                self.matrix[i][j] = (allocation, self.matrix[i][j][1])
+            return self.matrix
+        if name in ("penaltiesRow", "penaltiesColumn"):
+            self.penaltiesRow, self.penaltiesColumn = self.calc_penalties()
+            return getattr(self, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    @property
+    def resultString(self) -> str:
+        """Text of the run, see tracelog.TraceLog"""
+        return self.log.text()
+
+    @resultString.setter
+    def resultString(self, text: str) -> None:
+        self.log.reset(text)
+
     def calc_penalties(self) -> Tuple[List[int], List[int]]:
         penaltiesRow = [0] * self.origin
         penaltiesColumn = [0] * self.destination
@@ -84,17 +420,17 @@ class MAV:
     def calc_cost(self):
         # Calculate the total cost by multiplaying the allocation and the demand in the box
         cost = 0
-        formula=""
+        terms = []
         for row in self.matrix:
             for col in row:
                 if col[0] != 0:
                     cost += col[0]*col[1]
-                    formula += f"{col[0]}*{col[1]} + "
+                    if self.log.summary:
+                        terms.append(f"{col[0]}*{col[1]}")
 
-        formula = "\nCost: " + formula[:-3] + " = " + f"{cost}"
-        self.resultString += formula
         self.totalCost = cost
-        print(formula)
+        self.log.write("\nCost: " + " + ".join(terms) + " = " + f"{cost}", end="")
+        self.log.echo()
 
 
     def is_feasible(self) -> Tuple[bool, str]:
@@ -155,44 +491,33 @@ class MAV:
 
     def print_tableau(self):
         """Util Method"""
+        if not self.log.summary:
+            return
         col_width = 10 # Spaces in each column
         
-        header = "\nDestinations".center((self.destination * col_width) + 10)
-        self.resultString += header + "\n"
-        print(header)
+        self.log.write("\nDestinations".center((self.destination * col_width) + 10))
         
         # Print column headers
-        header_row = "Origin".ljust(col_width)
+        header_row = ["Origin".ljust(col_width)]
         for i in range(1, self.destination + 1):
-            header_row += str(i).ljust(col_width)
-        header_row += "Offer".ljust(col_width) + "Pen"
-        self.resultString += header_row + "\n"
-        print(header_row)
+            header_row.append(str(i).ljust(col_width))
+        header_row.append("Offer".ljust(col_width) + "Pen")
+        self.log.write("".join(header_row))
 
         # Print the table rows
         for i in range(self.origin):
-            row = str(i + 1).ljust(col_width)
+            row = [str(i + 1).ljust(col_width)]
             for j in range(self.destination):
-                cell = f"{self.matrix[i][j][0]}({self.matrix[i][j][1]})".ljust(col_width)
-                row += cell
-            row += str(self.offer[i]).ljust(col_width) + str(self.penaltiesRow[i])
-            self.resultString += row + "\n"
-            print(row)
+                row.append(f"{self.matrix[i][j][0]}({self.matrix[i][j][1]})".ljust(col_width))
+            row.append(str(self.offer[i]).ljust(col_width) + str(self.penaltiesRow[i]))
+            self.log.write("".join(row))
 
         # Print the demand
-        demand_row = "Demand".ljust(col_width)
-        for d in self.demand:
-            demand_row += str(d).ljust(col_width)
-        self.resultString += demand_row + "\n"
-        print(demand_row)
+        self.log.write("Demand".ljust(col_width) + "".join(str(d).ljust(col_width) for d in self.demand))
 
         # Print the penalties
-        pen_row = "Pen".ljust(col_width)
-        for p in self.penaltiesColumn:
-            pen_row += str(p).ljust(col_width)
-        self.resultString += pen_row + "\n"
-        print(pen_row)
-        print()
+        self.log.write("Pen".ljust(col_width) + "".join(str(p).ljust(col_width) for p in self.penaltiesColumn))
+        self.log.echo()
 
     def solve_vogel(self):
         iteration = 0
@@ -215,11 +540,10 @@ class MAV:
                     if self.find_last_allocation():
                         self.penaltiesRow = [-1] * self.origin
                         self.penaltiesColumn = [-1] * self.destination
-                        self.resultString += f"Iteration {iteration}" + "\n"
-                        print(f"Iteration {iteration}")
-                        self.print_tableau()
-                        self.resultString += "\n"
-                        print("\n")
+                        if self.log.full:
+                            self.log.write(f"Iteration {iteration}")
+                            self.print_tableau()
+                            self.log.write()
                 break
 
             max_row_penalty = max(active_row_penalties) if active_row_penalties else -1
@@ -278,15 +602,36 @@ class MAV:
             self.penaltiesRow, self.penaltiesColumn = self.calc_penalties()
             
             # printing shit
-            self.resultString += f"Iteration {iteration}" + "\n"
-            print(f"Iteration {iteration}")
-            self.print_tableau()
-            self.resultString += "\n"
-            print("\n")
+            if self.log.full:
+                self.log.write(f"Iteration {iteration}")
+                self.print_tableau()
+                self.log.write()
+
+        return self.matrix
+
+    def solve_vogel_numpy(self):
+        """Same allocation as solve_vogel but made by the array backed engine (vogel_numpy).
+        The intermediate tableaus are not collected, only the final matrix.
+        """
+        allocations, rowsIgnored, columnsIgnored = vogel_numpy(self.costs, self.offer, self.demand)
+
+        # A matrix built already gets the allocations, otherwise it takes them when it is built
+        built = "matrix" in self.__dict__
+        for i, j, allocation in allocations:
+            if built:
+                self.matrix[i][j] = (allocation, self.matrix[i][j][1])
+            self.offer[i] -= allocation
+            self.demand[j] -= allocation
+        self._cells = allocations
+
+        self.rowsIgnored = rowsIgnored
+        self.columnsIgnored = columnsIgnored
+        self.penaltiesRow = [-1] * self.origin
+        self.penaltiesColumn = [-1] * self.destination
 
         return self.matrix
     
-    def solve(self) -> Tuple[bool, List[List[Tuple[int, int]]] | str]:
+    def solve(self, engine: str = "python", trace: Optional[str] = None) -> Tuple[bool, List[List[Tuple[int, int]]] | str]:
         """Helper Method
         Call is_feasible method to get if the problem is possible to solve or not.
             - True:  It make the solve and count how many paths it took to empty the goods
@@ -294,18 +639,31 @@ class MAV:
                      allocation is complete or not. (M - N - 1 = Minimum number of non-zero allocation).
             - False: Return a error based on multiple validations before making the problem
                      to avoid redundant solving.
+        engine: "python" for the original step by step method, "numpy" for the array
+                backed one (vogel_numpy) that gives the same allocation on big matrices.
+        trace:  "full" for the tableau of every iteration, "summary" for the final one,
+                "none" to skip all the formatting. Keeps the current level by default.
         """
+        if trace is not None:
+            self.log.level = trace
         is_feasible, message = self.is_feasible()
         if not is_feasible:
             return False, message
             
         try:
-            solution = self.solve_vogel()
-            non_zero_allocations = sum(
-                1 for i in range(self.origin) 
-                for j in range(self.destination) 
-                if solution[i][j][0] > 0
-            )
+            if engine == "numpy":
+                solution = self.solve_vogel_numpy()
+                non_zero_allocations = sum(1 for _, _, allocation in self._cells if allocation > 0)
+            else:
+                solution = self.solve_vogel()
+                non_zero_allocations = sum(
+                    1 for i in range(self.origin)
+                    for j in range(self.destination)
+                    if solution[i][j][0] > 0
+                )
+            # The numpy engine has no intermediate tableaus, the full trace gets the final one too
+            if self.log.summary and (engine == "numpy" or not self.log.full):
+                self.print_tableau()
             required_allocations = self.origin + self.destination - 1
             
             if non_zero_allocations < required_allocations:
@@ -2,9 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 from tkinter import scrolledtext
-from PIL import Image, ImageTk
 from NWCM import NWCM
-from costominimo import ejecutar_metodo_costo_minimo, metodo_costo_minimo_gui, return_string_results
+from costominimo import ejecutar_metodo_costo_minimo, metodo_costo_minimo_ordenado, return_string_results
 from mav.init import MAV
 from dimo.init import DIMO
 from banquillo import getTotal as BanquilloTotal
@@ -15,6 +14,13 @@ matrix_cost = []
 matrix_allocations = []
 num_allocations = 0
 
+def parse_number(value):
+    """int for whole numbers, exact at any size (float() rounds them past 2**53), float otherwise"""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
 def create_table(rows, cols, metodo):
     def show_table():
         for widget in root.winfo_children():
@@ -77,7 +83,7 @@ def create_table(rows, cols, metodo):
                         if value == "":  # Asignar 0 a celdas vacías
                             value = 0
                         try:
-                            value = float(value)
+                            value = parse_number(value)
                             if value < 0:
                                 raise ValueError("Negative value")
                         except ValueError:
@@ -130,9 +136,11 @@ def create_table(rows, cols, metodo):
                     matrix_allocations, matrix_cost, num_allocations = mav.get_matrix_parsed()
                     show_final(mav.resultString, metodo)
                 elif metodo == "Metodo del Costo Minimo":
-                    results, _ = metodo_costo_minimo_gui(supply, demand, cost_matrix)
+                    results, _ = metodo_costo_minimo_ordenado(supply, demand, cost_matrix, traza_deltas=True)
                     matrix_allocations = results[-1][2].tolist()
-                    matrix_cost = cost_matrix
+                    # The allocation has the dummy line of an unbalanced problem, the costs too
+                    from balancing import balance_problem
+                    matrix_cost, supply, demand = balance_problem(cost_matrix, supply, demand)
                     num_allocations = sum(element != 0 for row in matrix_allocations for element in row)
 
                     string_results = ejecutar_metodo_costo_minimo(datos, menu_inicio)
@@ -206,7 +214,7 @@ def ejecutar_metodoOptimo(metodo):
 
     print(metodo)
     if metodo == "dimo":
-        dimo = DIMO(matrix_cost, matrix_allocations, num_allocations)
+        dimo = DIMO(matrix_cost, matrix_allocations)
         optimal_allocation, optimal_cost = dimo.solve()
 
         if optimal_allocation is not None:
@@ -285,16 +293,17 @@ def show_inputs(metodo):
     button = tk.Button(frame,pady=5 ,text="Generar Tabla del problema", font=button_font, bg="#2196F3", fg='white', width=40, command=generate_table, bd=0)
     button.grid(row=2, columnspan=2, pady=20)
 
-root = tk.Tk()
-root.title("Main Window")
+root = None
 
 #tamaño de la ventana
 aspect_ratio = 16 / 9
 width = 800
 height = int(width / aspect_ratio)
-root.geometry(f"{width}x{height}")
 
 def menu_inicio():
+    # PIL solo hace falta para el fondo del menu, no al importar el modulo
+    from PIL import Image, ImageTk
+
     for widget in root.winfo_children():
         widget.destroy()
 
@@ -322,6 +331,14 @@ def menu_inicio():
         button.lift()
         button.pack(pady=10)
 
-menu_inicio()
-root.mainloop()
+def main():
+    global root
+    root = tk.Tk()
+    root.title("Main Window")
+    root.geometry(f"{width}x{height}")
+    menu_inicio()
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
 
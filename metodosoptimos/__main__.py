@@ -0,0 +1,171 @@
+"""
+Command line entry point, no GUI involved:
+
+    python -m metodosoptimos solve instances.jsonl --initial vogel --optimizer modi
+    cat instances.jsonl | python -m metodosoptimos solve -
+
+Every instance is a JSON object {"costs": [[...]], "supply": [...], "demand": [...]},
+one per line or all of them in a JSON list. One JSON line is written per instance
+as soon as it is solved, in input order, or a compact binary file with --binary
+(see results.py, it is read back with zero copies by results.read_results) of
+float64 numbers, or of exact int64 ones with --kind i.
+
+Problems where only some lanes exist give {"arcs": [[row, column, cost], ...]}
+instead of "costs"; the missing lanes can not be used.
+
+Cost matrices too large for the memory are solved from .npy or raw binary files,
+memory mapped instead of read:
+
+    python -m metodosoptimos mmap costs.npy supply.npy demand.npy
+    python -m metodosoptimos mmap costs.bin supply.bin demand.bin --dtype int32 --shape 20000 30000
+
+Long format tables, one lane per line (columns origin,destination,cost; supply
+and demand files with origin,supply and destination,demand), CSV or Parquet:
+
+    python -m metodosoptimos long costs.csv supply.csv demand.csv --progress
+"""
+import argparse
+import json
+import sys
+from typing import Iterator, List, TextIO
+
+from metodosoptimos.init import INITIAL_METHODS, OPTIMIZERS, SolveResult, iter_solve, solve_instance
+
+
+def read_instances(stream: TextIO) -> Iterator[dict]:
+    """Instances of a JSON lines stream, or of a JSON list / single object"""
+    first = ""
+    for first in stream:
+        if first.strip():
+            break
+    if not first.strip():
+        return
+
+    try:
+        document = json.loads(first)
+    except json.JSONDecodeError:
+        # Not JSON lines, the whole stream is one document
+        document = json.loads(first + stream.read())
+    if isinstance(document, list):
+        yield from document
+    else:
+        yield document
+
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_sources(paths: List[str]) -> Iterator[dict]:
+    for path in paths or ["-"]:
+        if path == "-":
+            yield from read_instances(sys.stdin)
+        else:
+            with open(path, encoding="utf-8") as stream:
+                yield from read_instances(stream)
+
+
+def write_result(index: int, result: SolveResult) -> None:
+    record = {
+        "index": index,
+        "cost": result.cost,
+        "iterations": result.iterations,
+        "wall_time": result.wall_time,
+        "allocation": [list(cell) for cell in result.allocation],
+        "error": result.error,
+    }
+    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
+
+
+def solve_command(args: argparse.Namespace) -> int:
+    failed = 0
+    results = iter_solve(read_sources(args.files), args.initial, args.optimizer, args.workers, args.chunksize)
+    if args.binary:
+        from results import ResultWriter
+
+        with ResultWriter(args.binary, args.kind, initial=args.initial, optimizer=args.optimizer) as writer:
+            for index, result in enumerate(results):
+                failed += result.error is not None
+                try:
+                    writer.write(result)
+                except (ValueError, OverflowError) as error:
+                    # A fractional or too large result in an integer file, the others still go in
+                    failed += result.error is None
+                    sys.stderr.write(f"instance {index} not written: {error}\n")
+        return 1 if failed else 0
+
+    for index, result in enumerate(results):
+        failed += result.error is not None
+        write_result(index, result)
+    return 1 if failed else 0
+
+
+def mmap_command(args: argparse.Namespace) -> int:
+    from loader import load_problem
+
+    problem = load_problem(args.costs, args.supply, args.demand, args.dtype, args.shape, args.amount_dtype)
+    result = solve_instance(problem, args.initial, args.optimizer)
+    write_result(0, result)
+    return 1 if result.error is not None else 0
+
+
+def long_command(args: argparse.Namespace) -> int:
+    from loader import read_long
+
+    def progress(path: str, done: int, total: int) -> None:
+        sys.stderr.write(f"\r{path}: {100 * done // max(total, 1)}%")
+        if done >= total:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    dense = {"dense": True, "sparse": False}.get(args.layout)
+    problem = read_long(args.costs, args.supply, args.demand, dense, progress=progress if args.progress else None)
+    result = solve_instance((problem.costs, problem.supply, problem.demand), args.initial, args.optimizer)
+    write_result(0, result)
+    return 1 if result.error is not None else 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m metodosoptimos", description="Transportation problem solvers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser("solve", help="solve instances and write one JSON line per instance")
+    solve.add_argument("files", nargs="*", help="JSON / JSON lines files, '-' or nothing to read stdin")
+    solve.add_argument("--initial", choices=INITIAL_METHODS, default="vogel", help="initial solution method")
+    solve.add_argument("--optimizer", choices=OPTIMIZERS, default="modi", help="optimization method")
+    solve.add_argument("--workers", type=int, default=1, help="worker processes (default 1, 0 for all the CPUs)")
+    solve.add_argument("--chunksize", type=int, default=16, help="instances sent to a worker at once")
+    solve.add_argument("--binary", metavar="PATH", help="write the results to a binary result file instead of stdout")
+    solve.add_argument("--kind", choices=("f", "i"), default="f",
+                       help="numbers of the binary file: f float64 (default), i int64, exact but only for integer results")
+    solve.set_defaults(handler=solve_command)
+
+    mmap = commands.add_parser("mmap", help="solve one problem memory mapped from .npy or raw binary files")
+    mmap.add_argument("costs", help="cost matrix file")
+    mmap.add_argument("supply", help="supply vector file")
+    mmap.add_argument("demand", help="demand vector file")
+    mmap.add_argument("--dtype", help="type of the raw costs, like int32 or float64")
+    mmap.add_argument("--shape", type=int, nargs=2, metavar=("ROWS", "COLS"), help="shape of the raw costs, COLS can be -1")
+    mmap.add_argument("--amount-dtype", help="type of the raw supply and demand, --dtype by default")
+    mmap.add_argument("--initial", choices=INITIAL_METHODS, default="vogel", help="initial solution method")
+    mmap.add_argument("--optimizer", choices=OPTIMIZERS, default="modi", help="optimization method")
+    mmap.set_defaults(handler=mmap_command)
+
+    long = commands.add_parser("long", help="solve one problem streamed from long format CSV or Parquet files")
+    long.add_argument("costs", help="origin,destination,cost file")
+    long.add_argument("supply", help="origin,supply file")
+    long.add_argument("demand", help="destination,demand file")
+    long.add_argument("--layout", choices=("auto", "dense", "sparse"), default="auto",
+                      help="cost matrix kind, auto is dense when every lane exists")
+    long.add_argument("--progress", action="store_true", help="report the progress of the reading on stderr")
+    long.add_argument("--initial", choices=INITIAL_METHODS, default="vogel", help="initial solution method")
+    long.add_argument("--optimizer", choices=OPTIMIZERS, default="modi", help="optimization method")
+    long.set_defaults(handler=long_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
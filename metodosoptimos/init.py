@@ -0,0 +1,366 @@
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+INITIAL_METHODS = ("nwcm", "least_cost", "vogel", "russell", "column_minimum", "vogel_least_cost")
+# The ones with a version over the lanes of sparse problems
+SPARSE_INITIAL_METHODS = ("nwcm", "least_cost", "vogel")
+OPTIMIZERS = ("modi", "stepping_stone", "exact", "none")
+
+
+class SolveResult(NamedTuple):
+    """
+    Compact record of one solved instance.
+    allocation only has the allocated cells as (row, column, amount), use matrix()
+    to get the full table.
+    """
+    allocation: List[Tuple[int, int, float]]
+    cost: Optional[float]
+    iterations: int
+    wall_time: float
+    shape: Tuple[int, int]
+    error: Optional[str] = None
+    # (u, v) of the optimum, None when the optimizer does not compute them
+    potentials: Optional[Tuple[List[float], List[float]]] = None
+
+    def matrix(self) -> List[List[float]]:
+        rows, cols = self.shape
+        matrix = [[0] * cols for _ in range(rows)]
+        for i, j, amount in self.allocation:
+            matrix[i][j] = amount
+        return matrix
+
+
+def is_sparse(costs) -> bool:
+    """True for a sparse.SparseCosts, without importing it (and numpy) for dense problems"""
+    sparse = sys.modules.get("sparse")
+    return sparse is not None and isinstance(costs, sparse.SparseCosts)
+
+
+def is_memmap(costs) -> bool:
+    """
+    True for a numpy.memmap (see loader.py), also behind the dummy line of
+    balancing.DummyCosts, without importing numpy for problems given as lists
+    """
+    balancing = sys.modules.get("balancing")
+    if balancing is not None and isinstance(costs, balancing.DummyCosts):
+        costs = costs.base
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(costs, numpy.memmap)
+
+
+def unpack_instance(instance) -> Tuple[List[List[float]], List[float], List[float]]:
+    """
+    Accept {"costs": ..., "supply": ..., "demand": ...} or a (costs, supply, demand) tuple.
+    Sparse problems give {"arcs": [[row, column, cost], ...], ...} instead of "costs",
+    or a sparse.SparseCosts / {(row, column): cost} dict as costs. Matrices larger
+    than the memory come as numpy.memmap from loader.load_problem.
+    Raises:
+        ValueError: if the costs are not one row per supply and one column per demand
+    """
+    if isinstance(instance, dict):
+        supply, demand = instance["supply"], instance["demand"]
+        if "arcs" in instance:
+            from sparse import SparseCosts
+            arcs = instance["arcs"]
+            costs = SparseCosts.from_arcs(
+                [arc[0] for arc in arcs], [arc[1] for arc in arcs], [arc[2] for arc in arcs], (len(supply), len(demand))
+            )
+            return costs, supply, demand
+        costs = instance["costs"]
+    else:
+        costs, supply, demand = instance
+        if isinstance(costs, dict):
+            from sparse import SparseCosts
+            costs = SparseCosts.from_dict(costs, (len(supply), len(demand)))
+    if hasattr(costs, "shape"):
+        shapes = {tuple(costs.shape)}
+    else:
+        shapes = {(len(costs), len(row)) for row in costs} or {(0, len(demand))}
+    if shapes != {(len(supply), len(demand))}:
+        raise ValueError(f"costs of {len(supply)} rows and {len(demand)} columns expected, one per supply and demand")
+    return costs, supply, demand
+
+
+def balance(costs, supply, demand) -> Tuple[List[List[float]], List[float], List[float]]:
+    """
+    The problem with a zero cost dummy row or column when it is not balanced
+    (balancing.balance_problem): supply and demand are copies, dense costs get a
+    balancing.DummyCosts that never stores the dummy line nor copies the matrix.
+    """
+    if sum(supply) == sum(demand):
+        # tolist() gives Python numbers for numpy vectors (memmaps included)
+        supply = supply.tolist() if hasattr(supply, "tolist") else list(supply)
+        demand = demand.tolist() if hasattr(demand, "tolist") else list(demand)
+        return costs, supply, demand
+
+    from balancing import balance_problem
+    return balance_problem(costs, supply, demand)
+
+
+def initial_solution(costs, supply, demand, method: str = "vogel") -> List[List[float]]:
+    """
+    Initial basic feasible solution of a balanced problem with one of INITIAL_METHODS.
+    Sparse and memory mapped problems get the list of (row, column, amount) cells
+    instead of the table.
+    """
+    if is_sparse(costs):
+        return sparse_initial_solution(costs, supply, demand, method)
+    if is_memmap(costs):
+        return memmap_initial_solution(costs, supply, demand, method)
+
+    if method == "nwcm":
+        from NWCM import northwest_corner
+        allocation = [[0] * len(demand) for _ in supply]
+        for i, j, amount in northwest_corner(supply, demand):
+            allocation[i][j] = amount
+        return allocation
+
+    if method == "least_cost":
+        from costominimo import metodo_costo_minimo_ordenado
+        resultados, _ = metodo_costo_minimo_ordenado(list(supply), list(demand), costs, traza_deltas=True)
+        return resultados.asignaciones_final.tolist()
+
+    if method == "vogel":
+        from mav.init import vogel_numpy
+        allocation = [[0] * len(demand) for _ in supply]
+        for i, j, amount in vogel_numpy(costs, supply, demand)[0]:
+            allocation[i][j] = amount
+        return allocation
+
+    if method in INITIAL_METHODS:
+        from initial import METHODS
+        allocation = [[0] * len(demand) for _ in supply]
+        for i, j, amount in METHODS[method](costs, supply, demand):
+            allocation[i][j] = amount
+        return allocation
+
+    raise ValueError(f"Unknown initial method {method!r}, expected one of {INITIAL_METHODS}")
+
+
+def sparse_initial_solution(costs, supply, demand, method: str = "vogel") -> List[Tuple[int, int, float]]:
+    """initial_solution of a sparse problem, the work grows with the lanes and not rows * columns"""
+    if method == "nwcm":
+        from NWCM import northwest_corner_sparse
+        return northwest_corner_sparse(costs, supply, demand)
+
+    if method == "least_cost":
+        from costominimo import metodo_costo_minimo_disperso
+        return metodo_costo_minimo_disperso(supply, demand, costs)[0]
+
+    if method == "vogel":
+        from mav.init import vogel_sparse
+        return vogel_sparse(costs, supply, demand)[0]
+
+    if method in INITIAL_METHODS:
+        raise ValueError(f"{method} has no sparse version, use one of {SPARSE_INITIAL_METHODS}")
+    raise ValueError(f"Unknown initial method {method!r}, expected one of {INITIAL_METHODS}")
+
+
+def memmap_initial_solution(costs, supply, demand, method: str = "vogel") -> List[Tuple[int, int, float]]:
+    """initial_solution of a memory mapped matrix, read by blocks and never copied whole"""
+    if method == "nwcm":
+        from NWCM import northwest_corner_sparse
+        return northwest_corner_sparse(costs, supply, demand)
+
+    if method == "least_cost":
+        from costominimo import metodo_costo_minimo_bloques
+        return metodo_costo_minimo_bloques(supply, demand, costs)[0]
+
+    if method == "vogel":
+        from mav.init import vogel_numpy
+        return vogel_numpy(costs, supply, demand)[0]
+
+    if method in INITIAL_METHODS:
+        from initial import METHODS
+        return METHODS[method](costs, supply, demand)
+
+    raise ValueError(f"Unknown initial method {method!r}, expected one of {INITIAL_METHODS}")
+
+
+def optimize(costs, allocation, supply, demand, optimizer: str = "modi", duals: bool = False,
+             pricing: str = "dantzig") -> Tuple[List[List[float]], float, int]:
+    """
+    Improve an initial solution with one of OPTIMIZERS. Returns (allocation, cost, iterations)
+    Sparse and memory mapped problems take and return (row, column, amount) cells
+    instead of the table. "exact" solves the problem from scratch (mincostflow), the initial solution is
+    not used and the iterations are its augmenting paths.
+    duals=True adds a fourth item, the (u, v) potentials of the optimum as lists, None
+    for "stepping_stone" and "none" that do not compute them.
+    pricing: how "modi" picks the entering cell, one of dimo.simplex.PRICING_RULES
+    """
+    if is_sparse(costs) or is_memmap(costs):
+        return sparse_optimize(costs, allocation, supply, demand, optimizer, duals, pricing)
+
+    if optimizer == "modi":
+        from dimo.simplex import TransportSimplex
+        simplex = TransportSimplex(costs, allocation, pricing=pricing)
+        if not simplex.solve():
+            raise RuntimeError("Max iterations reached without finding optimal solution")
+        return _with_duals((simplex.allocation(), simplex.total_cost(), simplex.iterations), duals,
+                           simplex.u_values, simplex.v_values)
+
+    if optimizer == "exact":
+        from mincostflow import min_cost_flow
+        solution = min_cost_flow(costs, supply, demand)
+        allocation = [[0] * len(demand) for _ in supply]
+        for i, j, amount in solution.cells:
+            allocation[i][j] = amount
+        return _with_duals((allocation, solution.cost, solution.augmentations), duals, solution.u, solution.v)
+
+    if optimizer == "stepping_stone":
+        from banquillo import getTotal
+        allocation = [list(row) for row in allocation]
+        total, cosas = getTotal(costs, allocation, supply, demand, incremental=True)
+        return _with_duals((allocation, total, len(cosas) - 1), duals)
+
+    if optimizer == "none":
+        cost = sum(costs[i][j] * value for i, row in enumerate(allocation) for j, value in enumerate(row) if value)
+        return _with_duals((allocation, cost, 0), duals)
+
+    raise ValueError(f"Unknown optimizer {optimizer!r}, expected one of {OPTIMIZERS}")
+
+
+def sparse_optimize(costs, cells, supply, demand, optimizer: str = "modi", duals: bool = False,
+                    pricing: str = "dantzig") -> Tuple[List[Tuple[int, int, float]], float, int]:
+    """optimize of a sparse or memory mapped problem, on (row, column, amount) cells"""
+    if optimizer == "modi":
+        from dimo.simplex import TransportSimplex
+        simplex = TransportSimplex(costs, cells, cells=True, pricing=pricing)
+        if not simplex.solve():
+            raise RuntimeError("Max iterations reached without finding optimal solution")
+        return _with_duals((simplex.cells(), simplex.total_cost(), simplex.iterations), duals,
+                           simplex.u_values, simplex.v_values)
+
+    if optimizer == "exact":
+        from mincostflow import min_cost_flow
+        solution = min_cost_flow(costs, supply, demand)
+        return _with_duals((solution.cells, solution.cost, solution.augmentations), duals, solution.u, solution.v)
+
+    if optimizer == "stepping_stone":
+        raise ValueError("stepping_stone needs the whole cost table in memory, use modi")
+
+    if optimizer == "none":
+        if is_sparse(costs):
+            return _with_duals((cells, costs.cost_of(cells), 0), duals)
+        return _with_duals((cells, sum(costs[i, j].item() * amount for i, j, amount in cells), 0), duals)
+
+    raise ValueError(f"Unknown optimizer {optimizer!r}, expected one of {OPTIMIZERS}")
+
+
+def _with_duals(result: Tuple, duals: bool, u=None, v=None) -> Tuple:
+    """result, plus the potentials (u, v) as lists when duals is set"""
+    if not duals:
+        return result
+    return result + ((u.tolist(), v.tolist()) if u is not None else None,)
+
+
+def _instance_shape(instance) -> Tuple[int, int]:
+    """(rows, columns) of an instance that may be malformed, (0, 0) when they are not known"""
+    try:
+        supply, demand = (instance["supply"], instance["demand"]) if isinstance(instance, dict) else instance[1:3]
+        return len(supply), len(demand)
+    except Exception:
+        return 0, 0
+
+
+def solve_instance(instance, initial: str = "vogel", optimizer: str = "modi") -> SolveResult:
+    """
+    Solve one instance headless. Unbalanced problems get a dummy row or column that
+    is removed from the returned allocation. Errors are reported in the record
+    instead of raised, so one bad instance does not stop a batch.
+    """
+    start = time.perf_counter()
+    shape = _instance_shape(instance)
+    try:
+        costs, supply, demand = unpack_instance(instance)
+        shape = (len(supply), len(demand))
+        balanced_costs, balanced_supply, balanced_demand = balance(costs, supply, demand)
+        # The exact solver does not start from an initial solution
+        allocation = None
+        if optimizer != "exact":
+            allocation = initial_solution(balanced_costs, balanced_supply, balanced_demand, initial)
+        allocation, cost, iterations, potentials = optimize(
+            balanced_costs, allocation, balanced_supply, balanced_demand, optimizer, duals=True
+        )
+    except Exception as e:
+        return SolveResult([], None, 0, time.perf_counter() - start, shape, f"{type(e).__name__}: {e}")
+
+    if is_sparse(balanced_costs) or is_memmap(balanced_costs):
+        cells = [(i, j, value) for i, j, value in allocation if i < shape[0] and j < shape[1] and value != 0]
+    else:
+        cells = [
+            (i, j, value)
+            for i, row in enumerate(allocation[:shape[0]])
+            for j, value in enumerate(row[:shape[1]])
+            if value != 0
+        ]
+    if potentials is not None:
+        # Without the dummy line, like the allocation
+        potentials = potentials[0][:shape[0]], potentials[1][:shape[1]]
+    return SolveResult(cells, cost, iterations, time.perf_counter() - start, shape, None, potentials)
+
+
+def _solve_chunk(chunk: List, initial: str, optimizer: str) -> List[SolveResult]:
+    return [solve_instance(instance, initial, optimizer) for instance in chunk]
+
+
+def iter_solve(
+    instances: Iterable,
+    initial: str = "vogel",
+    optimizer: str = "modi",
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> Iterator[SolveResult]:
+    """
+    Solve the instances over a process pool yielding the results in input order.
+    The instances are sent in chunks of `chunksize` and only a couple of chunks per
+    worker are in flight, so `instances` can be a lazy generator of any length.
+    workers=1 solves everything in this process.
+    """
+    if initial not in INITIAL_METHODS:
+        raise ValueError(f"Unknown initial method {initial!r}, expected one of {INITIAL_METHODS}")
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer {optimizer!r}, expected one of {OPTIMIZERS}")
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for instance in instances:
+            yield solve_instance(instance, initial, optimizer)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    instances = iter(instances)
+    chunks = iter(lambda: list(islice(instances, chunksize)), [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(_solve_chunk, chunk, initial, optimizer) for chunk in islice(chunks, 2 * workers))
+        while pending:
+            results = pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(_solve_chunk, chunk, initial, optimizer))
+            yield from results
+
+
+def solve_many(
+    instances: Iterable,
+    initial: str = "vogel",
+    optimizer: str = "modi",
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> List[SolveResult]:
+    """
+    Solve many independent transportation instances.
+
+    Args:
+        instances: {"costs", "supply", "demand"} dicts or (costs, supply, demand) tuples
+        initial: One of INITIAL_METHODS
+        optimizer: One of OPTIMIZERS
+        workers: Processes to use, all the CPUs by default
+        chunksize: Instances sent to a worker at once
+    Returns: One SolveResult per instance, in the same order
+    """
+    return list(iter_solve(instances, initial, optimizer, workers, chunksize))
@@ -0,0 +1,187 @@
+from typing import Dict, List, NamedTuple, Tuple
+import numpy as np
+
+from balancing import as_matrix
+from exactint import potential_dtype
+from sparse import SparseCosts
+
+
+class FlowSolution(NamedTuple):
+    """
+    Optimal solution of a balanced transportation problem.
+    u and v are the dual values (MODI potentials): c[i][j] - u[i] - v[j] >= 0 on
+    every lane and == 0 on every cell with flow, which certifies the optimum.
+    """
+    cells: List[Tuple[int, int, float]]
+    cost: float
+    augmentations: int
+    u: np.ndarray
+    v: np.ndarray
+
+
+def min_cost_flow(cost_matrix, supply, demand) -> FlowSolution:
+    """
+    Exact solver of a balanced transportation problem by successive shortest paths.
+
+    Every augmentation sends as much as it can over the cheapest path (Dijkstra on
+    reduced costs) from a row with supply left to a column with demand left. It
+    needs no initial solution, never pivots on a degenerate basis and has no
+    iteration limit, so it is the reference the other optimizers are checked
+    against (benchmarks/oracle.py).
+
+    Args:
+        cost_matrix: Matrix of transportation costs (a numpy.memmap or a
+                     balancing.DummyCosts is read one row at a time), or a
+                     sparse.SparseCosts
+        supply: Supply of every row
+        demand: Demand of every column, with the same total as the supply
+    Raises:
+        ValueError: if the problem is not balanced or the lanes can not carry it
+        OverflowError: if integer costs or amounts are too large for int64
+    """
+    sparse = isinstance(cost_matrix, SparseCosts)
+    costs = cost_matrix if sparse else as_matrix(cost_matrix)
+    m, n = costs.shape
+    values = costs.data if sparse else costs
+    # Integer problems are solved exactly in int64, potential_dtype leaves room
+    # under `unreached` for every distance
+    dtype = potential_dtype(values, m + n, sum(supply))
+    if sparse:
+        values = values.astype(dtype, copy=False)
+    unreached = np.iinfo(np.int64).max // 4 if dtype is np.int64 else np.inf
+
+    # One dtype for both sides: float64 as soon as any amount is fractional, the
+    # amounts sent are taken off both
+    supply_left = np.array(supply)
+    demand_left = np.array(demand)
+    amounts = np.result_type(supply_left, demand_left)
+    supply_left = supply_left.astype(amounts, copy=False)
+    demand_left = demand_left.astype(amounts, copy=False)
+    if amounts == object:
+        raise OverflowError("supply and demand must fit in int64")
+    if supply_left.shape != (m,) or demand_left.shape != (n,):
+        raise ValueError(f"supply and demand must match the {m}x{n} cost matrix")
+    if supply_left.sum() != demand_left.sum():
+        raise ValueError("the problem must be balanced, total supply != total demand")
+
+    def lanes_of(i: int):
+        if not sparse:
+            return slice(None), values[i, :]
+        start, stop = costs.indptr[i], costs.indptr[i + 1]
+        return costs.indices[start:stop], values[start:stop]
+
+    def cost_of(i: int, j: int):
+        return values[costs.position(i, j)] if sparse else values[i, j]
+
+    # Reduced costs c[i][j] + row_pot[i] - col_pot[j] stay >= 0 on every lane
+    row_pot = np.zeros(m, dtype=dtype)
+    if sparse:
+        col_pot = np.full(n, unreached, dtype=dtype)
+        np.minimum.at(col_pot, costs.indices, values)
+        col_pot[col_pot == unreached] = 0
+    else:
+        col_pot = values.min(axis=0).astype(dtype) if m else np.zeros(n, dtype=dtype)
+
+    # flow[j] = {i: amount} of the cells with flow in column j
+    flow: List[Dict[int, float]] = [{} for _ in range(n)]
+    augmentations = 0
+
+    # Cells with zero reduced cost can take flow right away, the shortest paths
+    # are only needed for what they leave
+    for i in range(m):
+        cols, row_costs = lanes_of(i)
+        reduced = row_costs - col_pot[cols]
+        if not reduced.size:
+            continue
+        row_pot[i] = -reduced.min()
+        zero = np.flatnonzero(reduced == reduced.min())
+        for j in (zero if not sparse else cols[zero]):
+            if not supply_left[i]:
+                break
+            amount = min(supply_left[i], demand_left[j])
+            if amount:
+                flow[j][i] = amount
+                supply_left[i] -= amount
+                demand_left[j] -= amount
+
+    while supply_left.any():
+        # open_*: tentative distance of the nodes not settled yet, dist_*: settled ones
+        open_row = np.where(supply_left > 0, 0, unreached).astype(dtype)
+        open_col = np.full(n, unreached, dtype=dtype)
+        dist_row = np.full(m, unreached, dtype=dtype)
+        dist_col = np.full(n, unreached, dtype=dtype)
+        pred_row = np.full(m, -1)
+        pred_col = np.full(n, -1)
+        target = -1
+
+        while True:
+            i = int(open_row.argmin())
+            j = int(open_col.argmin()) if n else 0
+            row_next = open_row[i]
+            col_next = open_col[j] if n else unreached
+            if col_next <= row_next:
+                # Columns first on ties, the search stops at the first one with demand left
+                if col_next == unreached:
+                    break
+                dist_col[j], open_col[j] = col_next, unreached
+                if demand_left[j] > 0:
+                    target = j
+                    break
+                for k, amount in flow[j].items():
+                    if dist_row[k] != unreached:
+                        continue
+                    # Sending less over the cell (k, j), reduced cost -c + col_pot - row_pot
+                    d = dist_col[j] - cost_of(k, j) + col_pot[j] - row_pot[k]
+                    if d < open_row[k]:
+                        open_row[k] = d
+                        pred_row[k] = j
+                continue
+
+            if row_next == unreached:
+                break
+            dist_row[i], open_row[i] = row_next, unreached
+            cols, row_costs = lanes_of(i)
+            candidate = row_costs + (row_next + row_pot[i]) - col_pot[cols]
+            better = (candidate < open_col[cols]) & (dist_col[cols] == unreached)
+            chosen = better if not sparse else cols[better]
+            open_col[chosen] = candidate[better]
+            pred_col[chosen] = i
+
+        if target < 0:
+            raise ValueError("the lanes can not carry the supply to the demand")
+
+        # Settled nodes move by their distance, the rest by the distance of the target
+        limit = dist_col[target]
+        row_pot += np.minimum(dist_row, limit)
+        col_pot += np.minimum(dist_col, limit)
+
+        path = []
+        j = target
+        amount = demand_left[target]
+        while True:
+            i = int(pred_col[j])
+            path.append((i, j))
+            back = int(pred_row[i])
+            if back < 0:
+                source = i
+                break
+            amount = min(amount, flow[back][i])
+            j = back
+        amount = min(amount, supply_left[source])
+
+        for step, (i, j) in enumerate(path):
+            flow[j][i] = flow[j].get(i, 0) + amount
+            if step + 1 < len(path):
+                back = path[step + 1][1]
+                flow[back][i] -= amount
+                if flow[back][i] == 0:
+                    del flow[back][i]
+        supply_left[source] -= amount
+        demand_left[target] -= amount
+        augmentations += 1
+
+    cells = sorted((i, j, amount.item() if hasattr(amount, "item") else amount)
+                   for j, column in enumerate(flow) for i, amount in column.items())
+    # Python numbers, an integer total can be larger than int64
+    cost = sum(cost_of(i, j).item() * amount for i, j, amount in cells)
+    return FlowSolution(cells, cost, augmentations, -row_pot, col_pot)
@@ -0,0 +1,292 @@
+"""
+Compact binary file of solved instances (metodosoptimos.init.SolveResult), read
+back with zero copies:
+
+    with ResultWriter("results.bin", initial="vogel", optimizer="modi") as writer:
+        for result in iter_solve(instances):
+            writer.write(result)
+
+    results = read_results("results.bin")
+    results.cells["amount"]      # every allocated cell of every instance, memory mapped
+    results[12].u, results[12].cells
+
+Layout, little endian, every section aligned to 8 bytes:
+
+    header     HEADER: magic, version, kind of the values, section offsets
+    cells      (row int32, col int32, amount) of every instance, one after another
+    potentials u then v of every instance that has them
+    instances  one instance_dtype record per instance (shape, where its cells and
+               potentials start, cost, iterations, wall time, flags)
+    metadata   JSON: the keyword arguments of ResultWriter and the error messages
+
+Amounts, potentials and costs share one dtype per file: float64 by default, or
+int64 when the writer is asked for it (exact for any integer, like the solvers,
+see exactint).
+"""
+import json
+import os
+import shutil
+import struct
+import tempfile
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"MOTRES\x00\x00"
+VERSION = 1
+# magic, version, kind of the values ("i" or "f"), count, then offset and size of
+# the cells, potentials, instances and metadata sections
+HEADER = struct.Struct("<8sHc5xQ8Q")
+
+HAS_COST = 1
+HAS_POTENTIALS = 2
+FAILED = 4
+# Cost of an initial solution that uses a missing lane (see sparse), in any file kind
+INFINITE_COST = 8
+
+
+def value_dtype(kind: str) -> np.dtype:
+    return np.dtype("<i8" if kind == "i" else "<f8")
+
+
+def cell_dtype(kind: str) -> np.dtype:
+    return np.dtype([("row", "<i4"), ("col", "<i4"), ("amount", value_dtype(kind))])
+
+
+def instance_dtype(kind: str) -> np.dtype:
+    return np.dtype([
+        ("rows", "<i8"),
+        ("cols", "<i8"),
+        ("cell_start", "<i8"),
+        ("cell_count", "<i8"),
+        ("potential_start", "<i8"),
+        ("cost", value_dtype(kind)),
+        ("iterations", "<i8"),
+        ("wall_time", "<f8"),
+        ("flags", "<u8"),
+    ])
+
+
+class StoredResult(NamedTuple):
+    """One instance of a ResultFile, its arrays are views of the file"""
+    cells: np.ndarray
+    u: Optional[np.ndarray]
+    v: Optional[np.ndarray]
+    cost: Optional[Union[int, float]]
+    iterations: int
+    wall_time: float
+    shape: Tuple[int, int]
+    error: Optional[str]
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _kind(result) -> str:
+    values = [amount for _, _, amount in result.allocation]
+    if result.cost is not None and result.cost != float("inf"):
+        values.append(result.cost)
+    if result.potentials is not None:
+        values += list(result.potentials[0]) + list(result.potentials[1])
+    return "i" if all(_is_integer(value) for value in values) else "f"
+
+
+def _pad(stream: BinaryIO) -> int:
+    """Zeros up to the next multiple of 8, returns the new position"""
+    position = stream.tell()
+    stream.write(b"\x00" * (-position % 8))
+    return stream.tell()
+
+
+class ResultWriter:
+    """
+    Append SolveResults to a result file. Cells go straight to the file, the
+    potentials and instance records to temporary files joined on close(), so the
+    memory does not grow with the number of instances.
+
+    Args:
+        path: File to create (it is overwritten)
+        kind: "f" for float64 values (any result), "i" for int64 (only integer results)
+        **metadata: JSON values saved with the file, like the initial method and
+                    the optimizer
+    """
+
+    def __init__(self, path: str, kind: str = "f", **metadata):
+        if kind not in ("i", "f"):
+            raise ValueError(f"kind must be 'i' or 'f', not {kind!r}")
+        self.path = path
+        self.kind = kind
+        self.metadata = metadata
+        self.errors: Dict[int, str] = {}
+        self.count = 0
+        self._cells = 0
+        self._potentials = 0
+        self._stream = open(path, "wb")
+        self._stream.write(b"\x00" * HEADER.size)
+        _pad(self._stream)
+        self._cells_offset = self._stream.tell()
+        self._potential_file = tempfile.TemporaryFile()
+        self._instance_file = tempfile.TemporaryFile()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, result) -> None:
+        """
+        Raises:
+            ValueError: for a fractional result in an integer file
+            OverflowError: for integers that do not fit in int64
+        Either way nothing of the result is written, the file keeps the ones before it.
+        """
+        if self.kind == "i" and _kind(result) != "i":
+            raise ValueError(f"result {self.count} is fractional, write the file with kind='f'")
+        values = value_dtype(self.kind)
+        flags = 0
+        if result.cost == float("inf"):
+            flags |= INFINITE_COST
+        elif result.cost is not None:
+            flags |= HAS_COST
+        if result.potentials is not None:
+            flags |= HAS_POTENTIALS
+        if result.error is not None:
+            flags |= FAILED
+
+        # Everything is converted before anything is written
+        cells = np.array([tuple(cell) for cell in result.allocation], dtype=cell_dtype(self.kind))
+        potentials = b""
+        if flags & HAS_POTENTIALS:
+            u, v = result.potentials
+            potentials = np.asarray(list(u) + list(v), dtype=values).tobytes()
+        record = np.zeros(1, dtype=instance_dtype(self.kind))
+        record[0] = (
+            result.shape[0], result.shape[1], self._cells, cells.size,
+            self._potentials if flags & HAS_POTENTIALS else -1,
+            result.cost if flags & HAS_COST else 0, result.iterations, result.wall_time, flags,
+        )
+
+        self._stream.write(cells.tobytes())
+        self._potential_file.write(potentials)
+        self._instance_file.write(record.tobytes())
+        if flags & FAILED:
+            self.errors[self.count] = result.error
+        self._cells += cells.size
+        if flags & HAS_POTENTIALS:
+            self._potentials += result.shape[0] + result.shape[1]
+        self.count += 1
+
+    def close(self) -> None:
+        if self._stream.closed:
+            return
+
+        sections = []
+        for source in (self._potential_file, self._instance_file):
+            offset = _pad(self._stream)
+            source.seek(0)
+            shutil.copyfileobj(source, self._stream)
+            sections.append((offset, self._stream.tell() - offset))
+            source.close()
+        meta_offset = _pad(self._stream)
+        meta = json.dumps({"metadata": self.metadata, "errors": self.errors}).encode("utf-8")
+        self._stream.write(meta)
+
+        self._stream.seek(0)
+        self._stream.write(HEADER.pack(
+            MAGIC, VERSION, self.kind.encode(), self.count,
+            self._cells_offset, self._cells * cell_dtype(self.kind).itemsize,
+            *sections[0], *sections[1], meta_offset, len(meta),
+        ))
+        self._stream.close()
+
+
+def write_results(path: str, results, kind: str = "f", **metadata) -> int:
+    """Write an iterable of SolveResults to a result file, returns how many"""
+    with ResultWriter(path, kind, **metadata) as writer:
+        for result in results:
+            writer.write(result)
+    return writer.count
+
+
+class ResultFile:
+    """
+    A result file read without copies: cells, potentials and instances are numpy
+    views of the file (memory mapped) or of the bytes given to from_bytes.
+
+    Attributes:
+        cells: Structured array (row, col, amount) of every instance
+        potentials: u and v of every instance with potentials
+        instances: Structured array of instance_dtype records, one per instance
+        metadata: The keyword arguments given to ResultWriter
+        errors: {instance: error message} of the failed instances
+    """
+
+    def __init__(self, buffer: np.ndarray, source: str = "buffer"):
+        if buffer.size < HEADER.size:
+            raise ValueError(f"{source} is not a result file")
+        magic, version, kind, count, *offsets = HEADER.unpack(buffer[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{source} is not a result file")
+        if version != VERSION:
+            raise ValueError(f"{source} has version {version}, only {VERSION} can be read")
+        kind = kind.decode()
+        (cells_at, cells_size, potentials_at, potentials_size,
+         instances_at, instances_size, meta_at, meta_size) = offsets
+        if meta_at + meta_size > buffer.size:
+            raise ValueError(f"{source} is truncated")
+
+        self.kind = kind
+        self.cells = buffer[cells_at:cells_at + cells_size].view(cell_dtype(kind))
+        self.potentials = buffer[potentials_at:potentials_at + potentials_size].view(value_dtype(kind))
+        self.instances = buffer[instances_at:instances_at + instances_size].view(instance_dtype(kind))
+        if self.instances.size != count:
+            raise ValueError(f"{source} has {self.instances.size} instance records, not {count}")
+        meta = json.loads(buffer[meta_at:meta_at + meta_size].tobytes().decode("utf-8"))
+        self.metadata = meta["metadata"]
+        self.errors = {int(index): error for index, error in meta["errors"].items()}
+
+    @classmethod
+    def open(cls, path: str) -> "ResultFile":
+        if not os.path.getsize(path):
+            raise ValueError(f"{path} is not a result file")
+        return cls(np.memmap(path, dtype=np.uint8, mode="r"), path)
+
+    @classmethod
+    def from_bytes(cls, data) -> "ResultFile":
+        return cls(np.frombuffer(data, dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return self.instances.size
+
+    def __getitem__(self, index: int) -> StoredResult:
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"instance {index} of {len(self)}")
+        index %= len(self)
+        record = self.instances[index]
+        rows, cols = int(record["rows"]), int(record["cols"])
+        start, flags = int(record["cell_start"]), int(record["flags"])
+        cells = self.cells[start:start + int(record["cell_count"])]
+        u = v = None
+        if flags & HAS_POTENTIALS:
+            first = int(record["potential_start"])
+            u = self.potentials[first:first + rows]
+            v = self.potentials[first + rows:first + rows + cols]
+        cost = record["cost"].item() if flags & HAS_COST else None
+        if flags & INFINITE_COST:
+            cost = float("inf")
+        return StoredResult(cells, u, v, cost, int(record["iterations"]), float(record["wall_time"]),
+                            (rows, cols), self.errors.get(index))
+
+    def instance_of_cells(self) -> np.ndarray:
+        """Instance of every cell, aligned with cells (for group by operations)"""
+        return np.repeat(np.arange(len(self)), self.instances["cell_count"])
+
+
+def read_results(path: str) -> ResultFile:
+    """
+    Raises:
+        ValueError: if the file is not a (complete) result file of this version
+    """
+    return ResultFile.open(path)
@@ -0,0 +1,170 @@
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+
+class SparseCosts:
+    """
+    Cost matrix of a transportation problem where only some lanes exist, stored
+    as CSR arrays: the lanes of row i are indices[indptr[i]:indptr[i + 1]] (sorted
+    by column) with costs data[indptr[i]:indptr[i + 1]].
+
+    A missing lane can not be used at all, it is not a lane with a huge cost.
+    Memory and the work of the methods that accept it scale with the number of
+    lanes (nnz) instead of rows * columns.
+    """
+
+    def __init__(self, indptr, indices, data, shape: Tuple[int, int]):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data)
+        self.shape = (int(shape[0]), int(shape[1]))
+        if self.indptr.shape != (self.num_rows + 1,) or self.indices.shape != self.data.shape:
+            raise ValueError("indptr must have rows + 1 entries and indices as many as data")
+        self._rows = None
+        self._columns = None
+
+    @classmethod
+    def from_arcs(cls, rows: Iterable[int], cols: Iterable[int], costs: Iterable, shape: Tuple[int, int]) -> "SparseCosts":
+        """Build from parallel sequences of (row, column, cost), in any order"""
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        costs = np.asarray(costs).ravel()
+        num_rows, num_cols = shape
+        if not rows.size == cols.size == costs.size:
+            raise ValueError("rows, cols and costs must have the same length")
+        if rows.size and (rows.min() < 0 or rows.max() >= num_rows or cols.min() < 0 or cols.max() >= num_cols):
+            raise ValueError(f"lanes out of the {num_rows}x{num_cols} problem")
+
+        order = np.lexsort((cols, rows))
+        rows, cols, costs = rows[order], cols[order], costs[order]
+        if rows.size > 1 and ((rows[1:] == rows[:-1]) & (cols[1:] == cols[:-1])).any():
+            raise ValueError("repeated lanes")
+
+        indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+        return cls(indptr, cols, costs, shape)
+
+    @classmethod
+    def from_dict(cls, costs: Dict[Tuple[int, int], float], shape: Tuple[int, int]) -> "SparseCosts":
+        """Build from {(row, column): cost}"""
+        rows = [i for i, _ in costs]
+        cols = [j for _, j in costs]
+        return cls.from_arcs(rows, cols, list(costs.values()), shape)
+
+    @classmethod
+    def from_dense(cls, matrix, missing=None) -> "SparseCosts":
+        """Build from a full matrix, the cells equal to `missing` (None or NaN by default) are left out"""
+        if isinstance(matrix, list) and any(c is None for row in matrix for c in row):
+            matrix = np.array([[np.nan if c is None else c for c in row] for row in matrix])
+        else:
+            matrix = np.asarray(matrix)
+
+        if missing is not None:
+            exists = matrix != missing
+        elif matrix.dtype.kind == "f":
+            exists = ~np.isnan(matrix)
+        else:
+            exists = np.ones(matrix.shape, dtype=bool)
+        rows, cols = np.nonzero(exists)
+        return cls.from_arcs(rows, cols, matrix[rows, cols], matrix.shape)
+
+    @property
+    def num_rows(self) -> int:
+        return self.shape[0]
+
+    @property
+    def num_cols(self) -> int:
+        return self.shape[1]
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indices.size)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Row of every lane, aligned with indices and data"""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.num_rows), np.diff(self.indptr))
+        return self._rows
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Column access (CSC): (colptr, order) where the lanes of column j are
+        order[colptr[j]:colptr[j + 1]], positions in indices/data sorted by row.
+        """
+        if self._columns is None:
+            order = np.argsort(self.indices, kind="stable")
+            colptr = np.zeros(self.num_cols + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=self.num_cols), out=colptr[1:])
+            self._columns = colptr, order
+        return self._columns
+
+    def position(self, i: int, j: int) -> int:
+        """Position of the lane (i, j) in indices/data, -1 if it does not exist"""
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        k = start + int(np.searchsorted(self.indices[start:stop], j))
+        return k if k < stop and self.indices[k] == j else -1
+
+    def get(self, i: int, j: int, default=None):
+        k = self.position(i, j)
+        return default if k < 0 else self.data[k].item()
+
+    def __contains__(self, cell: Tuple[int, int]) -> bool:
+        return self.position(*cell) >= 0
+
+    def with_dummy_row(self) -> "SparseCosts":
+        """Copy with an extra row that has a zero cost lane to every column"""
+        n = self.num_cols
+        indptr = np.append(self.indptr, self.indptr[-1] + n)
+        indices = np.concatenate([self.indices, np.arange(n)])
+        data = np.concatenate([self.data, np.zeros(n, dtype=self.data.dtype)])
+        return SparseCosts(indptr, indices, data, (self.num_rows + 1, n))
+
+    def with_dummy_column(self) -> "SparseCosts":
+        """Copy with an extra column that has a zero cost lane from every row"""
+        m, n = self.shape
+        ends = self.indptr[1:]
+        indices = np.insert(self.indices, ends, n)
+        data = np.insert(self.data, ends, np.zeros(m, dtype=self.data.dtype))
+        indptr = self.indptr + np.arange(m + 1)
+        return SparseCosts(indptr, indices, data, (m, n + 1))
+
+    def toarray(self, missing: Optional[float] = np.inf) -> np.ndarray:
+        """Dense matrix with `missing` on the lanes that do not exist"""
+        dense = np.full(self.shape, missing, dtype=np.result_type(self.data, np.asarray(missing)))
+        dense[self.rows, self.indices] = self.data
+        return dense
+
+    def cost_of(self, cells: Iterable[Tuple[int, int, float]]) -> float:
+        """Total cost of (row, column, amount) cells, infinite if one of them uses a missing lane"""
+        total = 0
+        for i, j, amount in cells:
+            if amount:
+                cost = self.get(i, j)
+                if cost is None:
+                    return float("inf")
+                total += cost * amount
+        return total
+
+
+def artificial_fill(offer, demand):
+    """
+    Northwest corner over what is left of offer and demand, for the amounts the
+    existing lanes could not take. Returns (row, column, amount) cells; the cells
+    can be missing lanes, TransportSimplex drives them out if it is possible.
+    """
+    rows = [i for i, s in enumerate(offer) if s > 0]
+    cols = [j for j, d in enumerate(demand) if d > 0]
+    cells = []
+    a = b = 0
+    while a < len(rows) and b < len(cols):
+        i, j = rows[a], cols[b]
+        amount = min(offer[i], demand[j])
+        cells.append((i, j, amount))
+        offer[i] -= amount
+        demand[j] -= amount
+        if offer[i] == 0:
+            a += 1
+        if demand[j] == 0:
+            b += 1
+    return cells
@@ -0,0 +1,148 @@
+"""
+Virtual dummy lines (balancing.DummyCosts, slack, balance_problem) against the
+padded matrix built explicitly, and unbalanced problems solved through every
+method against the same problem balanced by hand.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from balancing import DummyCosts, as_matrix, balance_problem, slack
+from metodosoptimos.init import INITIAL_METHODS, OPTIMIZERS, solve_instance
+from mincostflow import min_cost_flow
+from sparse import SparseCosts
+
+
+def random_costs(seed: int, fractional: bool = False):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 6), rng.randint(1, 6)
+    cost = (lambda: rng.randint(1, 80) / 4) if fractional else (lambda: rng.randint(1, 20))
+    return [[cost() for _ in range(cols)] for _ in range(rows)]
+
+
+def padded(costs, dummy_row: bool) -> np.ndarray:
+    matrix = np.asarray(costs)
+    return np.pad(matrix, ((0, 1), (0, 0)) if dummy_row else ((0, 0), (0, 1)))
+
+
+def indexes(rows: int, cols: int):
+    yield slice(None)
+    yield slice(1, None)
+    yield slice(None, None, -1)
+    yield (slice(None), slice(1, 3))
+    yield (slice(None), np.array([cols - 1, 0]))
+    yield np.array([rows - 1, 0])
+    yield (np.array([rows - 1, 0]), slice(None))
+    yield (np.array([0, rows - 1]), np.array([cols - 1, 0]))
+    yield np.arange(rows) % 2 == 0
+    yield (-1, slice(None))
+    yield (0, slice(None, None, 2))
+
+
+SEEDS = range(25)
+
+
+@pytest.mark.parametrize("base", ["list", "ndarray", "memmap"])
+@pytest.mark.parametrize("dummy_row", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dummy_costs_index_like_the_padded_matrix(tmp_path, seed, dummy_row, base):
+    costs = random_costs(seed, fractional=seed % 3 == 0)
+    expected = padded(costs, dummy_row)
+    if base == "ndarray":
+        costs = np.array(costs)
+    elif base == "memmap":
+        np.save(tmp_path / "costs.npy", np.array(costs))
+        costs = np.load(tmp_path / "costs.npy", mmap_mode="r")
+    dummy = DummyCosts(costs, dummy_row)
+    rows, cols = expected.shape
+
+    assert dummy.shape == expected.shape and len(dummy) == rows and dummy.size == expected.size
+    assert dummy.dtype == expected.dtype
+    for i in range(-rows, rows):
+        assert list(dummy[i]) == expected[i].tolist()
+        assert len(dummy[i]) == cols
+        for j in range(-cols, cols):
+            assert dummy[i, j] == expected[i, j]
+            assert dummy[i][j] == expected[i, j]
+            assert type(dummy[i][j]) in (int, float)
+    for index in indexes(rows, cols):
+        assert (dummy[index] == expected[index]).all(), index
+
+    assert [list(row) for row in dummy] == expected.tolist()
+    assert (np.asarray(dummy) == expected).all() and dummy.tolist() == expected.tolist()
+    assert (np.asarray(dummy[0]) == expected[0]).all()
+    assert (as_matrix(dummy) is dummy) and (as_matrix(costs) == np.asarray(costs)).all()
+    for axis in (None, 0, 1):
+        assert (dummy.min(axis=axis) == expected.min(axis=axis)).all()
+        assert (dummy.max(axis=axis) == expected.max(axis=axis)).all()
+
+    with pytest.raises(IndexError):
+        dummy[rows]
+    with pytest.raises(IndexError):
+        dummy[0, cols]
+
+
+def test_base_is_not_copied_or_written():
+    costs = np.arange(6).reshape(2, 3)
+    dummy = DummyCosts(costs, dummy_row=True)
+    assert dummy.base is costs
+    block = dummy[:]
+    block[0, 0] = 99
+    assert costs[0, 0] == 0
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_slack_and_balance_problem(seed):
+    rng = random.Random(seed)
+    costs = random_costs(seed)
+    supply = [rng.randint(0, 30) for _ in costs]
+    demand = [rng.randint(0, 30) for _ in costs[0]]
+    gap = sum(supply) - sum(demand)
+
+    new_supply, new_demand = slack(np.array(supply), tuple(demand))
+    assert new_supply == supply + ([-gap] if gap < 0 else [])
+    assert new_demand == demand + ([gap] if gap > 0 else [])
+    assert slack(supply, demand) == (new_supply, new_demand)
+
+    balanced_costs, balanced_supply, balanced_demand = balance_problem(costs, supply, demand)
+    assert (balanced_supply, balanced_demand) == (new_supply, new_demand)
+    if gap == 0:
+        assert balanced_costs is costs
+    else:
+        assert isinstance(balanced_costs, DummyCosts)
+        assert balanced_costs.tolist() == padded(costs, gap < 0).tolist()
+
+    lanes = SparseCosts.from_dense(costs)
+    sparse_costs, _, _ = balance_problem(lanes, supply, demand)
+    assert isinstance(sparse_costs, SparseCosts)
+    assert sparse_costs.toarray().tolist() == padded(costs, gap < 0).tolist()
+
+
+def unbalanced_problem(seed: int):
+    rng = random.Random(seed)
+    costs = random_costs(seed)
+    supply = [rng.randint(1, 30) for _ in costs]
+    demand = [rng.randint(1, 30) for _ in costs[0]]
+    if sum(supply) == sum(demand):
+        supply[0] += 1
+    return costs, supply, demand
+
+
+@pytest.mark.parametrize("optimizer", OPTIMIZERS)
+@pytest.mark.parametrize("initial", INITIAL_METHODS)
+@pytest.mark.parametrize("seed", range(10))
+def test_unbalanced_solves_like_the_padded_problem(seed, initial, optimizer):
+    costs, supply, demand = unbalanced_problem(seed)
+    padded_supply, padded_demand = slack(supply, demand)
+    padded_costs = padded(costs, len(padded_supply) > len(supply)).tolist()
+
+    result = solve_instance((costs, supply, demand), initial, optimizer)
+    by_hand = solve_instance((padded_costs, padded_supply, padded_demand), initial, optimizer)
+    assert result.error is None
+    assert result.shape == (len(supply), len(demand))
+    assert all(i < len(supply) and j < len(demand) for i, j, _ in result.allocation)
+    # the dummy line costs nothing, so the costs agree
+    assert result.cost == by_hand.cost
+    if optimizer != "none":
+        assert result.cost == min_cost_flow(padded_costs, padded_supply, padded_demand).cost
@@ -0,0 +1,121 @@
+"""
+The indexed closed path search of banquillo (buildIndex / findPath) against the
+recursive search over the whole matrix it replaced, kept here as the reference.
+"""
+import random
+
+import pytest
+
+from banquillo import buildIndex, closedPath, completeBasis, findPath, getPath, isForest, mapPaths
+from dimo.disjointset import DisjointSet
+from NWCM import northwest_corner
+
+
+def recursive_path(costs, pivot, current=None, direction=0):
+    """banquillo.getPath as it was: rescans every cell at every step of the recursion"""
+    possible = []
+    if not current:
+        current = pivot
+    for i, row in enumerate(costs):
+        for j, value in enumerate(row):
+            if not (pivot[0] == i and pivot[1] == j and direction != 0):
+                if value == 0:
+                    continue
+            if current[0] == i and current[1] == j:
+                continue
+            if direction >= 0 and i == current[0]:
+                possible.append((i, j))
+            if direction <= 0 and j == current[1]:
+                possible.append((i, j))
+
+    for p in possible:
+        if pivot[0] == p[0] and pivot[1] == p[1]:
+            return p
+        dir = 1 if current[0] - p[0] != 0 else -1
+        next = recursive_path(costs, pivot, p, dir)
+        if next is None:
+            continue
+        if type(next) is tuple:
+            return [p, next]
+        return [p] + next
+    return None
+
+
+def staircase(seed: int):
+    """Northwest corner allocation (a spanning tree, often a degenerate one)"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 7), rng.randint(1, 7)
+    supply = [rng.choice((5, 10, 15)) for _ in range(rows)]
+    demand = [rng.choice((5, 10, 15)) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    values = [[0] * cols for _ in range(rows)]
+    for i, j, amount in northwest_corner(supply, demand):
+        values[i][j] = amount
+    return values
+
+
+def empty_cells(values, basis):
+    return [(i, j) for i, row in enumerate(values) for j, _ in enumerate(row) if (i, j) not in basis]
+
+
+SEEDS = range(60)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_same_paths_as_the_recursive_search(seed):
+    values = staircase(seed)
+    index = buildIndex(values)
+    for i, row in enumerate(values):
+        for j, value in enumerate(row):
+            if value == 0:
+                expected = recursive_path(values, (i, j))
+                assert findPath(index, (i, j)) == expected
+                assert getPath(values, (i, j)) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_zero_valued_basic_cells_take_part_in_the_paths(seed):
+    values = staircase(seed)
+    basis = completeBasis(values)
+    # the reference only knows the cells that are not zero
+    marked = [[1 if (i, j) in basis else 0 for j, _ in enumerate(row)] for i, row in enumerate(values)]
+
+    paths = mapPaths(values, basis)
+    expected = [recursive_path(marked, cell) for cell in empty_cells(values, basis)]
+    assert paths == expected
+    assert None not in paths
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_complete_basis_is_a_spanning_tree(seed):
+    values = staircase(seed)
+    basis = completeBasis(values)
+    rows, cols = len(values), len(values[0])
+    assert len(basis) == rows + cols - 1
+    assert all((i, j) in basis for i, row in enumerate(values) for j, value in enumerate(row) if value)
+    assert isForest(buildIndex(values, basis))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_is_forest_detects_loops(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 5), rng.randint(1, 5)
+    values = [[rng.choice((0, 0, 1)) for _ in range(cols)] for _ in range(rows)]
+    nodes = DisjointSet(rows + cols)
+    loop = False
+    for i, row in enumerate(values):
+        for j, value in enumerate(row):
+            if value and not nodes.union(i, rows + j):
+                loop = True
+    assert isForest(buildIndex(values)) == (not loop)
+
+
+def test_cell_without_closed_path():
+    # (1, 1) is in a component of its own, nothing closes a path through it
+    values = [[5, 0], [0, 5]]
+    with pytest.raises(ValueError):
+        closedPath(buildIndex(values), (0, 1))
@@ -0,0 +1,98 @@
+"""
+The batch API (metodosoptimos.solve_many / iter_solve) against solving each
+instance on its own with solve_instance and against the exact optimum.
+"""
+import itertools
+import random
+
+import pytest
+
+from balancing import balance_problem
+from metodosoptimos.init import iter_solve, solve_instance, solve_many
+from mincostflow import min_cost_flow
+
+
+def random_instance(seed: int):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 6), rng.randint(1, 6)
+    instance = {
+        "costs": [[rng.randint(1, 20) for _ in range(cols)] for _ in range(rows)],
+        "supply": [rng.randint(1, 30) for _ in range(rows)],
+        "demand": [rng.randint(1, 30) for _ in range(cols)],
+    }
+    # every other one as a tuple
+    return instance if seed % 2 else (instance["costs"], instance["supply"], instance["demand"])
+
+
+def without_time(result):
+    return result._replace(wall_time=0.0)
+
+
+INSTANCES = [random_instance(seed) for seed in range(25)]
+
+
+@pytest.mark.parametrize("workers, chunksize", [(1, 16), (2, 3), (3, 1)])
+def test_same_results_as_one_by_one(workers, chunksize):
+    expected = [without_time(solve_instance(instance)) for instance in INSTANCES]
+    results = solve_many(INSTANCES, workers=workers, chunksize=chunksize)
+    assert [without_time(result) for result in results] == expected
+
+
+@pytest.mark.parametrize("optimizer", ["modi", "stepping_stone", "exact"])
+def test_results_are_optimal(optimizer):
+    for instance, result in zip(INSTANCES, solve_many(INSTANCES, optimizer=optimizer, workers=1)):
+        costs, supply, demand = instance.values() if isinstance(instance, dict) else instance
+        assert result.error is None
+        assert result.shape == (len(supply), len(demand))
+        assert result.cost == pytest.approx(min_cost_flow(*balance_problem(costs, supply, demand)).cost)
+        matrix = result.matrix()
+        assert all(sum(row) <= amount for row, amount in zip(matrix, supply))
+        assert all(sum(column) <= amount for column, amount in zip(zip(*matrix), demand))
+
+
+def test_bad_instances_do_not_stop_the_batch():
+    good = INSTANCES[1]
+    instances = [
+        good,
+        {"costs": [[1, 2]], "supply": [5, 5], "demand": [5, 5]},
+        {"supply": [1, 2], "demand": [3]},
+        42,
+        good,
+    ]
+    results = solve_many(instances, workers=2, chunksize=2)
+
+    assert [result.error is None for result in results] == [True, False, False, False, True]
+    assert results[1].shape == (2, 2)
+    assert results[2].shape == (2, 1)
+    assert results[3].shape == (0, 0)
+    assert all(result.cost is None and result.allocation == [] for result in results[1:4])
+    assert without_time(results[4]) == without_time(results[0])
+
+
+@pytest.mark.parametrize("costs", [[[1]], [[1], [2, 3]], [[1, 2], [3, 4]], []])
+def test_costs_must_match_supply_and_demand(costs):
+    result = solve_instance({"costs": costs, "supply": [1, 2], "demand": [3]})
+    assert result.error.startswith("ValueError")
+    assert result.shape == (2, 1)
+
+
+def test_instances_are_read_lazily():
+    read = itertools.count()
+
+    def instances():
+        for seed in itertools.count():
+            next(read)
+            yield random_instance(seed)
+
+    results = iter_solve(instances(), workers=2, chunksize=4)
+    first = next(results)
+    results.close()
+    assert first.error is None
+    # two chunks per worker in flight and the one sent after the first result
+    assert next(read) <= (2 * 2 + 1) * 4 + 1
+
+
+@pytest.mark.parametrize("initial, optimizer", [("simplex", "modi"), ("vogel", "newton")])
+def test_unknown_methods(initial, optimizer):
+    with pytest.raises(ValueError):
+        solve_many(INSTANCES, initial, optimizer)
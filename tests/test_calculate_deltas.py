@@ -0,0 +1,123 @@
+"""
+Vectorized reduced costs of the classic DIMO engine (calculate_deltas and the
+entering cell) against the loop over every cell it replaced, at every iteration
+of the solve.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from dimo.init import DIMO
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+
+
+def baseline_deltas(dimo):
+    """The cell by cell loop: None on the basic cells, the first most negative delta enters"""
+    deltas = [[None] * dimo.num_cols for _ in range(dimo.num_rows)]
+    for i in range(dimo.num_rows):
+        for j in range(dimo.num_cols):
+            if (i, j) not in dimo.basis:
+                deltas[i][j] = dimo.cost_matrix[i][j] - dimo.u_values[i] - dimo.v_values[j]
+    min_delta, min_pos = float("inf"), None
+    for i in range(dimo.num_rows):
+        for j in range(dimo.num_cols):
+            if deltas[i][j] is not None and deltas[i][j] < min_delta:
+                min_delta, min_pos = deltas[i][j], (i, j)
+    return deltas, (min_pos if min_delta < 0 else None)
+
+
+class RecordingDIMO(DIMO):
+    """DIMO keeping the vectorized deltas and the loop ones of every iteration"""
+
+    def calculate_deltas(self):
+        super().calculate_deltas()
+        self.records.append((self.deltas.copy(), self.entering, *baseline_deltas(self)))
+
+
+def random_problem(seed: int, fractional: bool = False, unbalanced: bool = False):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 8), rng.randint(1, 8)
+    top = rng.choice([4, 50])
+    cost = (lambda: rng.randint(1, 4 * top) / 4) if fractional else (lambda: rng.randint(1, top))
+    costs = [[cost() for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(1, 30) for _ in range(rows)]
+    demand = [rng.randint(1, 30) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if not unbalanced:
+        if gap > 0:
+            demand[-1] += gap
+        else:
+            supply[-1] -= gap
+    elif gap == 0:
+        supply[0] += 1
+    return costs, supply, demand
+
+
+def start(supply, demand):
+    """Northwest corner with the dummy line of an unbalanced problem, if any"""
+    cells = northwest_corner(supply, demand)
+    rows = max(len(supply), 1 + max(i for i, _, _ in cells))
+    cols = max(len(demand), 1 + max(j for _, j, _ in cells))
+    allocation = [[0] * cols for _ in range(rows)]
+    for i, j, amount in cells:
+        allocation[i][j] = amount
+    return allocation
+
+
+@pytest.mark.parametrize("unbalanced", [False, True])
+@pytest.mark.parametrize("fractional", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_every_iteration_matches_the_loop(seed, fractional, unbalanced):
+    costs, supply, demand = random_problem(seed, fractional, unbalanced)
+    dimo = RecordingDIMO(costs, start(supply, demand))
+    dimo.records = []
+    _, cost = dimo.solve(trace="none")
+
+    assert dimo.records
+    for deltas, entering, expected, expected_entering in dimo.records:
+        assert entering == expected_entering
+        for i, row in enumerate(expected):
+            for j, value in enumerate(row):
+                assert deltas[i, j] == (0 if value is None else value)
+    assert dimo.records[-1][1] is None and dimo.is_optimal()
+
+    padded_supply = supply + [sum(demand) - sum(supply)] * (sum(demand) > sum(supply))
+    padded_demand = demand + [sum(supply) - sum(demand)] * (sum(supply) > sum(demand))
+    padded = np.zeros((len(padded_supply), len(padded_demand)))
+    padded[:len(supply), :len(demand)] = costs
+    assert cost == pytest.approx(min_cost_flow(padded.tolist(), padded_supply, padded_demand).cost)
+
+
+def test_ties_enter_in_row_major_order():
+    dimo = DIMO([[5, 1, 1], [1, 5, 5]], [[2, 1, 0], [0, 1, 2]])
+    dimo.u_values, dimo.v_values = [0, 0], [5, 5, 5]
+    dimo.calculate_deltas()
+    # every cell off the basis has delta -4, the first of them enters
+    assert dimo.entering == (0, 2) == baseline_deltas(dimo)[1]
+    assert dimo.deltas.tolist() == [[0, 0, -4], [-4, 0, 0]]
+
+
+def test_replaced_costs_are_read_again():
+    costs, supply, demand = random_problem(3)
+    dimo = DIMO(costs, start(supply, demand))
+    dimo.calculate_uv_values()
+    dimo.calculate_deltas()
+
+    dimo.cost_matrix = [[value + 7 for value in row] for row in costs]
+    dimo.calculate_deltas()
+    deltas, entering = baseline_deltas(dimo)
+    assert dimo.entering == entering
+    assert dimo.deltas.tolist() == [[0 if value is None else value for value in row] for row in deltas]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_tree_engine_leaves_masked_deltas(seed):
+    costs, supply, demand = random_problem(seed)
+    dimo = DIMO(costs, start(supply, demand))
+    dimo.solve(engine="tree", trace="none")
+
+    assert dimo.entering is None and dimo.is_optimal()
+    deltas, _ = baseline_deltas(dimo)
+    assert dimo.deltas.tolist() == [[0 if value is None else value for value in row] for row in deltas]
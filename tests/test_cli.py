@@ -0,0 +1,81 @@
+"""
+The headless command line (python -m metodosoptimos solve) against solving the
+same instances with metodosoptimos.solve_instance.
+"""
+import io
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from metodosoptimos.__main__ import main
+from metodosoptimos.init import solve_instance
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def random_instance(seed: int) -> dict:
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 5), rng.randint(1, 5)
+    return {
+        "costs": [[rng.randint(1, 20) for _ in range(cols)] for _ in range(rows)],
+        "supply": [rng.randint(1, 30) for _ in range(rows)],
+        "demand": [rng.randint(1, 30) for _ in range(cols)],
+    }
+
+
+INSTANCES = [random_instance(seed) for seed in range(8)]
+
+
+def expected(instances, initial="vogel", optimizer="modi"):
+    records = []
+    for result in (solve_instance(instance, initial, optimizer) for instance in instances):
+        records.append((result.cost, result.iterations, [list(cell) for cell in result.allocation], result.error))
+    return records
+
+
+def records(output: str):
+    lines = [json.loads(line) for line in output.splitlines()]
+    assert [line["index"] for line in lines] == list(range(len(lines)))
+    return [(line["cost"], line["iterations"], line["allocation"], line["error"]) for line in lines]
+
+
+@pytest.mark.parametrize("layout", ["lines", "list"])
+def test_file_input(tmp_path, capsys, layout):
+    path = tmp_path / "instances.json"
+    if layout == "lines":
+        path.write_text("\n".join(json.dumps(instance) for instance in INSTANCES) + "\n\n")
+    else:
+        path.write_text(json.dumps(INSTANCES, indent=1))
+
+    assert main(["solve", str(path), "--initial", "russell", "--optimizer", "stepping_stone"]) == 0
+    assert records(capsys.readouterr().out) == expected(INSTANCES, "russell", "stepping_stone")
+
+
+def test_standard_input_and_workers(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(instance) + "\n" for instance in INSTANCES)))
+    assert main(["solve", "-", "--workers", "2", "--chunksize", "3"]) == 0
+    assert records(capsys.readouterr().out) == expected(INSTANCES)
+
+
+def test_failed_instance_sets_the_exit_status(tmp_path, capsys):
+    path = tmp_path / "instances.jsonl"
+    bad = {"costs": [[1]], "supply": [1, 2], "demand": [3]}
+    path.write_text("\n".join(json.dumps(instance) for instance in [INSTANCES[0], bad, INSTANCES[1]]))
+
+    assert main(["solve", str(path)]) == 1
+    output = records(capsys.readouterr().out)
+    assert output[0] == expected(INSTANCES[:1])[0]
+    assert output[1][3] is not None
+    assert output[2] == expected(INSTANCES[1:2])[0]
+
+
+def test_module_entry_point():
+    process = subprocess.run(
+        [sys.executable, "-m", "metodosoptimos", "solve"],
+        input=json.dumps(INSTANCES[0]), capture_output=True, text=True, cwd=ROOT, check=True,
+    )
+    assert records(process.stdout) == expected(INSTANCES[:1])
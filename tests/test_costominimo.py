@@ -0,0 +1,104 @@
+"""
+The sorted, block and sparse least cost methods against the full rescan of
+costominimo.metodo_costo_minimo_gui: same cells, same amounts, same order.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from costominimo import (
+    metodo_costo_minimo_bloques,
+    metodo_costo_minimo_disperso,
+    metodo_costo_minimo_gui,
+    metodo_costo_minimo_ordenado,
+)
+from sparse import SparseCosts
+
+
+def random_problem(seed: int, balanced: bool = True, fractional: bool = False):
+    """Few distinct costs so the tie rule (row, then column) decides often"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 8), rng.randint(1, 8)
+    costs = [[rng.randint(1, 5) for _ in range(cols)] for _ in range(rows)]
+    if fractional:
+        costs = [[cost / 4 for cost in row] for row in costs]
+    supply = [rng.choice((5, 10, 20)) for _ in range(rows)]
+    demand = [rng.choice((5, 10, 20)) for _ in range(cols)]
+    if balanced:
+        gap = sum(supply) - sum(demand)
+        if gap > 0:
+            demand[-1] += gap
+        else:
+            supply[-1] -= gap
+    return costs, supply, demand
+
+
+def reference(costs, supply, demand):
+    """(steps, cells in allocation order, total cost) of the full rescan"""
+    steps, total = metodo_costo_minimo_gui(list(supply), list(demand), costs)
+    cells, previous = [], np.zeros_like(steps[-1][2])
+    for _, _, allocation in steps:
+        (i,), (j,) = np.nonzero(allocation != previous)
+        cells.append((i.item(), j.item(), allocation[i, j].item()))
+        previous = allocation
+    return steps, cells, total
+
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("balanced", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sorted_matches_every_step(seed, balanced):
+    costs, supply, demand = random_problem(seed, balanced, fractional=seed % 3 == 0)
+    steps, _, total = reference(costs, supply, demand)
+
+    for block in (1, 3, 4096):
+        result, result_total = metodo_costo_minimo_ordenado(list(supply), list(demand), costs, bloque=block)
+        assert result_total == total
+        assert len(result) == len(steps)
+        for (offer, demand_left, allocation), expected in zip(result, steps):
+            assert offer == list(expected[0])
+            assert demand_left == list(expected[1])
+            assert (allocation == expected[2]).all()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sorted_without_steps_keeps_the_final_state(seed):
+    costs, supply, demand = random_problem(seed, False)
+    steps, _, total = reference(costs, supply, demand)
+    result, result_total = metodo_costo_minimo_ordenado(list(supply), list(demand), costs, guardar_pasos=False)
+    assert result_total == total
+    assert len(result) == 1
+    assert (result[0][2] == steps[-1][2]).all()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_blocks_match_the_allocation_order(seed):
+    costs, supply, demand = random_problem(seed, fractional=seed % 3 == 0)
+    _, cells, total = reference(costs, supply, demand)
+
+    for block in (1, 2, 5, 1 << 20):
+        for matrix in (costs, np.array(costs)):
+            allocations, allocated_cost = metodo_costo_minimo_bloques(list(supply), list(demand), matrix, bloque=block)
+            assert allocations == cells
+            assert allocated_cost == pytest.approx(total)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sparse_on_every_lane_matches_the_allocation_order(seed):
+    costs, supply, demand = random_problem(seed)
+    _, cells, total = reference(costs, supply, demand)
+
+    for block in (1, 4096):
+        allocations, allocated_cost = metodo_costo_minimo_disperso(
+            supply, demand, SparseCosts.from_dense(costs), bloque=block
+        )
+        assert allocations == cells
+        assert allocated_cost == total
+
+
+def test_blocks_reject_mismatched_amounts():
+    with pytest.raises(ValueError):
+        metodo_costo_minimo_bloques([1, 1], [2], [[1, 2]])
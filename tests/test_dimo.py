@@ -0,0 +1,96 @@
+"""
+Degenerate solutions in DIMO: remove_degeneracy against a spanning tree check
+done from scratch, the classic engine on degenerate starts against the exact
+optimum (no epsilon left in the allocation), and the deprecated num_allocated.
+"""
+import random
+import warnings
+
+import pytest
+
+from dimo.disjointset import DisjointSet
+from dimo.init import DIMO
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+
+
+def degenerate_problem(seed: int):
+    """Equal supplies and demands in multiples of them: the staircase hits row and column ends together"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 6), rng.randint(1, 6)
+    costs = [[rng.randint(1, 20) for _ in range(cols)] for _ in range(rows)]
+    unit = rng.randint(1, 10)
+    supply = [unit] * rows
+    demand = [0] * cols
+    for _ in range(rows):
+        demand[rng.randrange(cols)] += unit
+    allocation = [[0] * cols for _ in range(rows)]
+    for i, j, amount in northwest_corner(supply, demand):
+        allocation[i][j] = amount
+    return costs, supply, demand, allocation
+
+
+def is_spanning_tree(basis, rows, cols):
+    nodes = DisjointSet(rows + cols)
+    return len(basis) == rows + cols - 1 and all(nodes.union(i, rows + j) for i, j in basis)
+
+
+SEEDS = range(60)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_remove_degeneracy_completes_a_spanning_tree(seed):
+    costs, _, _, allocation = degenerate_problem(seed)
+    dimo = DIMO(costs, allocation)
+    allocated = set(dimo.basis)
+
+    dimo.remove_degeneracy()
+    assert allocated <= dimo.basis
+    assert is_spanning_tree(dimo.basis, len(costs), len(costs[0]))
+    assert not dimo.is_degenerate()
+    assert dimo.allocation_matrix == allocation
+
+
+def test_loop_is_left_alone():
+    dimo = DIMO([[1, 2, 3], [4, 5, 6]], [[1, 1, 0], [1, 1, 0]])
+    dimo.remove_degeneracy()
+    assert dimo.basis == {(0, 0), (0, 1), (1, 0), (1, 1)}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_degenerate_starts_reach_the_optimum(seed):
+    costs, supply, demand, allocation = degenerate_problem(seed)
+    result, cost = DIMO(costs, allocation).solve(trace="none")
+
+    assert cost == min_cost_flow(costs, supply, demand).cost
+    # exact amounts, no epsilon residue anywhere
+    assert all(isinstance(value, int) and value >= 0 for row in result for value in row)
+    assert [sum(row) for row in result] == supply
+    assert [sum(column) for column in zip(*result)] == demand
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_tree_engine_agrees_on_degenerate_starts(seed):
+    costs, supply, demand, allocation = degenerate_problem(seed)
+    classic = DIMO(costs, allocation).solve(trace="none")
+    tree = DIMO(costs, allocation).solve(engine="tree", trace="none")
+    assert tree[1] == classic[1]
+
+
+def test_num_allocated_is_deprecated():
+    costs, _, _, allocation = degenerate_problem(1)
+    with pytest.warns(DeprecationWarning):
+        dimo = DIMO(costs, allocation, num_allocated=99)
+    assert dimo.num_allocated == len(dimo.basis)
+    with pytest.warns(DeprecationWarning):
+        dimo.num_allocated = 99
+    assert dimo.num_allocated == len(dimo.basis)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        DIMO(costs, allocation)
+
+
+def test_allocation_must_fit_the_costs():
+    with pytest.raises(ValueError):
+        DIMO([[1, 2], [3, 4]], [[1, 0, 0, 0], [0, 1, 0, 0]])
@@ -0,0 +1,98 @@
+"""
+Integer exact arithmetic (exactint): costs around 10**16, where float64 can no
+longer tell consecutive integers apart, must give the exact optimum. Adding the
+same base to every cost adds base * total amount to any solution, so the exact
+optimum of the shifted problem is known from the one of the small costs.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from costominimo import metodo_costo_minimo_gui
+from exactint import INT64_MAX, amount_dtype, check_int64, potential_dtype, total_cost
+from metodosoptimos.init import INITIAL_METHODS, solve_instance
+from mincostflow import min_cost_flow
+
+BASE = 10 ** 16
+
+
+def shifted_problem(seed: int):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 5), rng.randint(1, 5)
+    small = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(1, 20) for _ in range(rows)]
+    demand = [rng.randint(1, 20) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    costs = [[BASE + cost for cost in row] for row in small]
+    return small, costs, supply, demand
+
+
+def exact_optimum(small, supply, demand):
+    return BASE * sum(supply) + min_cost_flow(small, supply, demand).cost
+
+
+def test_base_is_beyond_float64():
+    assert float(BASE + 1) == float(BASE)
+
+
+@pytest.mark.parametrize("optimizer", ["modi", "exact", "stepping_stone"])
+@pytest.mark.parametrize("seed", range(25))
+def test_optimizers_stay_exact(seed, optimizer):
+    small, costs, supply, demand = shifted_problem(seed)
+    result = solve_instance((costs, supply, demand), "vogel", optimizer)
+
+    assert result.error is None
+    assert int(result.cost) == result.cost == exact_optimum(small, supply, demand)
+    assert all(isinstance(amount, (int, np.integer)) for _, _, amount in result.allocation)
+    assert sum(amount * costs[i][j] for i, j, amount in result.allocation) == result.cost
+
+
+@pytest.mark.parametrize("initial", INITIAL_METHODS)
+@pytest.mark.parametrize("seed", range(10))
+def test_initial_methods_stay_exact(seed, initial):
+    small, costs, supply, demand = shifted_problem(seed)
+    result = solve_instance((costs, supply, demand), initial, "none")
+    small_cost = sum(amount * small[i][j] for i, j, amount in result.allocation)
+    assert result.cost == BASE * sum(supply) + small_cost
+
+
+def test_least_cost_total_is_exact():
+    small, costs, supply, demand = shifted_problem(3)
+    steps, cost = metodo_costo_minimo_gui(list(supply), list(demand), costs)
+    allocation = steps[-1][2]
+    assert cost == sum(int(allocation[i][j]) * costs[i][j] for i in range(len(costs)) for j in range(len(costs[0])))
+
+
+def test_total_cost_beyond_int64():
+    allocation = np.array([[3, 0], [0, 2]], dtype=np.int64)
+    costs = [[2 ** 62, 1], [1, 2 ** 62]]
+    assert total_cost(allocation, costs) == 5 * 2 ** 62
+    assert total_cost(allocation, [[2, 1], [1, 3]]) == 12
+
+
+@pytest.mark.parametrize("optimizer", ["modi", "exact"])
+@pytest.mark.parametrize("costs", [[[2 ** 61, 1], [1, 1]], [[2 ** 70, 1], [1, 1]]])
+def test_overflow_is_reported(costs, optimizer):
+    result = solve_instance((costs, [1, 1], [1, 1]), "nwcm", optimizer)
+    assert result.error.startswith("OverflowError")
+
+
+def test_dtypes():
+    assert potential_dtype(np.array([1, 2]), 4) is np.int64
+    assert potential_dtype(np.array([1.5, 2]), 4) is np.float64
+    assert potential_dtype(np.array([0.5, 2 ** 70], dtype=object), 4) is np.float64
+    with pytest.raises(OverflowError):
+        potential_dtype(np.array([1, 2 ** 70], dtype=object), 4)
+
+    assert amount_dtype([1, 2], [3]) is np.int64
+    assert amount_dtype([1.5, 1.5], [3]) is np.float64
+    with pytest.raises(OverflowError):
+        amount_dtype([INT64_MAX, 1], [INT64_MAX, 1])
+    check_int64(INT64_MAX // 16, 2)
+    with pytest.raises(OverflowError):
+        check_int64(INT64_MAX // 15, 2)
@@ -0,0 +1,158 @@
+"""
+The initial methods of initial.py (russell, column_minimum, vogel_least_cost)
+against naive versions written here that recompute everything at every step,
+cell for cell and in the same order, with any block size.
+"""
+import random
+
+import numpy as np
+import pytest
+
+import initial
+import mav.init
+from balancing import DummyCosts, slack
+from initial import METHODS, ColumnMinimum, Russell, VogelLeastCost
+
+
+def naive_russell(costs, supply, demand):
+    supply, demand = list(supply), list(demand)
+    cells = []
+    while any(supply) and any(demand):
+        rows = [i for i, s in enumerate(supply) if s > 0]
+        cols = [j for j, d in enumerate(demand) if d > 0]
+        u = {i: max(costs[i][j] for j in cols) for i in rows}
+        v = {j: max(costs[i][j] for i in rows) for j in cols}
+        # min() keeps the first of the ties: lowest row, then lowest column
+        _, i, j = min((costs[i][j] - u[i] - v[j], i, j) for i in rows for j in cols)
+        amount = min(supply[i], demand[j])
+        cells.append((i, j, amount))
+        supply[i] -= amount
+        demand[j] -= amount
+    return cells
+
+
+def naive_column_minimum(costs, supply, demand):
+    supply, demand = list(supply), list(demand)
+    cells = []
+    for j in range(len(demand)):
+        for _, i in sorted((costs[i][j], i) for i in range(len(supply))):
+            if demand[j] <= 0:
+                break
+            if supply[i] > 0:
+                amount = min(supply[i], demand[j])
+                cells.append((i, j, amount))
+                supply[i] -= amount
+                demand[j] -= amount
+    return cells
+
+
+def naive_vogel_least_cost(costs, supply, demand):
+    supply, demand = list(supply), list(demand)
+    cells = []
+    while any(supply) and any(demand):
+        rows = [i for i, s in enumerate(supply) if s > 0]
+        cols = [j for j, d in enumerate(demand) if d > 0]
+        if len(rows) == 1 and len(cols) == 1:
+            amount = min(supply[rows[0]], demand[cols[0]])
+            cells.append((rows[0], cols[0], amount))
+            break
+        # (penalty, cheapest cost, cell) of every line with two costs or more, rows first
+        lines = []
+        if len(cols) >= 2:
+            for i in rows:
+                line = sorted((costs[i][j], j) for j in cols)
+                lines.append((line[1][0] - line[0][0], line[0][0], (i, line[0][1])))
+        if len(rows) >= 2:
+            for j in cols:
+                line = sorted((costs[i][j], i) for i in rows)
+                lines.append((line[1][0] - line[0][0], line[0][0], (line[0][1], j)))
+        penalty = max(line[0] for line in lines)
+        # min() of the tied lines keeps the first of the equally cheap ones
+        _, _, (i, j) = min((cost, k, cell) for k, (p, cost, cell) in enumerate(lines) if p == penalty)
+        amount = min(supply[i], demand[j])
+        cells.append((i, j, amount))
+        supply[i] -= amount
+        demand[j] -= amount
+    return cells
+
+
+NAIVE = {
+    "russell": naive_russell,
+    "column_minimum": naive_column_minimum,
+    "vogel_least_cost": naive_vogel_least_cost,
+}
+
+
+def random_problem(seed: int):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 8), rng.randint(1, 8)
+    # a narrow cost range gives plenty of ties
+    top = rng.choice([3, 10, 100])
+    costs = [[rng.randint(1, top) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(0, 30) for _ in range(rows)]
+    demand = [rng.randint(0, 30) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    return costs, supply, demand
+
+
+def assert_feasible(cells, supply, demand):
+    rows, cols = [0] * len(supply), [0] * len(demand)
+    for i, j, amount in cells:
+        assert amount >= 0
+        rows[i] += amount
+        cols[j] += amount
+    assert (rows, cols) == (list(supply), list(demand))
+    assert len({(i, j) for i, j, _ in cells}) == len(cells) <= len(supply) + len(demand) - 1
+
+
+SEEDS = range(80)
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_the_naive_method(seed, method):
+    costs, supply, demand = random_problem(seed)
+    before = (supply[:], demand[:])
+
+    cells = METHODS[method](costs, supply, demand)
+    assert cells == NAIVE[method](costs, supply, demand)
+    assert_feasible(cells, supply, demand)
+    assert (supply, demand) == before
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("seed", range(20))
+def test_blocks_and_array_inputs(monkeypatch, tmp_path, seed, method):
+    costs, supply, demand = random_problem(seed)
+    expected = METHODS[method](costs, supply, demand)
+
+    monkeypatch.setattr(initial, "BLOCK_CELLS", 3)
+    monkeypatch.setattr(mav.init, "BLOCK_CELLS", 3)
+    np.save(tmp_path / "costs.npy", np.array(costs))
+    for matrix in (np.array(costs), np.load(tmp_path / "costs.npy", mmap_mode="r")):
+        assert METHODS[method](matrix, np.array(supply), np.array(demand)) == expected
+
+
+@pytest.mark.parametrize("kind", [Russell, ColumnMinimum, VogelLeastCost])
+@pytest.mark.parametrize("seed", range(20))
+def test_classes_balance_with_a_dummy_line(seed, kind):
+    costs, supply, demand = random_problem(seed)
+    supply[0] += seed % 3
+    demand[-1] += seed % 2
+    padded_supply, padded_demand = slack(supply, demand)
+
+    solution = kind(costs, supply, demand)
+    allocation, cost_matrix, num_allocations = solution.get_ToOptimize()
+    if (len(padded_supply), len(padded_demand)) != (len(supply), len(demand)):
+        assert isinstance(cost_matrix, DummyCosts)
+    padded_costs = np.asarray(cost_matrix).tolist()
+    assert solution.cells == NAIVE[kind.method.__name__](padded_costs, padded_supply, padded_demand)
+    assert_feasible(solution.cells, padded_supply, padded_demand)
+    assert sum(map(sum, allocation)) == sum(padded_supply)
+    assert num_allocations == sum(amount != 0 for _, _, amount in solution.cells)
+    assert solution.total_cost == sum(padded_costs[i][j] * amount for i, j, amount in solution.cells)
+    assert solution.get_matrix_parsed()[1] == padded_costs
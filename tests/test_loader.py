@@ -0,0 +1,120 @@
+"""
+Memory mapped problems (loader.open_array / load_problem and the mmap command)
+against the same problems solved from lists in memory.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from loader import load_problem, open_array
+from metodosoptimos.__main__ import main
+from metodosoptimos.init import INITIAL_METHODS, solve_instance
+
+
+def random_problem(seed: int, balanced: bool = True):
+    rng = np.random.default_rng(seed)
+    rows, cols = (int(size) for size in rng.integers(1, 9, 2))
+    costs = rng.integers(1, 50, (rows, cols)).astype(np.int32)
+    supply = rng.integers(1, 30, rows).astype(np.int32)
+    demand = rng.integers(1, 30, cols).astype(np.int32)
+    if balanced:
+        gap = int(supply.sum() - demand.sum())
+        if gap > 0:
+            demand[-1] += gap
+        else:
+            supply[-1] -= gap
+    return costs, supply, demand
+
+
+def cells(allocation):
+    return sorted((i, j, amount) for i, j, amount in allocation if amount)
+
+
+def saved(tmp_path, problem, raw: bool):
+    paths = []
+    for name, array in zip(("costs", "supply", "demand"), problem):
+        if raw:
+            path = tmp_path / f"{name}.bin"
+            array.tofile(path)
+        else:
+            path = tmp_path / f"{name}.npy"
+            np.save(path, array)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_open_array(tmp_path, raw):
+    array = np.arange(12, dtype=np.int32).reshape(3, 4)
+    (path,) = saved(tmp_path, [array], raw)
+    shape = (3, 4) if raw else None
+
+    opened = open_array(path, "int32", shape)
+    assert isinstance(opened, np.memmap)
+    assert (opened == array).all()
+    assert (open_array(path, "int32", (3, -1)) == array).all()
+    with pytest.raises(ValueError):
+        open_array(path, "int64", (3, 4))
+    with pytest.raises(ValueError):
+        open_array(path, "int32", (4, 4))
+
+
+def test_raw_offset_and_size(tmp_path):
+    path = tmp_path / "values.bin"
+    path.write_bytes(b"v1\n" + np.arange(6, dtype=np.int16).tobytes())
+    assert open_array(str(path), "int16", offset=3).tolist() == [0, 1, 2, 3, 4, 5]
+    assert open_array(str(path), "int16", (2, -1), offset=3).tolist() == [[0, 1, 2], [3, 4, 5]]
+    with pytest.raises(ValueError):
+        open_array(str(path), "int16")
+    with pytest.raises(ValueError):
+        open_array(str(path), "int16", (4, -1), offset=3)
+    with pytest.raises(ValueError):
+        open_array(str(path), None, offset=3)
+
+
+def test_mismatched_files(tmp_path):
+    costs, supply, demand = random_problem(1)
+    paths = saved(tmp_path, (costs, supply, np.append(demand, 1).astype(np.int32)), raw=False)
+    with pytest.raises(ValueError):
+        load_problem(*paths)
+
+
+@pytest.mark.parametrize("raw", [False, True])
+@pytest.mark.parametrize("balanced", [True, False])
+@pytest.mark.parametrize("seed", range(10))
+def test_memmap_solves_like_lists(tmp_path, seed, balanced, raw):
+    problem = random_problem(seed, balanced)
+    costs, supply, demand = problem
+    paths = saved(tmp_path, problem, raw)
+    mapped = load_problem(*paths, dtype="int32" if raw else None, shape=costs.shape if raw else None)
+    assert all(isinstance(array, np.memmap) for array in mapped)
+
+    in_memory = (costs.tolist(), supply.tolist(), demand.tolist())
+    for initial in INITIAL_METHODS:
+        result = solve_instance(mapped, initial, "modi")
+        expected = solve_instance(in_memory, initial, "modi")
+        assert result.error is None
+        assert result.cost == expected.cost
+        assert result.shape == expected.shape
+        allocation = np.zeros(costs.shape, dtype=np.int64)
+        for i, j, amount in result.allocation:
+            allocation[i, j] += amount
+        assert (allocation.sum(axis=1) <= supply).all() and (allocation.sum(axis=0) <= demand).all()
+
+    for initial in INITIAL_METHODS:
+        result = solve_instance(mapped, initial, "none")
+        expected = solve_instance(in_memory, initial, "none")
+        assert cells(result.allocation) == cells(expected.allocation)
+
+
+def test_mmap_command(tmp_path, capsys):
+    costs, supply, demand = random_problem(4)
+    paths = saved(tmp_path, (costs, supply, demand), raw=True)
+    rows, cols = costs.shape
+    assert main(["mmap", *paths, "--dtype", "int32", "--shape", str(rows), "-1", "--initial", "least_cost"]) == 0
+
+    record = json.loads(capsys.readouterr().out)
+    expected = solve_instance((costs.tolist(), supply.tolist(), demand.tolist()), "least_cost")
+    assert record["error"] is None
+    assert record["cost"] == expected.cost
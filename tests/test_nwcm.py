@@ -0,0 +1,118 @@
+"""
+Northwest corner kernels (NWCM.northwest_corner_batch, its integer and exact
+fractional paths, and northwest_corner) against the textbook loop written here
+and against the NWCM class tracing every step.
+"""
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from NWCM import NWCM, northwest_corner, northwest_corner_batch, northwest_corner_sparse
+from sparse import SparseCosts
+
+
+def reference(supply, demand):
+    """Textbook northwest corner with exact amounts, the dummy line appended at the end"""
+    supply = [Fraction(str(value)) for value in supply]
+    demand = [Fraction(str(value)) for value in demand]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand.append(gap)
+    elif gap < 0:
+        supply.append(-gap)
+    cells, i, j = [], 0, 0
+    while i < len(supply) and j < len(demand):
+        amount = min(supply[i], demand[j])
+        if amount:
+            cells.append((i, j, amount))
+        supply[i] -= amount
+        demand[j] -= amount
+        # both lines move on when they run out together
+        i, j = i + (supply[i] == 0), j + (demand[j] == 0)
+    return cells
+
+
+def random_amounts(rng, size, fractional=False):
+    if fractional:
+        return [rng.randint(0, 40) / 10 for _ in range(size)]
+    return [rng.randint(0, 30) for _ in range(size)]
+
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_integer_batch_matches_the_loop(seed):
+    rng = random.Random(seed)
+    rows, cols, count = rng.randint(1, 7), rng.randint(1, 7), rng.randint(1, 6)
+    supply = [random_amounts(rng, rows) for _ in range(count)]
+    demand = [random_amounts(rng, cols) for _ in range(count)]
+
+    instance, row, col, amount = northwest_corner_batch(np.array(supply), np.array(demand))
+    assert np.issubdtype(amount.dtype, np.integer)
+    cells = list(zip(instance.tolist(), row.tolist(), col.tolist(), amount.tolist()))
+    expected = [(k, i, j, int(a)) for k in range(count) for i, j, a in reference(supply[k], demand[k])]
+    assert cells == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fractional_batch_is_exact(seed):
+    rng = random.Random(seed)
+    rows, cols, count = rng.randint(1, 6), rng.randint(1, 6), rng.randint(1, 4)
+    supply = [random_amounts(rng, rows, fractional=True) for _ in range(count)]
+    demand = [random_amounts(rng, cols, fractional=True) for _ in range(count)]
+
+    instance, row, col, amount = northwest_corner_batch(np.array(supply), np.array(demand))
+    cells = list(zip(instance.tolist(), row.tolist(), col.tolist(), amount.tolist()))
+    expected = [(k, i, j, float(a)) for k in range(count) for i, j, a in reference(supply[k], demand[k])]
+    assert cells == expected
+
+
+def test_decimals_are_left_exactly():
+    # 0.3 - 0.1 is 0.19999999999999998 in floats
+    assert northwest_corner([0.3], [0.1, 0.2]) == [(0, 0, 0.1), (0, 1, 0.2)]
+    assert northwest_corner([0.1, 0.2], [0.3]) == [(0, 0, 0.1), (1, 0, 0.2)]
+    assert northwest_corner([0.3, 0.1], [0.1, 0.3]) == [(0, 0, 0.1), (0, 1, 0.2), (1, 1, 0.1)]
+
+
+@pytest.mark.parametrize("trace", ["full", "summary", "none"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_class_matches_the_kernel(seed, trace):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 6), rng.randint(1, 6)
+    costs = [[rng.randint(1, 20) for _ in range(cols)] for _ in range(rows)]
+    supply, demand = [rng.randint(1, 30) for _ in range(rows)], [rng.randint(1, 30) for _ in range(cols)]
+    before = ([row[:] for row in costs], supply[:], demand[:])
+
+    nwcm = NWCM(costs, supply, demand, trace=trace)
+    allocation, balanced_costs, _ = nwcm.get_ToOptimize()
+    expected = [[0] * len(allocation[0]) for _ in allocation]
+    for i, j, amount in reference(supply, demand):
+        expected[i][j] = int(amount)
+    assert allocation == expected
+    assert nwcm.isNotBalanced == (sum(supply) != sum(demand))
+    assert nwcm.total_cost == sum(amount * balanced_costs[i][j]
+                                  for i, row in enumerate(allocation) for j, amount in enumerate(row))
+    assert (costs, supply, demand) == before
+
+
+def test_dummy_lines():
+    assert northwest_corner([5, 5], [4]) == [(0, 0, 4), (0, 1, 1), (1, 1, 5)]
+    assert northwest_corner([4], [2, 3]) == [(0, 0, 2), (0, 1, 2), (1, 1, 1)]
+    assert northwest_corner([0, 3], [0, 3]) == [(1, 1, 3)]
+
+
+def test_shapes():
+    with pytest.raises(ValueError):
+        northwest_corner_batch([1, 2], [3])
+    with pytest.raises(ValueError):
+        northwest_corner_batch([[1, 2]], [[1], [2]])
+    instance, row, col, amount = northwest_corner_batch(np.zeros((0, 3), dtype=int), np.zeros((0, 2), dtype=int))
+    assert instance.size == row.size == col.size == amount.size == 0
+
+    lanes = SparseCosts.from_dict({(0, 0): 1, (1, 1): 2}, (2, 2))
+    assert northwest_corner_sparse(lanes, [1, 2], [2, 1]) == northwest_corner([1, 2], [2, 1])
+    with pytest.raises(ValueError):
+        northwest_corner_sparse(lanes, [1, 2], [3])
@@ -0,0 +1,58 @@
+"""
+Seeded oracle problems (benchmarks/oracle.py) for every initial method and
+optimizer: a suboptimal or infeasible answer fails the suite.
+
+    python -m pytest tests
+"""
+import signal
+
+import pytest
+
+from benchmarks.oracle import SILENT, _alarm, check_problem, problems
+from dimo.simplex import PRICING_RULES
+from metodosoptimos.init import INITIAL_METHODS, SPARSE_INITIAL_METHODS
+
+# 12 problems go through dense / sparse, balanced / unbalanced, degenerate,
+# fractional costs and fractional amounts (see problems)
+PROBLEMS = list(problems(12, 8, 0))
+TIMEOUT = 10.0
+
+
+@pytest.fixture(autouse=True)
+def alarm():
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    yield
+    signal.signal(signal.SIGALRM, previous)
+
+
+def expected_solvers(sparse: bool):
+    """Names check_problem gives to every solver, and whether it must reach the optimum"""
+    solvers = {"exact": True}
+    for initial in SPARSE_INITIAL_METHODS if sparse else INITIAL_METHODS:
+        solvers[f"{initial} + modi"] = True
+        for pricing in PRICING_RULES[1:]:
+            solvers[f"{initial} + modi {pricing}"] = True
+        solvers[f"{initial} + none"] = False
+        if not sparse:
+            solvers[f"{initial} + stepping_stone"] = True
+            solvers[f"{initial} + dimo classic"] = True
+    return solvers
+
+
+def test_problems_cover_every_kind():
+    names = [name for name, *_ in PROBLEMS]
+    for kind in ("dense balanced", "dense unbalanced", "sparse balanced", "sparse unbalanced"):
+        assert any(name.startswith(kind) for name in names), kind
+    assert any(isinstance(costs[0][0], float) for name, costs, *_ in PROBLEMS if name.startswith("dense"))
+    for kind in ("dense", "sparse"):
+        assert any(isinstance(supply[0], float) for name, _, supply, _ in PROBLEMS if name.startswith(kind))
+
+
+@pytest.mark.parametrize("name, costs, supply, demand", PROBLEMS, ids=[name for name, *_ in PROBLEMS])
+def test_every_solver(name, costs, supply, demand):
+    outcomes = check_problem(costs, supply, demand, TIMEOUT)
+    solvers = expected_solvers(name.startswith("sparse"))
+    assert set(outcomes) == set(solvers)
+    wrong = {solver: outcome for solver, outcome in outcomes.items()
+             if outcome in SILENT or (solvers[solver] and outcome != "optimal")}
+    assert not wrong
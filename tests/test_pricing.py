@@ -0,0 +1,157 @@
+"""
+Pricing rules of dimo.simplex.TransportSimplex: every entering cell against the
+one picked by hand from the full reduced cost matrix, and the optimum of every
+rule and block / list size against mincostflow.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from dimo.init import DIMO
+from dimo.simplex import PRICING_RULES, TransportSimplex
+from metodosoptimos.init import optimize
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+from sparse import SparseCosts
+
+
+def random_problem(seed: int, size: int = 12):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, size), rng.randint(2, size)
+    costs = [[rng.randint(1, 60) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(1, 40) for _ in range(rows)]
+    demand = [rng.randint(1, 40) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    return costs, supply, demand
+
+
+def start(supply, demand):
+    allocation = [[0] * len(demand) for _ in supply]
+    for i, j, amount in northwest_corner(supply, demand):
+        allocation[i][j] = amount
+    return allocation
+
+
+def pivots(simplex):
+    """(reduced costs before the pivot, entering cell) of every pivot to the optimum"""
+    while True:
+        reduced = simplex.reduced_costs()
+        basis = set(simplex.flow)
+        if not simplex.solve(max_iterations=simplex.iterations + 1):
+            # the entering cell stays basic, the leaving one is another cell of the loop
+            (entering,) = set(simplex.flow) - basis
+            yield reduced, entering
+        else:
+            assert (reduced >= 0).all()
+            return
+
+
+SEEDS = range(30)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dantzig_enters_the_most_negative_cell(seed):
+    costs, supply, demand = random_problem(seed)
+    simplex = TransportSimplex(costs, start(supply, demand), pricing="dantzig")
+    for reduced, entering in pivots(simplex):
+        # argmin keeps the first of the ties, in row-major order
+        assert entering == np.unravel_index(reduced.argmin(), reduced.shape)
+
+
+@pytest.mark.parametrize("rows_per_block", [1, 2, 5])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_block_enters_the_best_cell_of_the_next_block(seed, rows_per_block):
+    costs, supply, demand = random_problem(seed)
+    cols = len(demand)
+    simplex = TransportSimplex(costs, start(supply, demand), pricing="block", block_cells=rows_per_block * cols)
+    next_row = 0
+    for reduced, entering in pivots(simplex):
+        blocks = list(range(next_row, len(supply), rows_per_block)) + list(range(0, next_row, rows_per_block))
+        for first in blocks:
+            block = reduced[first:first + rows_per_block]
+            next_row = 0 if first + rows_per_block >= len(supply) else first + rows_per_block
+            if block.min() < 0:
+                i, j = np.unravel_index(block.argmin(), block.shape)
+                assert entering == (first + i, j)
+                break
+        else:
+            pytest.fail("a pivot without a negative reduced cost")
+
+
+@pytest.mark.parametrize("candidates", [1, 3, None])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_candidates_enter_negative_cells(seed, candidates):
+    costs, supply, demand = random_problem(seed)
+    simplex = TransportSimplex(costs, start(supply, demand), pricing="candidates", candidates=candidates)
+    for k, (reduced, entering) in enumerate(pivots(simplex)):
+        assert reduced[entering] < 0
+        if k == 0:
+            # the first list comes from a full pricing, its best is the best of all
+            assert reduced[entering] == reduced.min()
+
+
+CASES = [("dantzig", {}), ("block", {}), ("block", {"block_cells": 1}), ("block", {"block_cells": 7}),
+         ("candidates", {}), ("candidates", {"candidates": 1}), ("candidates", {"candidates": 4})]
+
+
+@pytest.mark.parametrize("pricing, options", CASES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_every_rule_reaches_the_optimum(seed, pricing, options):
+    costs, supply, demand = random_problem(seed, size=25)
+    simplex = TransportSimplex(costs, start(supply, demand), pricing=pricing, **options)
+    assert simplex.solve()
+    assert simplex.total_cost() == min_cost_flow(costs, supply, demand).cost
+    assert (simplex.reduced_costs() >= 0).all()
+
+    stats = simplex.stats()
+    assert stats.pricing == pricing and stats.pivots == simplex.iterations
+    assert stats.pricing_time >= 0 and stats.pivot_time >= 0
+    assert stats.time_per_pivot == ((stats.pricing_time + stats.pivot_time) / stats.pivots if stats.pivots else 0)
+    if pricing == "dantzig":
+        # one full pricing per pivot and the last one that finds the optimum
+        assert stats.cells_priced == (stats.pivots + 1) * len(supply) * len(demand)
+    else:
+        # the optimum is only known after a full pricing
+        assert stats.cells_priced >= len(supply) * len(demand)
+
+
+@pytest.mark.parametrize("pricing", PRICING_RULES)
+@pytest.mark.parametrize("seed", range(15))
+def test_sparse_lanes(seed, pricing):
+    costs, supply, demand = random_problem(seed)
+    lanes = {(i, j): cost for i, row in enumerate(costs) for j, cost in enumerate(row) if (i + j) % 3}
+    lanes.update({(i, i % len(demand)): costs[i][i % len(demand)] for i in range(len(supply))})
+    lanes.update({(j % len(supply), j): costs[j % len(supply)][j] for j in range(len(demand))})
+    lanes = SparseCosts.from_dict(lanes, (len(supply), len(demand)))
+    try:
+        expected = min_cost_flow(lanes, supply, demand).cost
+    except ValueError:
+        pytest.skip("the lanes can not carry the problem")
+    simplex = TransportSimplex(lanes, northwest_corner(supply, demand), pricing=pricing, block_cells=3)
+    assert simplex.solve()
+    assert simplex.total_cost() == expected
+
+
+@pytest.mark.parametrize("pricing", PRICING_RULES)
+@pytest.mark.parametrize("seed", range(10))
+def test_dimo_and_optimize_take_the_rule(seed, pricing):
+    costs, supply, demand = random_problem(seed)
+    expected = min_cost_flow(costs, supply, demand).cost
+
+    dimo = DIMO(costs, start(supply, demand))
+    assert dimo.solve(engine="tree", trace="none", pricing=pricing)[1] == expected
+    assert dimo.simplex.stats().pricing == pricing
+    assert optimize(costs, start(supply, demand), supply, demand, "modi", pricing=pricing)[1] == expected
+
+
+def test_unknown_rule():
+    costs, supply, demand = random_problem(1)
+    with pytest.raises(ValueError):
+        TransportSimplex(costs, start(supply, demand), pricing="steepest")
+    with pytest.raises(ValueError):
+        DIMO(costs, start(supply, demand)).solve(engine="tree", trace="none", pricing="steepest")
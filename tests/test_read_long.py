@@ -0,0 +1,192 @@
+"""
+Long format problems (loader.read_long and the long command) against the matrix
+they were written from: every chunk size, blank lines between the records,
+shuffled lanes, dense and sparse layouts.
+"""
+import json
+import random
+
+import pytest
+
+from loader import read_long
+from metodosoptimos.__main__ import main
+from mincostflow import min_cost_flow
+from sparse import SparseCosts
+
+
+def random_problem(seed: int, missing: float = 0.0):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 7), rng.randint(1, 7)
+    costs = [[rng.randint(1, 40) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(1, 30) for _ in range(rows)]
+    demand = [rng.randint(1, 30) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    lanes = {(i, j): costs[i][j] for i in range(rows) for j in range(cols) if rng.random() >= missing}
+    return costs, supply, demand, lanes
+
+
+def write(path, header, records, rng=None):
+    lines = [",".join(str(value) for value in record) for record in records]
+    if rng is not None:
+        lines = [line + "\n" * rng.randint(1, 3) for line in lines]
+    else:
+        lines = [line + "\n" for line in lines]
+    path.write_text(",".join(header) + "\n" + "".join(lines), encoding="utf-8")
+    return str(path)
+
+
+def written(tmp_path, seed, supply, demand, lanes, blank_lines=False):
+    """Files of the problem, rows labelled o<k> and columns d<k>, lanes in random order"""
+    rng = random.Random(seed + 1000)
+    cells = list(lanes.items())
+    rng.shuffle(cells)
+    blanks = rng if blank_lines else None
+    return (
+        write(tmp_path / "costs.csv", ["origin", "destination", "cost"],
+              [(f"o{i}", f"d{j}", cost) for (i, j), cost in cells], blanks),
+        write(tmp_path / "supply.csv", ["origin", "supply"], [(f"o{i}", a) for i, a in enumerate(supply)], blanks),
+        write(tmp_path / "demand.csv", ["destination", "demand"], [(f"d{j}", b) for j, b in enumerate(demand)], blanks),
+    )
+
+
+SEEDS = range(20)
+
+
+@pytest.mark.parametrize("blank_lines", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_complete_problems_read_as_the_matrix(tmp_path, seed, chunk_size, blank_lines):
+    costs, supply, demand, lanes = random_problem(seed)
+    paths = written(tmp_path, seed, supply, demand, lanes, blank_lines)
+
+    problem = read_long(*paths, chunk_size=chunk_size)
+    assert problem.costs == costs
+    assert (problem.supply, problem.demand) == (supply, demand)
+    assert problem.origins == [f"o{i}" for i in range(len(supply))]
+    assert problem.destinations == [f"d{j}" for j in range(len(demand))]
+
+    sparse = read_long(*paths, dense=False, chunk_size=chunk_size).costs
+    assert isinstance(sparse, SparseCosts)
+    assert sparse.toarray().tolist() == costs
+
+
+@pytest.mark.parametrize("chunk_size", [1, 1 << 20])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_missing_lanes_read_as_sparse(tmp_path, seed, chunk_size):
+    costs, supply, demand, lanes = random_problem(seed, missing=0.4)
+    paths = written(tmp_path, seed, supply, demand, lanes)
+    shape = (len(supply), len(demand))
+
+    problem = read_long(*paths, chunk_size=chunk_size)
+    if len(lanes) == shape[0] * shape[1]:
+        assert problem.costs == costs
+        return
+    assert isinstance(problem.costs, SparseCosts)
+    assert problem.costs.toarray().tolist() == SparseCosts.from_dict(lanes, shape).toarray().tolist()
+    with pytest.raises(ValueError):
+        read_long(*paths, dense=True)
+
+
+def test_numbers(tmp_path):
+    paths = written(tmp_path, 0, [2, 3], [5], {(0, 0): 1, (1, 0): 2})
+    problem = read_long(*paths)
+    assert all(isinstance(value, int) for value in problem.supply + problem.demand + sum(problem.costs, []))
+
+    paths = written(tmp_path, 0, [2, 3], [5], {(0, 0): 1.5, (1, 0): 2})
+    problem = read_long(*paths)
+    assert problem.costs == [[1.5], [2.0]]
+    assert isinstance(problem.supply[0], int)
+
+
+def test_labels_keep_the_supply_and_demand_order(tmp_path):
+    costs = write(tmp_path / "costs.csv", ["destination", "cost", "origin"],
+                  [("east", 3, "b"), ("west", 1, "a"), ("east", 2, "a"), ("west", 4, "b")])
+    supply = write(tmp_path / "supply.csv", ["supply", "origin"], [(7, "b"), (5, "a")])
+    demand = write(tmp_path / "demand.csv", ["destination", "demand"], [("west", 8), ("east", 4)])
+
+    problem = read_long(costs, supply, demand)
+    assert problem.origins == ["b", "a"] and problem.destinations == ["west", "east"]
+    assert problem.costs == [[4, 3], [1, 2]]
+    assert (problem.supply, problem.demand) == ([7, 5], [8, 4])
+
+
+@pytest.mark.parametrize("broken", ["unknown origin", "unknown destination", "repeated lane", "repeated label",
+                                    "missing column"])
+def test_errors(tmp_path, broken):
+    costs, supply, demand, lanes = random_problem(3)
+    costs_path, supply_path, demand_path = written(tmp_path, 3, supply, demand, lanes)
+    records = [(f"o{i}", f"d{j}", cost) for (i, j), cost in lanes.items()]
+    if broken == "unknown origin":
+        write(tmp_path / "costs.csv", ["origin", "destination", "cost"], records + [("nowhere", "d0", 1)])
+    elif broken == "unknown destination":
+        write(tmp_path / "costs.csv", ["origin", "destination", "cost"], records + [("o0", "nowhere", 1)])
+    elif broken == "repeated lane":
+        write(tmp_path / "costs.csv", ["origin", "destination", "cost"], records + [records[0]])
+    elif broken == "repeated label":
+        write(tmp_path / "supply.csv", ["origin", "supply"], [(f"o{i}", a) for i, a in enumerate(supply)] + [("o0", 1)])
+    else:
+        write(tmp_path / "costs.csv", ["origin", "destination", "price"], records)
+
+    with pytest.raises(ValueError):
+        read_long(costs_path, supply_path, demand_path)
+
+
+def test_parquet_needs_pyarrow(tmp_path):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        pytest.skip("pyarrow is installed")
+    _, supply_path, demand_path = written(tmp_path, 1, [1], [1], {(0, 0): 1})
+    with pytest.raises(ImportError):
+        read_long(str(tmp_path / "costs.parquet"), supply_path, demand_path)
+
+
+def test_progress(tmp_path):
+    costs, supply, demand, lanes = random_problem(5)
+    paths = written(tmp_path, 5, supply, demand, lanes, blank_lines=True)
+    calls = []
+    read_long(*paths, chunk_size=8, progress=lambda *call: calls.append(call))
+
+    for path in paths:
+        done = [call[1] for call in calls if call[0] == path]
+        total = {call[2] for call in calls if call[0] == path}
+        assert done == sorted(done) and total == {done[-1]}
+
+
+@pytest.mark.parametrize("layout", ["auto", "dense", "sparse"])
+@pytest.mark.parametrize("seed", range(5))
+def test_long_command(tmp_path, capsys, seed, layout):
+    costs, supply, demand, lanes = random_problem(seed)
+    paths = written(tmp_path, seed, supply, demand, lanes)
+    assert main(["long", *paths, "--layout", layout, "--progress"]) == 0
+
+    captured = capsys.readouterr()
+    record = json.loads(captured.out)
+    assert record["error"] is None
+    assert record["cost"] == min_cost_flow(costs, supply, demand).cost
+    assert "100%" in captured.err
+
+
+@pytest.mark.parametrize("seed", [0, 2, 6, 8])
+def test_long_command_on_missing_lanes(tmp_path, capsys, seed):
+    costs, supply, demand, lanes = random_problem(seed, missing=0.3)
+    paths = written(tmp_path, seed, supply, demand, lanes)
+    lanes = SparseCosts.from_dict(lanes, (len(supply), len(demand)))
+    assert main(["long", *paths]) == 0
+
+    record = json.loads(capsys.readouterr().out)
+    assert record["cost"] == min_cost_flow(lanes, supply, demand).cost
+    assert all((i, j) in lanes for i, j, amount in record["allocation"] if amount)
+
+
+def test_long_command_when_the_lanes_can_not_carry_the_problem(tmp_path, capsys):
+    costs, supply, demand, lanes = random_problem(1, missing=0.3)
+    paths = written(tmp_path, 1, supply, demand, lanes)
+    assert main(["long", *paths]) == 1
+    assert json.loads(capsys.readouterr().out)["error"].startswith("ValueError")
@@ -0,0 +1,153 @@
+"""
+Binary result files (results.ResultWriter / read_results and solve --binary)
+against the SolveResults they were written from, for float64 and int64 files.
+"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from metodosoptimos.__main__ import main
+from metodosoptimos.init import SolveResult, solve_instance
+from results import ResultFile, ResultWriter, read_results, write_results
+
+
+def random_instance(seed: int, fractional: bool = False) -> dict:
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 6), rng.randint(1, 6)
+    cost = (lambda: rng.randint(1, 80) / 4) if fractional else (lambda: rng.randint(1, 20))
+    return {
+        "costs": [[cost() for _ in range(cols)] for _ in range(rows)],
+        "supply": [rng.randint(1, 30) for _ in range(rows)],
+        "demand": [rng.randint(1, 30) for _ in range(cols)],
+    }
+
+
+def solved(seed: int, count: int = 12, fractional: bool = False):
+    optimizers = ["modi", "exact", "stepping_stone", "none"]
+    results = [solve_instance(random_instance(seed * 100 + k, fractional), "vogel", optimizers[k % 4])
+               for k in range(count)]
+    # a failed instance in the middle
+    results.insert(count // 2, solve_instance({"costs": [[1, 2]], "supply": [1], "demand": [1]}))
+    return results
+
+
+def assert_stored(stored, result):
+    assert stored.shape == result.shape
+    assert stored.cost == result.cost
+    assert stored.iterations == result.iterations
+    assert stored.wall_time == result.wall_time
+    assert stored.error == result.error
+    assert stored.cells.tolist() == [tuple(cell) for cell in result.allocation]
+    if result.potentials is None:
+        assert stored.u is None and stored.v is None
+    else:
+        assert (stored.u.tolist(), stored.v.tolist()) == tuple(map(list, result.potentials))
+
+
+@pytest.mark.parametrize("kind", ["f", "i"])
+@pytest.mark.parametrize("seed", range(10))
+def test_round_trip(tmp_path, seed, kind):
+    results = solved(seed)
+    path = tmp_path / "results.bin"
+    assert write_results(str(path), results, kind, initial="vogel", seed=seed) == len(results)
+
+    stored = read_results(str(path))
+    assert stored.kind == kind
+    assert len(stored) == len(results)
+    assert stored.metadata == {"initial": "vogel", "seed": seed}
+    assert stored.errors == {k: result.error for k, result in enumerate(results) if result.error}
+    for k, result in enumerate(results):
+        assert_stored(stored[k], result)
+        if kind == "i":
+            assert all(isinstance(value, int) for value in (stored[k].cost or 0, *stored[k].cells["amount"].tolist()))
+    assert_stored(stored[-1], results[-1])
+
+    cells = np.concatenate([np.full(len(result.allocation), k) for k, result in enumerate(results)])
+    assert stored.instance_of_cells().tolist() == cells.tolist()
+    assert stored.cells.size == sum(len(result.allocation) for result in results)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_from_bytes_reads_the_same(tmp_path, seed):
+    results = solved(seed, fractional=True)
+    path = tmp_path / "results.bin"
+    write_results(str(path), results)
+
+    stored = ResultFile.from_bytes(path.read_bytes())
+    for k, result in enumerate(results):
+        assert_stored(stored[k], result)
+    with pytest.raises(IndexError):
+        stored[len(results)]
+
+
+def test_integer_file_rejects_fractions_and_keeps_the_rest(tmp_path):
+    exact, fractional = solved(1, 4), solved(2, 4, fractional=True)
+    huge = SolveResult([(0, 0, 2 ** 70)], 2 ** 70, 1, 0.0, (1, 1))
+    path = tmp_path / "results.bin"
+    with ResultWriter(str(path), "i") as writer:
+        writer.write(exact[0])
+        with pytest.raises(ValueError):
+            writer.write(next(result for result in fractional if result.error is None and result.cost % 1))
+        with pytest.raises(OverflowError):
+            writer.write(huge)
+        writer.write(exact[1])
+
+    stored = read_results(str(path))
+    assert len(stored) == 2
+    assert_stored(stored[0], exact[0])
+    assert_stored(stored[1], exact[1])
+
+
+def test_float_file_keeps_fractions(tmp_path):
+    results = solved(3, fractional=True)
+    path = tmp_path / "results.bin"
+    write_results(str(path), results, "f")
+    stored = read_results(str(path))
+    for k, result in enumerate(results):
+        assert_stored(stored[k], result)
+
+
+def test_infinite_cost(tmp_path):
+    result = SolveResult([(0, 0, 3), (0, 1, 2)], float("inf"), 0, 0.5, (1, 2))
+    for kind in ("f", "i"):
+        path = tmp_path / f"results.{kind}"
+        write_results(str(path), [result], kind)
+        assert read_results(str(path))[0].cost == float("inf")
+
+
+def test_not_a_result_file(tmp_path):
+    path = tmp_path / "results.bin"
+    write_results(str(path), solved(4, 3))
+    data = path.read_bytes()
+
+    with pytest.raises(ValueError):
+        ResultFile.from_bytes(b"MOTRES")
+    with pytest.raises(ValueError):
+        ResultFile.from_bytes(b"X" + data[1:])
+    with pytest.raises(ValueError):
+        ResultFile.from_bytes(data[:-1])
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        read_results(str(empty))
+    with pytest.raises(ValueError):
+        ResultWriter(str(tmp_path / "other.bin"), "d")
+
+
+INSTANCES = [random_instance(seed) for seed in range(8)]
+
+
+@pytest.mark.parametrize("kind", ["f", "i"])
+def test_binary_output(tmp_path, kind):
+    source, target = tmp_path / "instances.jsonl", tmp_path / "results.bin"
+    source.write_text("\n".join(json.dumps(instance) for instance in INSTANCES))
+    assert main(["solve", str(source), "--binary", str(target), "--kind", kind]) == 0
+
+    stored = read_results(str(target))
+    assert len(stored) == len(INSTANCES)
+    assert stored.metadata == {"initial": "vogel", "optimizer": "modi"}
+    for index, result in enumerate(solve_instance(instance) for instance in INSTANCES):
+        assert stored[index].cost == result.cost
+        assert stored[index].cells.tolist() == [tuple(cell) for cell in result.allocation]
@@ -0,0 +1,127 @@
+"""
+The spanning tree MODI (dimo.simplex.TransportSimplex, DIMO engine="tree")
+against the exact solver mincostflow.min_cost_flow and the classic DIMO tableau.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from dimo.init import DIMO
+from dimo.simplex import TransportSimplex
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+
+
+def random_problem(seed: int, size: int = 8, fractional: bool = False):
+    """Balanced problem and its northwest corner start as a full table"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, size), rng.randint(1, size)
+    costs = [[rng.randint(1, 20) for _ in range(cols)] for _ in range(rows)]
+    if fractional:
+        costs = [[cost / 8 for cost in row] for row in costs]
+    supply = [rng.randint(1, 30) for _ in range(rows)]
+    demand = [rng.randint(1, 30) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    start = [[0] * cols for _ in range(rows)]
+    for i, j, amount in northwest_corner(supply, demand):
+        start[i][j] = amount
+    return costs, supply, demand, start
+
+
+def assert_feasible(allocation, supply, demand):
+    allocation = np.asarray(allocation)
+    assert (allocation >= 0).all()
+    assert allocation.sum(axis=1).tolist() == supply
+    assert allocation.sum(axis=0).tolist() == demand
+
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_reaches_the_exact_optimum(seed):
+    costs, supply, demand, start = random_problem(seed, fractional=seed % 4 == 0)
+    simplex = TransportSimplex(costs, start)
+
+    assert simplex.solve()
+    assert_feasible(simplex.allocation(), supply, demand)
+    assert simplex.total_cost() == pytest.approx(min_cost_flow(costs, supply, demand).cost)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_optimal_potentials(seed):
+    costs, supply, demand, start = random_problem(seed)
+    simplex = TransportSimplex(costs, start)
+    simplex.solve()
+
+    reduced = simplex.reduced_costs()
+    assert (reduced >= 0).all()
+    assert len(simplex.flow) == len(supply) + len(demand) - 1
+    for i, j in simplex.flow:
+        assert reduced[i, j] == 0
+        assert simplex.u_values[i] + simplex.v_values[j] == costs[i][j]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cycles_alternate_through_the_basis(seed):
+    costs, _, _, start = random_problem(seed)
+    simplex = TransportSimplex(costs, start)
+    for i in range(len(costs)):
+        for j in range(len(costs[0])):
+            if (i, j) in simplex.flow:
+                continue
+            cycle = simplex.find_cycle(i, j)
+            assert cycle[0] == (i, j)
+            assert len(cycle) % 2 == 0 and len(cycle) >= 4
+            assert all(cell in simplex.flow for cell in cycle[1:])
+            # every move goes along a column then a row
+            for k, (a, b) in enumerate(zip(cycle, cycle[1:] + cycle[:1])):
+                assert a[1] == b[1] if k % 2 == 0 else a[0] == b[0]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_long_cycles(seed):
+    """Problems big enough for loops far longer than the classic tableau used to find"""
+    costs, supply, demand, start = random_problem(seed, size=40)
+    simplex = TransportSimplex(np.array(costs), start)
+    assert simplex.solve()
+    assert simplex.total_cost() == min_cost_flow(costs, supply, demand).cost
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_tree_engine_matches_the_classic_one(seed):
+    costs, supply, demand, start = random_problem(seed, size=6)
+    classic = DIMO(costs, [row[:] for row in start]).solve(trace="none")
+    tree = DIMO(costs, [row[:] for row in start]).solve(engine="tree", trace="none")
+
+    assert tree[1] == pytest.approx(classic[1])
+    assert tree[1] == pytest.approx(min_cost_flow(costs, supply, demand).cost)
+    assert_feasible(tree[0], supply, demand)
+
+
+def test_degenerate_start_is_completed():
+    costs = [[1, 2, 3], [4, 1, 2], [3, 4, 1]]
+    start = [[5, 0, 0], [0, 5, 0], [0, 0, 5]]
+    simplex = TransportSimplex(costs, start)
+    assert len(simplex.flow) == 5
+    assert simplex.solve()
+    assert simplex.total_cost() == 15
+
+
+def test_iteration_limit():
+    costs, _, _, start = random_problem(1, size=20)
+    simplex = TransportSimplex(costs, start)
+    assert not simplex.solve(max_iterations=1)
+    assert simplex.iterations == 1
+    assert simplex.stats().pivots == 1
+
+
+@pytest.mark.parametrize("start", [[[1, 1], [1, 1]], [[-1, 2], [2, 0]]])
+def test_rejects_loops_and_negative_amounts(start):
+    with pytest.raises(ValueError):
+        TransportSimplex([[1, 2], [3, 4]], start)
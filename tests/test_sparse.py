@@ -0,0 +1,137 @@
+"""
+Sparse problems (sparse.SparseCosts): the CSR matrix against the dense one it
+comes from, the sparse Vogel against the dense one when every lane exists, and
+the optimum over the existing lanes against the exact solver on a dense matrix
+where the missing lanes are too expensive to use.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from mav.init import vogel_numpy, vogel_sparse
+from metodosoptimos.init import (
+    SPARSE_INITIAL_METHODS,
+    solve_instance,
+    sparse_initial_solution,
+    sparse_optimize,
+)
+from mincostflow import min_cost_flow
+from sparse import SparseCosts
+
+# Cost of a missing lane in the dense reference, more than any feasible solution
+BIG = 10 ** 6
+
+
+def random_sparse(seed: int, density: float = 0.6):
+    """Balanced problem with None on the missing lanes, every row and column keeps one lane"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 7), rng.randint(1, 7)
+    costs = [[rng.randint(1, 20) if rng.random() < density else None for _ in range(cols)] for _ in range(rows)]
+    for i in range(rows):
+        costs[i][i % cols] = costs[i][i % cols] or rng.randint(1, 20)
+    for j in range(cols):
+        costs[j % rows][j] = costs[j % rows][j] or rng.randint(1, 20)
+    supply = [rng.randint(1, 30) for _ in range(rows)]
+    demand = [rng.randint(1, 30) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    return costs, supply, demand
+
+
+def dense_reference(costs, supply, demand):
+    """Exact optimum with BIG on the missing lanes, None when the lanes can not carry the problem"""
+    matrix = [[BIG if cost is None else cost for cost in row] for row in costs]
+    solution = min_cost_flow(matrix, supply, demand)
+    if any(costs[i][j] is None for i, j, amount in solution.cells if amount):
+        return None
+    return solution.cost
+
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_lanes_match_the_dense_matrix(seed):
+    costs, _, _ = random_sparse(seed)
+    sparse = SparseCosts.from_dense(costs)
+    lanes = {(i, j): cost for i, row in enumerate(costs) for j, cost in enumerate(row) if cost is not None}
+
+    assert sparse.nnz == len(lanes)
+    for i, row in enumerate(costs):
+        for j, cost in enumerate(row):
+            assert sparse.get(i, j) == cost
+            assert ((i, j) in sparse) == (cost is not None)
+    expected = np.array([[np.inf if cost is None else cost for cost in row] for row in costs])
+    assert (sparse.toarray() == expected).all()
+    assert (SparseCosts.from_dict(lanes, sparse.shape).toarray() == expected).all()
+    assert (SparseCosts.from_dense(sparse.toarray(-1), missing=-1).toarray() == expected).all()
+
+    rows, cols = sparse.shape
+    padded_row = np.vstack([expected, np.zeros((1, cols))])
+    padded_column = np.hstack([expected, np.zeros((rows, 1))])
+    assert (sparse.with_dummy_row().toarray() == padded_row).all()
+    assert (sparse.with_dummy_column().toarray() == padded_column).all()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_vogel_over_every_lane_matches_the_dense_one(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 7), rng.randint(1, 7)
+    costs = [[rng.randint(1, 6) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.choice((5, 10, 15)) for _ in range(rows)]
+    demand = [rng.choice((5, 10, 15)) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+
+    sparse = vogel_sparse(SparseCosts.from_dense(costs), supply, demand)
+    dense = vogel_numpy(costs, supply, demand)
+    assert sorted(sparse[0]) == sorted(dense[0])
+
+
+@pytest.mark.parametrize("method", SPARSE_INITIAL_METHODS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_optimum_uses_only_existing_lanes(seed, method):
+    costs, supply, demand = random_sparse(seed)
+    sparse = SparseCosts.from_dense(costs)
+    expected = dense_reference(costs, supply, demand)
+
+    start = sparse_initial_solution(sparse, supply, demand, method)
+    if expected is None:
+        with pytest.raises(ValueError):
+            sparse_optimize(sparse, start, supply, demand)
+        return
+    cells, cost, _ = sparse_optimize(sparse, start, supply, demand)
+    assert cost == expected
+    assert all((i, j) in sparse for i, j, amount in cells if amount)
+    flow = np.zeros(sparse.shape)
+    for i, j, amount in cells:
+        flow[i, j] += amount
+    assert flow.sum(axis=1).tolist() == supply
+    assert flow.sum(axis=0).tolist() == demand
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_arcs_instances(seed):
+    costs, supply, demand = random_sparse(seed)
+    arcs = [[i, j, cost] for i, row in enumerate(costs) for j, cost in enumerate(row) if cost is not None]
+    result = solve_instance({"arcs": arcs, "supply": supply, "demand": demand})
+    expected = dense_reference(costs, supply, demand)
+    if expected is None:
+        assert result.error is not None
+    else:
+        assert result.error is None
+        assert result.cost == expected
+        assert all(costs[i][j] is not None for i, j, _ in result.allocation)
+
+
+@pytest.mark.parametrize("lanes", [([0, 0], [0, 0], [1, 2]), ([0], [5], [1])])
+def test_bad_lanes(lanes):
+    with pytest.raises(ValueError):
+        SparseCosts.from_arcs(*lanes, (2, 2))
@@ -0,0 +1,33 @@
+"""
+Importing a solver module must not load numpy, tkinter or PIL until a method
+needs them (the budgets of benchmarks/startup.py depend on it). Each import is
+checked in a fresh interpreter, the times are left to the benchmark.
+"""
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.startup import ENTRY_POINTS, ROOT, measure
+
+# What each entry point is allowed to load, everything else stays lazy
+ALLOWED = {"dimo.simplex": ["numpy"], "menu": ["tkinter"]}
+
+
+@pytest.mark.parametrize("module", [module for module, _ in ENTRY_POINTS])
+def test_no_heavy_module_on_import(module):
+    _, heavy = measure(module, 1)
+    assert heavy == ALLOWED.get(module, [])
+
+
+LAZY_CALLS = [
+    "from NWCM import northwest_corner; assert northwest_corner([5, 5], [4, 6]) == [(0, 0, 4), (0, 1, 1), (1, 1, 5)]",
+    "from costominimo import metodo_costo_minimo_gui; assert metodo_costo_minimo_gui([5], [5], [[1]])[1] == 5",
+    "from mav.init import MAV; assert MAV(1, 1, [[2]], [3], [3]).solve(engine='numpy', trace='none')[0]",
+    "from metodosoptimos.init import solve_instance; assert solve_instance(([[1, 2], [3, 1]], [5, 5], [5, 5])).cost == 10",
+]
+
+
+@pytest.mark.parametrize("code", LAZY_CALLS)
+def test_lazy_imports_load_on_first_call(code):
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
@@ -0,0 +1,84 @@
+"""
+Incremental stepping stone (banquillo.getTotalIncremental) against the full
+evaluation of banquillo.getTotal and the exact optimum of mincostflow, on
+degenerate starts too.
+"""
+import copy
+import random
+
+import pytest
+
+from banquillo import getTotal
+from balancing import balance_problem
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+
+
+def random_problem(seed: int, balanced: bool = True, degenerate: bool = False):
+    """Costs, supply, demand and the northwest corner start (with its dummy line when unbalanced)"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 6), rng.randint(1, 6)
+    costs = [[rng.randint(1, 15) for _ in range(cols)] for _ in range(rows)]
+    if degenerate:
+        # equal amounts: the staircase runs out of a row and a column together
+        supply, demand = [10] * rows, [10] * cols
+    else:
+        supply = [rng.randint(1, 30) for _ in range(rows)]
+        demand = [rng.randint(1, 30) for _ in range(cols)]
+    if balanced:
+        gap = sum(supply) - sum(demand)
+        if gap > 0:
+            demand[-1] += gap
+        else:
+            supply[-1] -= gap
+    _, full_supply, full_demand = balance_problem(costs, supply, demand)
+    start = [[0] * len(full_demand) for _ in full_supply]
+    for i, j, amount in northwest_corner(supply, demand):
+        start[i][j] = amount
+    return costs, supply, demand, start
+
+
+def optimum(costs, supply, demand):
+    return min_cost_flow(*balance_problem(costs, supply, demand)).cost
+
+
+CASES = [(seed, balanced, degenerate) for seed in range(30)
+         for balanced in (True, False) for degenerate in (False, True)]
+
+
+@pytest.mark.parametrize("seed, balanced, degenerate", CASES)
+def test_incremental_takes_the_same_steps(seed, balanced, degenerate):
+    costs, supply, demand, start = random_problem(seed, balanced, degenerate)
+    full, incremental = copy.deepcopy(start), copy.deepcopy(start)
+
+    total, steps = getTotal(costs, full, supply, demand)
+    incremental_total, incremental_steps = getTotal(costs, incremental, supply, demand, incremental=True)
+
+    assert incremental_total == total
+    assert incremental == full
+    assert [step[:2] for step in incremental_steps] == [step[:2] for step in steps]
+
+
+@pytest.mark.parametrize("seed, balanced, degenerate", CASES)
+def test_reaches_the_exact_optimum(seed, balanced, degenerate):
+    costs, supply, demand, start = random_problem(seed, balanced, degenerate)
+    for incremental in (False, True):
+        allocation = copy.deepcopy(start)
+        total, _ = getTotal(costs, allocation, supply, demand, incremental=incremental)
+        assert total == optimum(costs, supply, demand)
+        assert all(value >= 0 for row in allocation for value in row)
+        _, full_supply, full_demand = balance_problem(costs, supply, demand)
+        assert [sum(row) for row in allocation] == list(full_supply)
+        assert [sum(column) for column in zip(*allocation)] == list(full_demand)
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_single_row_is_optimal_as_it_is(incremental):
+    total, steps = getTotal([[3, 1, 2]], [[4, 5, 6]], [15], [4, 5, 6], incremental=incremental)
+    assert total == 29
+    assert len(steps) == 1 and steps[0][:2] == [0, []]
+
+
+def test_unbalanced_allocation_must_fit_the_costs():
+    with pytest.raises(ValueError):
+        getTotal([[1, 2], [3, 4]], [[1, 0, 0], [0, 1, 0], [0, 0, 1]], [1, 1, 1], [1, 1, 1])
@@ -0,0 +1,71 @@
+"""
+The benchmark suite (benchmarks/suite.py) on tiny sizes: its instances are what
+they claim, every optimizer run has a zero gap to the optimum, and --compare
+catches a slower or worse run.
+"""
+import json
+
+import pytest
+
+from benchmarks.suite import KINDS, compare, main, make_instance
+from metodosoptimos.init import balance
+from mincostflow import min_cost_flow
+
+
+@pytest.mark.parametrize("kind, balanced", KINDS)
+@pytest.mark.parametrize("seed", range(10))
+def test_instances(kind, balanced, seed):
+    costs, supply, demand = make_instance(kind, balanced, 7, 9, seed)
+    again = make_instance(kind, balanced, 7, 9, seed)
+    assert (supply, demand) == again[1:]
+
+    assert (len(supply), len(demand)) == (7, 9)
+    if balanced:
+        assert sum(supply) == sum(demand)
+    else:
+        assert sum(demand) > sum(supply)
+    # the sparse lanes can always carry the problem
+    min_cost_flow(*balance(costs, supply, demand))
+
+
+@pytest.fixture(scope="module")
+def records(tmp_path_factory):
+    path = tmp_path_factory.mktemp("suite") / "results.jsonl"
+    assert main(["--sizes", "5", "8", "--no-memory", "--pricing", "dantzig", "block", "--output", str(path)]) == 0
+    with open(path, encoding="utf-8") as stream:
+        return path, [json.loads(line) for line in stream]
+
+
+def test_every_optimizer_reaches_the_optimum(records):
+    _, runs = records
+    assert runs and all(run["error"] is None for run in runs)
+    for run in runs:
+        if run["optimizer"] == "none":
+            # an initial solution over missing lanes has no finite cost
+            assert run["gap"] >= 0 if run["cost"] is not None else run["kind"] == "sparse"
+        else:
+            assert run["gap"] == pytest.approx(0, abs=1e-12)
+
+
+def test_every_combination_is_run(records):
+    _, runs = records
+    combinations = {(run["kind"], run["balanced"], run["rows"], run["initial"], run["optimizer"], run.get("pricing"))
+                    for run in runs}
+    assert len(combinations) == len(runs)
+    assert {run["pricing"] for run in runs if run["optimizer"] == "modi"} == {"dantzig", "block"}
+    assert not [run for run in runs if run["kind"] == "sparse" and run["optimizer"] == "stepping_stone"]
+
+
+def test_compare(records, tmp_path, capsys):
+    path, runs = records
+    assert compare(str(path), str(path), 0.25) == 0
+
+    slower = tmp_path / "slower.jsonl"
+    runs = [dict(run) for run in runs]
+    runs[0].update(wall_time=runs[0]["wall_time"] * 10 + 1)
+    runs[1].update(gap=runs[1]["gap"] + 0.5)
+    runs[2].update(error="RuntimeError: broken", wall_time=None)
+    slower.write_text("".join(json.dumps(run) + "\n" for run in runs))
+
+    assert compare(str(path), str(slower), 0.25) == 1
+    assert "3 regressions" in capsys.readouterr().out
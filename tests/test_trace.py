@@ -0,0 +1,103 @@
+"""
+Trace levels of DIMO, MAV and NWCM: "none" and "summary" give the same answer
+as the full trace, "none" formats and prints nothing, and the summary is the
+end of the full text.
+"""
+import random
+
+import pytest
+
+from dimo.init import DIMO
+from mav.init import MAV
+from NWCM import NWCM, northwest_corner
+from tracelog import TRACE_LEVELS, TraceLog
+
+
+def random_problem(seed: int, balanced: bool = True):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, 5), rng.randint(2, 5)
+    costs = [[rng.randint(1, 20) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(1, 30) for _ in range(rows)]
+    demand = [rng.randint(1, 30) for _ in range(cols)]
+    if balanced:
+        gap = sum(supply) - sum(demand)
+        if gap > 0:
+            demand[-1] += gap
+        else:
+            supply[-1] -= gap
+    return costs, supply, demand
+
+
+def start(supply, demand):
+    allocation = [[0] * len(demand) for _ in supply]
+    for i, j, amount in northwest_corner(supply, demand):
+        allocation[i][j] = amount
+    return allocation
+
+
+SEEDS = range(20)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dimo_levels(seed, capsys):
+    costs, supply, demand = random_problem(seed)
+    runs = {}
+    for level in TRACE_LEVELS:
+        dimo = DIMO(costs, start(supply, demand))
+        runs[level] = dimo.solve(trace=level), dimo.resultString, capsys.readouterr().out
+
+    assert runs["none"][0] == runs["summary"][0] == runs["full"][0]
+    assert runs["none"][1:] == ("", "")
+    assert runs["summary"][1]
+    assert runs["full"][1].endswith(runs["summary"][1])
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_mav_levels(seed, engine, capsys):
+    costs, supply, demand = random_problem(seed)
+    runs = {}
+    for level in TRACE_LEVELS:
+        mav = MAV(len(supply), len(demand), costs, list(supply), list(demand))
+        feasible, solution = mav.solve(engine=engine, trace=level)
+        runs[level] = (feasible, solution, mav.get_matrix_parsed()), mav.resultString, capsys.readouterr().out
+
+    assert runs["none"][0] == runs["summary"][0] == runs["full"][0]
+    assert runs["none"][1:] == ("", "")
+    if runs["full"][0][0]:
+        assert runs["summary"][1]
+        # the python engine writes an empty line after each iteration
+        assert runs["full"][1].endswith(runs["summary"][1] + ("\n" if engine == "python" else ""))
+
+
+@pytest.mark.parametrize("balanced", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_nwcm_levels(seed, balanced):
+    costs, supply, demand = random_problem(seed, balanced)
+    runs = {level: NWCM(costs, supply, demand, trace=level) for level in TRACE_LEVELS}
+
+    answers = [(run.get_ToOptimize()[0], run.get_ToOptimize()[2], run.total_cost) for run in runs.values()]
+    assert answers[0] == answers[1] == answers[2]
+    # only the balancing notice, which is not part of the trace
+    assert len(runs["none"].tableau_strings) == (0 if balanced else 4)
+    assert runs["summary"].tableau_strings[-2:] == runs["full"].tableau_strings[-2:]
+    assert len(runs["summary"].tableau_strings) < len(runs["full"].tableau_strings)
+
+
+def test_trace_log():
+    log = TraceLog("summary")
+    log.write("a")
+    log.write("b", end="")
+    log.echo("not kept")
+    assert log.text() == "a\nb"
+    log.reset("c")
+    log.write("d")
+    assert log.text() == "cd\n"
+
+    log.level = "none"
+    log.write("e")
+    assert log.text() == "cd\n"
+    with pytest.raises(ValueError):
+        log.level = "verbose"
+    with pytest.raises(ValueError):
+        NWCM([[1]], [1], [1], trace="verbose")
@@ -0,0 +1,98 @@
+"""
+costominimo.TrazaDeltas against the list of full (oferta, demanda, asignaciones)
+snapshots it replaces: every step, indexed or iterated, and the printed trace.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from costominimo import (
+    TrazaDeltas,
+    metodo_costo_minimo_gui,
+    metodo_costo_minimo_ordenado,
+    return_string_results,
+)
+
+
+def random_problem(seed: int):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 7), rng.randint(1, 7)
+    costs = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(1, 30) for _ in range(rows)]
+    demand = [rng.randint(1, 30) for _ in range(cols)]
+    return costs, supply, demand
+
+
+def assert_same_steps(trace, snapshots):
+    assert len(trace) == len(snapshots)
+    for (offer, demand, allocation), expected in zip(trace, snapshots):
+        assert list(offer) == list(expected[0])
+        assert list(demand) == list(expected[1])
+        assert (allocation == expected[2]).all()
+
+
+METHODS = [metodo_costo_minimo_gui, metodo_costo_minimo_ordenado]
+SEEDS = range(30)
+
+
+@pytest.mark.parametrize("method", METHODS, ids=lambda method: method.__name__)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_trace_iterates_like_the_snapshots(seed, method):
+    costs, supply, demand = random_problem(seed)
+    snapshots, total = method(list(supply), list(demand), costs)
+    trace, trace_total = method(list(supply), list(demand), costs, traza_deltas=True)
+
+    assert isinstance(trace, TrazaDeltas)
+    assert trace_total == total
+    assert_same_steps(trace, snapshots)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_trace_indexes_like_the_snapshots(seed):
+    costs, supply, demand = random_problem(seed)
+    snapshots, _ = metodo_costo_minimo_gui(list(supply), list(demand), costs)
+    trace, _ = metodo_costo_minimo_gui(list(supply), list(demand), costs, traza_deltas=True)
+
+    assert_same_steps([trace[step] for step in range(len(trace))], snapshots)
+    assert_same_steps([trace[step - len(trace)] for step in range(len(trace))], snapshots)
+    with pytest.raises(IndexError):
+        trace[len(trace)]
+    with pytest.raises(IndexError):
+        trace[-len(trace) - 1]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_trace_prints_like_the_snapshots(seed):
+    costs, supply, demand = random_problem(seed)
+    snapshots, total = metodo_costo_minimo_gui(list(supply), list(demand), costs)
+    trace, _ = metodo_costo_minimo_gui(list(supply), list(demand), costs, traza_deltas=True)
+    # the unbalanced problems print the dummy line too
+    matrix = [row + [0] * (len(snapshots[0][1]) - len(row)) for row in costs]
+    matrix += [[0] * len(matrix[0])] * (len(snapshots[0][0]) - len(matrix))
+
+    assert return_string_results(trace, matrix, total) == return_string_results(snapshots, matrix, total)
+
+
+def test_iterated_matrix_is_read_only():
+    trace = TrazaDeltas([5, 5], [5, 5])
+    trace.registrar(0, 0, 5)
+    trace.registrar(1, 1, 5)
+    for _, _, allocation in trace:
+        with pytest.raises(ValueError):
+            allocation[0, 0] = 1
+
+
+def test_indexed_steps_are_independent_copies():
+    trace = TrazaDeltas([5, 5], [5, 5])
+    trace.registrar(0, 0, 5)
+    trace.registrar(1, 1, 5)
+    final = np.array([[5, 0], [0, 5]])
+    trace.cerrar(final)
+
+    first = trace[0][2]
+    first[1, 1] = 7
+    assert (trace[0][2] == [[5, 0], [0, 0]]).all()
+    last = trace[-1][2]
+    last[0, 0] = 7
+    assert (final == [[5, 0], [0, 5]]).all()
@@ -0,0 +1,170 @@
+"""
+Warm start after cost changes (TransportSimplex.update_costs, DIMO.update_costs):
+the shifted potentials against computing them again over the same tree, and the
+new optimum against solving the new costs from scratch with mincostflow.
+"""
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from dimo.init import DIMO
+from dimo.simplex import UPDATE_SUBTREES, TransportSimplex
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+from sparse import SparseCosts
+
+
+def random_problem(seed: int, size: int = 8):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, size), rng.randint(2, size)
+    costs = [[rng.randint(1, 30) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(5, 40) for _ in range(rows)]
+    demand = [rng.randint(5, 40) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    return costs, supply, demand
+
+
+def start(supply, demand):
+    allocation = [[0] * len(demand) for _ in supply]
+    for i, j, amount in northwest_corner(supply, demand):
+        allocation[i][j] = amount
+    return allocation
+
+
+def random_changes(seed: int, costs, count: int, fractional: bool = False):
+    rng = random.Random(seed + 1000)
+    cells = rng.sample([(i, j) for i in range(len(costs)) for j in range(len(costs[0]))], count)
+    return {cell: rng.randint(1, 30) / (4 if fractional else 1) for cell in cells}
+
+
+def applied(costs, changes):
+    new_costs = [row[:] for row in costs]
+    for (i, j), value in changes.items():
+        new_costs[i][j] = value
+    return new_costs
+
+
+def assert_same_potentials(simplex):
+    reference = copy.deepcopy(simplex)
+    reference._build_tree()
+    assert simplex.potential.tolist() == pytest.approx(reference.potential.tolist())
+
+
+CASES = [(seed, count) for seed in range(30) for count in (1, 3, UPDATE_SUBTREES + 5)]
+
+
+@pytest.mark.parametrize("seed, count", CASES)
+def test_update_matches_a_fresh_solve(seed, count):
+    costs, supply, demand = random_problem(seed)
+    changes = random_changes(seed, costs, min(count, len(costs) * len(costs[0])), fractional=seed % 5 == 0)
+    new_costs = applied(costs, changes)
+
+    simplex = TransportSimplex(costs, start(supply, demand))
+    assert simplex.solve()
+    simplex.update_costs(changes)
+    assert_same_potentials(simplex)
+    assert simplex.solve()
+
+    assert simplex.total_cost() == pytest.approx(min_cost_flow(new_costs, supply, demand).cost)
+    assert (simplex.reduced_costs() >= -1e-9).all()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_whole_matrix_update(seed):
+    costs, supply, demand = random_problem(seed)
+    new_costs = np.array(applied(costs, random_changes(seed, costs, 2)))
+    before = [row[:] for row in costs]
+
+    simplex = TransportSimplex(costs, start(supply, demand))
+    simplex.solve()
+    simplex.update_costs(new_costs)
+    assert_same_potentials(simplex)
+    simplex.solve()
+
+    assert simplex.total_cost() == min_cost_flow(new_costs, supply, demand).cost
+    assert costs == before
+
+
+def test_caller_matrix_is_not_written():
+    costs, supply, demand = random_problem(3)
+    matrix = np.array(costs)
+    simplex = TransportSimplex(matrix, start(supply, demand))
+    simplex.update_costs({(0, 0): 99})
+    assert (matrix == np.array(costs)).all()
+
+
+@pytest.mark.parametrize("changes", [{(0, 0): 5, (9, 0): 1}, {(0, 0): 5, (0, -1): 1}])
+def test_invalid_change_changes_nothing(changes):
+    costs, supply, demand = random_problem(4)
+    simplex = TransportSimplex(costs, start(supply, demand))
+    simplex.solve()
+    potential, matrix = simplex.potential.copy(), simplex.costs.copy()
+
+    with pytest.raises(ValueError):
+        simplex.update_costs(changes)
+    assert (simplex.potential == potential).all()
+    assert (simplex.costs == matrix).all()
+
+
+def test_too_large_cost_changes_nothing():
+    costs, supply, demand = random_problem(5)
+    simplex = TransportSimplex(costs, start(supply, demand))
+    potential = simplex.potential.copy()
+    with pytest.raises(OverflowError):
+        simplex.update_costs({(0, 0): 2 ** 62})
+    assert (simplex.potential == potential).all()
+    assert simplex.costs[0, 0] == costs[0][0]
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_sparse_update(seed):
+    costs, supply, demand = random_problem(seed)
+    lanes = {(i, j): cost for i, row in enumerate(costs) for j, cost in enumerate(row) if (i + j) % 3}
+    lanes.update({(i, i % len(demand)): costs[i][i % len(demand)] for i in range(len(supply))})
+    lanes.update({(j % len(supply), j): costs[j % len(supply)][j] for j in range(len(demand))})
+    shape = (len(supply), len(demand))
+    sparse = SparseCosts.from_dict(lanes, shape)
+    try:
+        min_cost_flow(sparse, supply, demand)
+    except ValueError:
+        pytest.skip("the lanes can not carry the problem")
+
+    # a lane far more expensive than the others moves big M too
+    changes = {cell: 7 * cost for cell, cost in list(lanes.items())[:3]}
+    changes[next(iter(lanes))] = 10 ** 6
+    simplex = TransportSimplex(sparse, northwest_corner(supply, demand), cells=True)
+    simplex.solve()
+    simplex.update_costs(changes)
+    assert_same_potentials(simplex)
+    simplex.solve()
+
+    expected = min_cost_flow(SparseCosts.from_dict({**lanes, **changes}, shape), supply, demand).cost
+    assert simplex.total_cost() == expected
+
+    missing = next((i, j) for i in range(shape[0]) for j in range(shape[1]) if (i, j) not in lanes) \
+        if len(lanes) < shape[0] * shape[1] else None
+    if missing:
+        with pytest.raises(ValueError):
+            simplex.update_costs({missing: 1})
+
+
+@pytest.mark.parametrize("engine", ["classic", "tree"])
+@pytest.mark.parametrize("seed", range(10))
+def test_dimo_update_costs(seed, engine):
+    costs, supply, demand = random_problem(seed, size=5)
+    changes = random_changes(seed, costs, 2)
+    before = [row[:] for row in costs]
+
+    dimo = DIMO(costs, start(supply, demand))
+    dimo.solve(engine=engine, trace="none")
+    _, cost = dimo.update_costs(changes, trace="none")
+
+    assert cost == min_cost_flow(applied(costs, changes), supply, demand).cost
+    assert dimo.cost_matrix == applied(costs, changes)
+    assert costs == before
@@ -0,0 +1,84 @@
+"""
+The array backed Vogel engine (mav.vogel_numpy) against the step by step
+MAV.solve_vogel it replaces on big matrices.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from mav.init import MAV, vogel_numpy
+
+
+def random_problem(seed: int, balanced: bool):
+    """Small costs so penalties tie often, amounts that empty lines together"""
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 7), rng.randint(1, 7)
+    costs = [[rng.randint(1, 6) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.choice((5, 10, 15)) for _ in range(rows)]
+    demand = [rng.choice((5, 10, 15)) for _ in range(cols)]
+    if balanced:
+        gap = sum(supply) - sum(demand)
+        if gap > 0:
+            demand[-1] += gap
+        else:
+            supply[-1] -= gap
+    return costs, supply, demand
+
+
+def solved(costs, supply, demand, engine):
+    mav = MAV(len(supply), len(demand), costs, list(supply), list(demand))
+    feasible, message = mav.solve(engine=engine, trace="none")
+    return mav, feasible, message
+
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("balanced", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_engines_agree(seed, balanced):
+    costs, supply, demand = random_problem(seed, balanced)
+    python, feasible, message = solved(costs, supply, demand, "python")
+    numpy, numpy_feasible, numpy_message = solved(costs, supply, demand, "numpy")
+
+    assert numpy_feasible == feasible
+    if not feasible:
+        assert numpy_message == message
+    assert numpy.get_matrix_parsed() == python.get_matrix_parsed()
+    assert numpy.rowsIgnored == python.rowsIgnored
+    assert numpy.columnsIgnored == python.columnsIgnored
+    assert numpy.offer == python.offer
+    assert numpy.demand == python.demand
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_vogel_numpy_matches_the_classic_matrix(seed):
+    costs, supply, demand = random_problem(seed, True)
+    # straight to the method, solve() refuses the shapes that can't be non degenerate
+    python = MAV(len(supply), len(demand), costs, list(supply), list(demand))
+    python.log.level = "none"
+    python.solve_vogel()
+    expected = python.get_matrix_parsed()[0]
+
+    for matrix in (costs, np.array(costs, dtype=float)):
+        allocations, rowsIgnored, columnsIgnored = vogel_numpy(matrix, supply, demand)
+        allocated = [[0] * len(demand) for _ in supply]
+        for i, j, amount in allocations:
+            allocated[i][j] += amount
+        assert allocated == expected
+        assert rowsIgnored == python.rowsIgnored
+        assert columnsIgnored == python.columnsIgnored
+
+
+def test_vogel_numpy_leaves_its_arguments_alone():
+    costs, supply, demand = random_problem(3, True)
+    matrix = np.array(costs)
+    vogel_numpy(matrix, supply, demand)
+    assert (matrix == np.array(costs)).all()
+    assert (supply, demand) == random_problem(3, True)[1:]
+
+
+def test_unknown_tie_rule():
+    with pytest.raises(ValueError):
+        vogel_numpy([[1]], [1], [1], ties="random")
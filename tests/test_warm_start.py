@@ -0,0 +1,143 @@
+"""
+Warm start after supply / demand changes (TransportSimplex.resolve, DIMO.resolve)
+against solving the changed problem from scratch with mincostflow.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from dimo.init import DIMO
+from dimo.simplex import TransportSimplex
+from mincostflow import min_cost_flow
+from NWCM import northwest_corner
+from sparse import SparseCosts
+
+
+def random_problem(seed: int, size: int = 8):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, size), rng.randint(2, size)
+    costs = [[rng.randint(1, 30) for _ in range(cols)] for _ in range(rows)]
+    supply = [rng.randint(5, 40) for _ in range(rows)]
+    demand = [rng.randint(5, 40) for _ in range(cols)]
+    gap = sum(supply) - sum(demand)
+    if gap > 0:
+        demand[-1] += gap
+    else:
+        supply[-1] -= gap
+    return costs, supply, demand
+
+
+def start(supply, demand):
+    allocation = [[0] * len(demand) for _ in supply]
+    for i, j, amount in northwest_corner(supply, demand):
+        allocation[i][j] = amount
+    return allocation
+
+
+def random_change(seed: int, supply, demand):
+    """Balanced deltas that keep every amount non negative, as lists"""
+    rng = random.Random(seed + 1000)
+    supply_delta = [rng.randint(-amount // 2, 10) for amount in supply]
+    demand_delta = [0] * len(demand)
+    left = sum(supply_delta)
+    for j in rng.sample(range(len(demand)), len(demand)):
+        step = max(left, -demand[j]) if left < 0 else left
+        demand_delta[j] += step
+        left -= step
+    assert left == 0
+    return supply_delta, demand_delta
+
+
+def changed(amounts, delta):
+    return [amount + change for amount, change in zip(amounts, delta)]
+
+
+def assert_solves(allocation, supply, demand):
+    allocation = np.asarray(allocation)
+    assert (allocation >= 0).all()
+    assert allocation.sum(axis=1).tolist() == supply
+    assert allocation.sum(axis=0).tolist() == demand
+
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_resolve_matches_a_fresh_solve(seed):
+    costs, supply, demand = random_problem(seed)
+    supply_delta, demand_delta = random_change(seed, supply, demand)
+    new_supply, new_demand = changed(supply, supply_delta), changed(demand, demand_delta)
+
+    simplex = TransportSimplex(costs, start(supply, demand))
+    assert simplex.solve()
+    assert simplex.resolve(supply_delta, demand_delta)
+
+    assert simplex.supply == new_supply and simplex.demand == new_demand
+    assert_solves(simplex.allocation(), new_supply, new_demand)
+    assert simplex.total_cost() == min_cost_flow(costs, new_supply, new_demand).cost
+    assert (simplex.reduced_costs() >= 0).all()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dict_deltas_and_repeated_changes(seed):
+    costs, supply, demand = random_problem(seed)
+    simplex = TransportSimplex(costs, start(supply, demand))
+    for step in range(3):
+        supply_delta, demand_delta = random_change(seed * 3 + step, supply, demand)
+        supply, demand = changed(supply, supply_delta), changed(demand, demand_delta)
+        assert simplex.resolve(
+            {i: delta for i, delta in enumerate(supply_delta) if delta},
+            {j: delta for j, delta in enumerate(demand_delta) if delta},
+        )
+        assert simplex.total_cost() == min_cost_flow(costs, supply, demand).cost
+
+
+@pytest.mark.parametrize("engine", ["classic", "tree"])
+@pytest.mark.parametrize("seed", range(15))
+def test_dimo_resolve(seed, engine):
+    costs, supply, demand = random_problem(seed, size=5)
+    supply_delta, demand_delta = random_change(seed, supply, demand)
+    new_supply, new_demand = changed(supply, supply_delta), changed(demand, demand_delta)
+
+    dimo = DIMO(costs, start(supply, demand))
+    dimo.solve(engine=engine, trace="none")
+    allocation, cost = dimo.resolve(supply_delta, demand_delta)
+
+    assert_solves(allocation, new_supply, new_demand)
+    assert cost == min_cost_flow(costs, new_supply, new_demand).cost
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_sparse_resolve(seed):
+    costs, supply, demand = random_problem(seed)
+    # the diagonal and the last column are missing lanes, the rest stays
+    lanes = SparseCosts.from_dict(
+        {(i, j): cost for i, row in enumerate(costs) for j, cost in enumerate(row) if i != j or j == len(row) - 1},
+        (len(supply), len(demand)),
+    )
+    supply_delta, demand_delta = random_change(seed, supply, demand)
+    new_supply, new_demand = changed(supply, supply_delta), changed(demand, demand_delta)
+    try:
+        expected = min_cost_flow(lanes, new_supply, new_demand).cost
+        min_cost_flow(lanes, supply, demand)
+    except ValueError:
+        pytest.skip("the lanes can not carry one of the problems")
+
+    simplex = TransportSimplex(lanes, northwest_corner(supply, demand), cells=True)
+    assert simplex.resolve(supply_delta, demand_delta)
+    assert simplex.total_cost() == expected
+    assert not [cell for cell in simplex.artificial_cells() if cell[2]]
+
+
+def test_unbalanced_change():
+    simplex = TransportSimplex([[1, 2], [3, 4]], [[5, 0], [0, 5]])
+    with pytest.raises(ValueError):
+        simplex.resolve([1, 0], [0, 0])
+
+
+def test_infeasible_change():
+    dimo = DIMO([[1, 2], [3, 4]], [[5, 0], [0, 5]])
+    dimo.solve(engine="tree", trace="none")
+    # the demand of column 0 can not go below zero
+    assert dimo.resolve([-6, 0], [-6, 0]) == (None, None)
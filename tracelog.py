@@ -0,0 +1,57 @@
+from typing import List
+
+# "none": nothing is formatted or printed, for batch runs
+# "summary": only the final tableau and the status messages
+# "full": every intermediate tableau, like the GUI shows them
+TRACE_LEVELS = ("none", "summary", "full")
+
+
+class TraceLog:
+    """
+    Text of a solver run kept as a list of parts and joined only when it is read,
+    so a long run does not copy the whole text on every line it adds.
+    Every line written is also printed to the console.
+    """
+
+    def __init__(self, level: str = "full"):
+        self.level = level
+        self.parts: List[str] = []
+
+    @property
+    def level(self) -> str:
+        return self._level
+
+    @level.setter
+    def level(self, level: str) -> None:
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"Unknown trace level {level!r}, expected one of {TRACE_LEVELS}")
+        self._level = level
+
+    @property
+    def summary(self) -> bool:
+        """True when the final tableau and the status messages are wanted"""
+        return self._level != "none"
+
+    @property
+    def full(self) -> bool:
+        """True when every intermediate tableau is wanted"""
+        return self._level == "full"
+
+    def write(self, text: str = "", end: str = "\n") -> None:
+        if self._level == "none":
+            return
+        self.parts.append(text + end)
+        print(text, end=end)
+
+    def echo(self, text: str = "") -> None:
+        """Print only, the text is not kept"""
+        if self._level != "none":
+            print(text)
+
+    def text(self) -> str:
+        if len(self.parts) > 1:
+            self.parts[:] = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
+
+    def reset(self, text: str = "") -> None:
+        self.parts[:] = [text] if text else []